@@ -2,7 +2,7 @@ import tkinter as tk
 from tkinter import ttk
 from ttkwidgets.autocomplete import AutocompleteCombobox
 from tkcalendar import DateEntry
-import requests
+from background_api import api
 from tkinter import messagebox
 
 class AddPaymentWindow:
@@ -16,6 +16,7 @@ class AddPaymentWindow:
         self.window.protocol("WM_DELETE_WINDOW", self.window.destroy)
 
         self.client_id = client_id
+        self.save_request = None  # In-flight /add_payment request; blocks double submits
         self.client_name_var = tk.StringVar()
         if client_name:
             self.client_name_var.set(client_name)
@@ -125,9 +126,13 @@ class AddPaymentWindow:
         open_client_search_window(self.window, on_client_selected)
 
     def load_orders_for_client(self, client_id):
-        """Fetch and display only orders with balance > 0."""
+        """Fetch (in the background) and display only orders with balance > 0."""
+        api.get(self.window, '/orders', params={'client_id': client_id},
+                on_success=self.on_orders_loaded,
+                on_error=lambda e: messagebox.showerror("Adaugă Plată – Eroare", f"A apărut o eroare: {e}"))
+
+    def on_orders_loaded(self, response):
         try:
-            response = requests.get(f'http://127.0.0.1:5000/orders?client_id={client_id}')
             if response.status_code == 200:
                 all_orders = response.json()
                 self.orders = [o for o in all_orders if o.get('balance', 0) > 0]
@@ -168,6 +173,9 @@ class AddPaymentWindow:
         self.observations_var.set("")
 
     def save_payment(self):
+        if self.save_request is not None:
+            return  # Still saving the previous click
+
         if not hasattr(self, 'client_id') or not self.client_id:
             messagebox.showerror("Adaugă Plată", "Selectați un client.")
             return
@@ -199,20 +207,28 @@ class AddPaymentWindow:
             "observations": observations
         }
 
-        try:
-            response = requests.post("http://127.0.0.1:5000/add_payment", json=payload)
-            if response.status_code == 200:
-                messagebox.showinfo("Succes", "Plata a fost salvată.")
+        def on_error(e):
+            self.save_request = None
+            messagebox.showerror("Adaugă Plată", f"Eroare la trimiterea plății: {e}")
 
-                # Refresh the main Dashboard's orders and balances
-                dashboard = self.parent.app
-                client_name = self.client_name_var.get()
-                dashboard.refresh_client_orders(client_name)
-                dashboard.refresh_client_balances(client_name)
+        self.save_request = api.post(self.window, "/add_payment", json=payload,
+                                     on_success=self.on_payment_saved, on_error=on_error)
 
-                # Close this payment window
-                self.window.destroy()
+    def on_payment_saved(self, response):
+        self.save_request = None
+        if response.status_code == 200:
+            if response.json().get("pending"):
+                messagebox.showinfo("Succes", "Plata a fost salvată și se trimite la server. "
+                                              "Dacă serverul o respinge, veți fi anunțat.")
             else:
-                messagebox.showerror("Adaugă Plată", f"Nu s-a putut salva plata: {response.text}")
-        except Exception as e:
-            messagebox.showerror("Adaugă Plată", f"Eroare la trimiterea plății: {e}")
+                messagebox.showinfo("Succes", "Plata a fost salvată.")
+
+            # Refresh the main Dashboard's orders and balances
+            dashboard = self.parent.app
+            dashboard.refresh_client_orders()
+            dashboard.refresh_client_balances()
+
+            # Close this payment window
+            self.window.destroy()
+        else:
+            messagebox.showerror("Adaugă Plată", f"Nu s-a putut salva plata: {response.text}")
@@ -0,0 +1,190 @@
+# filepath: flask-app/api_client.py
+# Shared HTTP client for every GUI -> Flask call: one pooled keep-alive session,
+# default timeouts, retry with backoff, conditional GETs and per-endpoint latency histograms.
+import atexit
+import copy
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from latency import LatencyHistogram
+
+DEFAULT_BASE_URL = "http://127.0.0.1:5000"
+
+# Path segments that are ids (UUIDs, numbers) are folded so /clients/<id> is one endpoint
+_ID_SEGMENT = re.compile(r"^([0-9a-fA-F]{8}-[0-9a-fA-F-]{27}|\d+)$")
+
+def _config_path():
+    base_path = sys._MEIPASS if getattr(sys, 'frozen', False) else os.path.dirname(__file__)
+    return os.path.join(base_path, "config.json")
+
+def load_client_config():
+    """api_* settings from config.json (missing file or keys fall back to defaults)."""
+    try:
+        with open(_config_path(), "r") as config_file:
+            return json.load(config_file)
+    except (OSError, ValueError):
+        return {}
+
+def endpoint_key(method, path):
+    segments = ["<id>" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/")]
+    return f"{method.upper()} {'/'.join(segments)}"
+
+class ApiClient:
+    """requests.Session wrapper used by all GUI windows.
+
+    Paths are relative to base_url ('/clients'); absolute URLs pointing at the
+    default local server are rebased, so a configured base_url applies to them
+    too. Idempotent requests are retried with exponential backoff on
+    connection errors and 502/503/504; probe() sends a single attempt, for
+    loops that poll on their own (the 503 of /health during warm-up).
+
+    GET responses that carry an ETag are kept (the last etag_cache_size of
+    them, by URL) and revalidated with If-None-Match; a 304 from the server
+    is answered with the kept response, marked not_modified = True.
+    """
+    def __init__(self, base_url=DEFAULT_BASE_URL, timeout=(3.05, 30), retries=3, backoff_factor=0.3, pool_size=10,
+                 etag_cache_size=64):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"]),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._probe_session = requests.Session()  # Default adapters: no retries
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self.etag_cache_size = etag_cache_size
+        self._validated = OrderedDict()  # full GET URL -> last 200 response with an ETag
+        self._conditional = {"revalidated": 0, "not_modified": 0}
+
+    @classmethod
+    def from_config(cls):
+        config = load_client_config()
+        timeout = config.get("api_timeout_seconds", [3.05, 30])
+        client = cls(
+            base_url=os.environ.get("CMS_API_URL") or config.get("api_base_url", DEFAULT_BASE_URL),
+            timeout=tuple(timeout) if isinstance(timeout, list) else timeout,
+            retries=config.get("api_retries", 3),
+            backoff_factor=config.get("api_backoff_factor", 0.3),
+            pool_size=config.get("api_pool_size", 10),
+            etag_cache_size=config.get("api_etag_cache_size", 64)
+        )
+        latency_file = os.environ.get("CMS_API_LATENCY_FILE") or config.get("api_latency_file")
+        if latency_file:
+            atexit.register(client.dump_latency, latency_file)
+        return client
+
+    def url(self, path):
+        if path.startswith(DEFAULT_BASE_URL):
+            path = path[len(DEFAULT_BASE_URL):]
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method, path, **kwargs):
+        url = self.url(path)
+        kwargs.setdefault("timeout", self.timeout)
+        key = endpoint_key(method, urlsplit(url).path)
+        conditional = method.upper() == "GET" and self.etag_cache_size > 0 and not kwargs.get("stream")
+        if conditional:
+            full_url = requests.Request("GET", url, params=kwargs.get("params")).prepare().url
+            kept = self._kept_response(full_url)
+            if kept is not None:
+                kwargs["headers"] = {"If-None-Match": kept.headers["ETag"], **(kwargs.get("headers") or {})}
+        started = time.perf_counter()
+        error = True
+        try:
+            response = self.session.request(method, url, **kwargs)
+            error = response.status_code >= 500
+        finally:
+            self._record(key, (time.perf_counter() - started) * 1000, error)
+        if conditional:
+            response = self._revalidate(full_url, kept, response)
+        return response
+
+    def _kept_response(self, full_url):
+        with self._lock:
+            kept = self._validated.get(full_url)
+            if kept is not None:
+                self._validated.move_to_end(full_url)
+                self._conditional["revalidated"] += 1
+            return kept
+
+    def _revalidate(self, full_url, kept, response):
+        """The response to hand back: the kept copy on a 304, else response (kept if it has an ETag)."""
+        if response.status_code == 304 and kept is not None:
+            with self._lock:
+                self._conditional["not_modified"] += 1
+            fresh = copy.copy(kept)
+            fresh.not_modified = True
+            fresh.elapsed = response.elapsed
+            return fresh
+        with self._lock:
+            if response.status_code == 200 and "ETag" in response.headers:
+                response.content  # Read the body now, it is served again on a 304
+                self._validated[full_url] = response
+                self._validated.move_to_end(full_url)
+                while len(self._validated) > self.etag_cache_size:
+                    self._validated.popitem(last=False)
+            else:
+                self._validated.pop(full_url, None)
+        response.not_modified = False
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def probe(self, path, **kwargs):
+        """GET path once: no retries, no ETag revalidation, not recorded in the latency histograms."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self._probe_session.get(self.url(path), **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request("PATCH", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def _record(self, key, elapsed_ms, error):
+        with self._lock:
+            self._histograms.setdefault(key, LatencyHistogram()).record(elapsed_ms, error)
+
+    def latency_stats(self):
+        with self._lock:
+            return {key: histogram.to_dict() for key, histogram in sorted(self._histograms.items())}
+
+    def conditional_stats(self):
+        """How many GETs were sent with If-None-Match, and how many of those came back 304."""
+        with self._lock:
+            return {**self._conditional, "kept": len(self._validated)}
+
+    def dump_latency(self, path):
+        """Write the per-endpoint latency histograms to path as JSON."""
+        with open(path, "w", encoding="utf-8") as dump_file:
+            json.dump({"base_url": self.base_url, "endpoints": self.latency_stats(),
+                       "conditional": self.conditional_stats()}, dump_file, indent=2)
+        return path
+
+# Shared by every window
+api_client = ApiClient.from_config()
@@ -1,15 +1,31 @@
 # filepath: flask-app/app.py
-from flask import Flask, jsonify, request, redirect
+from flask import Flask, g, jsonify, request, redirect, Response, stream_with_context
 from flask_cors import CORS
-from supabase import create_client, Client
-from config import SUPABASE_URL, SUPABASE_KEY
+import base64
 import json
 import os
+import re
 import csv
+import socket
 import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
 import sys
-from google.oauth2 import service_account
+import click
+import local_db
+from functools import wraps
+from response_cache import ResponseCache, TableVersions
+from search_index import SearchIndex, fold
+from text_index import TextIndex
+from services import registry
+from serving import ConcurrencyLimiter, serve
+from metrics import RequestMetrics, TracedSupabase, ContextThreadPoolExecutor
+from replica import Replica, ReplicaSync, KEY_COLUMNS
+from outbox import Outbox, REPLAY_HEADER, DONE, RETRY, FAILED
+from write_behind import WriteBehind
 
 # Determine the base path for data files
 if getattr(sys, 'frozen', False):
@@ -37,18 +53,54 @@ supabase_key = config.get("supabase_key")
 if not supabase_url or not supabase_key:
     raise ValueError("Supabase URL and key must be provided in the configuration file.")
 
-# Load Google Service Account credentials
-credentials = service_account.Credentials.from_service_account_file(
-    service_account_keyfile,
-    scopes=["https://www.googleapis.com/auth/drive"]
+def build_supabase_client():
+    """Supabase client (supabase-py and its HTTP stack are imported on first use)."""
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
+
+def load_drive_credentials():
+    """Google Service Account credentials (google.auth is imported on first use)."""
+    from google.oauth2 import service_account
+    return service_account.Credentials.from_service_account_file(
+        service_account_keyfile,
+        scopes=["https://www.googleapis.com/auth/drive"]
+    )
+
+# Per-endpoint wall time, Supabase calls and DB time per request (see metrics.py, /metrics);
+# requests slower than slow_request_ms go to the slow-request log
+request_metrics = RequestMetrics(
+    slow_ms=config.get("slow_request_ms", 1000),
+    slow_log_size=config.get("slow_request_log_size", 100)
 )
 
-# Initialize Supabase client
-supabase_client = create_client(supabase_url, supabase_key)
+# Supabase client and Drive credentials are built on first use (see services.py)
+registry.register('supabase', lambda: TracedSupabase(build_supabase_client(), request_metrics))
+registry.register('drive_credentials', load_drive_credentials)
+supabase_client = registry.lazy('supabase')
+
+# Optional SQLite stand-in for the RPCs in sql/ (development; local_db_test.py checks it). Only call_rpc
+# uses it: table reads and writes still go to Supabase, so the RPCs see only what is seeded into the file
+local_db_path = config.get("local_db_path")
+local_db_conn = local_db.connect(local_db_path) if local_db_path else None
+if local_db_conn is not None:
+    print(f"[DEBUG] RPCs are answered by the local SQLite stand-in {local_db_path}, not by Supabase")
 
 app = Flask(__name__)
 CORS(app)
 
+# Serving: "waitress" (multi-threaded production server) or "development" (Flask's own);
+# at most server_threads requests run at once, server_queue_depth more may wait for a slot
+SERVER_MODE = config.get("server_mode", "waitress")
+SERVER_THREADS = config.get("server_threads", 8)
+SERVER_QUEUE_DEPTH = config.get("server_queue_depth", 32)
+request_limiter = ConcurrencyLimiter(
+    app.wsgi_app,
+    max_active=SERVER_THREADS,
+    max_queued=SERVER_QUEUE_DEPTH,
+    queue_timeout=config.get("server_queue_timeout_seconds", 30)
+)
+app.wsgi_app = request_limiter
+
 # Configure logging to save debug statements into a .txt file
 LOG_FILE = os.path.join(os.path.dirname(__file__), 'debug_log.txt')
 
@@ -71,11 +123,38 @@ logging.basicConfig(
 # Add the custom filter to the root logger
 logging.getLogger().addFilter(RelevantFilter())
 
+# Cache for the read-mostly GET endpoints; write routes invalidate it (see cached / invalidates)
+response_cache = ResponseCache(
+    max_entries=config.get("cache_max_entries", 512),
+    ttl_seconds=config.get("cache_ttl_seconds", 30)
+)
+
+# Versions of the tables behind the cached endpoints, bumped by the write routes; they give
+# those endpoints an ETag / Last-Modified so unchanged lists are answered with a bodyless 304
+table_versions = TableVersions(
+    max_age_seconds=config.get("etag_max_age_seconds", config.get("cache_ttl_seconds", 30))
+)
+
+# Local full-text index over clients, vehicles and products (see search_index.py);
+# ":memory:" rebuilds from Supabase on every start, a file path keeps it between runs
+search_index = SearchIndex(config.get("search_index_path", ":memory:"))
+
 # Temporary storage for tokens
 tokens = {}
 
-with open(judete_localitati_path, 'r', encoding='utf-8') as json_file:
-    judete_localitati = json.load(json_file)
+def load_judete_localitati():
+    with open(judete_localitati_path, 'r', encoding='utf-8') as json_file:
+        return json.load(json_file)
+
+# Localities data and the folded indexes behind /search_localitati and /search_judete,
+# loaded by the first request that needs them
+registry.register('judete_localitati', load_judete_localitati)
+registry.register('localitati_index', lambda: TextIndex(
+    (localitate, {'judet': judet, 'localitate': localitate})
+    for judet, localitati in registry.get('judete_localitati').items()
+    for localitate in localitati
+))
+registry.register('judete_index', lambda: TextIndex((judet, judet) for judet in registry.get('judete_localitati')))
 
 # Define constants for table names
 TABLE_CLIENTS = "clients"
@@ -85,6 +164,94 @@ TABLE_OFFER_PRODUCTS = "offer_products"
 TABLE_ORDERS = "orders"
 TABLE_ORDER_PRODUCTS = "order_products"
 TABLE_PROFILES = "profiles"
+TABLE_CHANGE_LOG = "change_log"
+
+# SQLSTATE raised by the database functions in sql/ -> HTTP status
+RPC_ERROR_STATUS = {
+    'P0001': 400,  # raise_exception: invalid request (e.g. no products in the category)
+    'P0002': 404,  # no_data_found
+    '23505': 409,  # unique_violation: e.g. the offer was already converted to an order
+}
+
+# Maximum number of rows sent in one bulk insert request
+BULK_INSERT_CHUNK_SIZE = 500
+
+# in_() filters travel in the URL; ~100 UUIDs per request stays well under proxy limits
+IN_FILTER_CHUNK_SIZE = 100
+MAX_BATCH_IDS = 1000
+
+# /search_universal: page size, and the cap on the results paged through by the cursors (and streamed)
+SEARCH_PER_PAGE = config.get("search_per_page", 50)
+SEARCH_MAX_PER_PAGE = 500
+SEARCH_MAX_RESULTS = config.get("search_max_results", 5000)
+SEARCH_TABLES = ('clients', 'vehicles', 'offers', 'offer_products', 'orders', 'order_products')
+
+# Nested objects kept per row for the product categories of search_universal
+SEARCH_PRODUCT_FIELDS = {
+    "order_products": {
+        "order": ("id", "order_number"),
+        "client": ("id", "nume", "telefon"),
+        "vehicle": ("marca", "model", "numar_inmatriculare", "vin", "an"),
+        "order_product": ("produs", "brand", "cod_produs", "cantitate", "pret_unitar", "pret_total", "discount", "pret_cu_discount"),
+    },
+    "offer_products": {
+        "offer": ("id", "offer_number"),
+        "client": ("id", "nume", "telefon"),
+        "vehicle": ("marca", "model", "numar_inmatriculare", "vin", "an"),
+        "offer_product": ("produs", "brand", "cod_produs", "cantitate", "pret_unitar", "pret_total", "discount", "pret_cu_discount"),
+    },
+}
+
+# Default and maximum number of results of /search_localitati and /search_judete
+LOCALITATI_SEARCH_LIMIT = 50
+LOCALITATI_SEARCH_MAX_LIMIT = 500
+
+# fields= / count= on the list routes: plain column names only, and the PostgREST count methods offered
+FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+COUNT_METHODS = ('exact', 'estimated')
+
+# /search_index: rows per Supabase page while building, and the cap on results per query
+SEARCH_INDEX_PAGE_SIZE = 1000
+SEARCH_INDEX_MAX_LIMIT = 200
+
+# /sync: the tables it hands out (logged by sql/change_log.sql) and change-log entries per delta
+SYNC_TABLES = ('clients', 'vehicles', 'offers', 'offer_products', 'orders', 'order_products', 'payments', 'return_products',
+               'order_balances')
+SYNC_PAGE_SIZE = config.get("sync_page_size", 1000)
+SYNC_MAX_PAGE_SIZE = 5000
+
+def user_data_dir():
+    """Per-user folder (%APPDATA%/CMS, else ~/.cms) for files that must outlive the process.
+
+    Not base_path: in the one-file PyInstaller build that is a temporary
+    folder deleted when the app exits.
+    """
+    appdata = os.environ.get('APPDATA')
+    path = config.get("data_dir") or (os.path.join(appdata, 'CMS') if appdata else os.path.join(os.path.expanduser('~'), '.cms'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+# Local SQLite replica of SYNC_TABLES (see replica.py): once it holds a snapshot the data helpers
+# read from it, and idempotent writes made while Supabase is unreachable wait in its outbox.
+# replica_path null turns it off
+REPLICA_PATH = config.get("replica_path", os.path.join(user_data_dir(), 'replica.sqlite3'))
+replica = Replica(REPLICA_PATH, SYNC_TABLES) if REPLICA_PATH else None
+outbox = Outbox(REPLICA_PATH) if REPLICA_PATH else None
+replica_sync = None  # ReplicaSync, created next to /sync below
+
+# /add_payment and /add_return answer once the row is queued in the replica file; a background thread
+# sends the queue to record_ledger_writes (sql/ledger_writes.sql), WRITE_BEHIND_BATCH_SIZE rows per call
+WRITE_BEHIND_BATCH_SIZE = config.get("write_behind_batch_size", 50)
+write_behind = None  # WriteBehind, created next to /add_payment below
+
+# Exceptions (by class name, from httpx / httpcore) meaning Supabase could not be reached
+NETWORK_ERROR_NAMES = frozenset([
+    'ConnectError', 'ConnectTimeout', 'ReadTimeout', 'WriteTimeout', 'PoolTimeout',
+    'ReadError', 'WriteError', 'RemoteProtocolError', 'NetworkError', 'TimeoutException',
+])
+
+# Worker pool for endpoints that fan out independent Supabase queries (e.g. /clients/<id>/bundle)
+fetch_executor = ContextThreadPoolExecutor(max_workers=config.get("fetch_workers", 8), thread_name_prefix="fetch")
 
 def handle_api_error(func):
     """Decorator to handle errors in API endpoints."""
@@ -96,6 +263,220 @@ def handle_api_error(func):
             return jsonify({"error": str(e)}), 500
     return wrapper
 
+def _request_client_id(view_args):
+    """Client id addressed by the current request (URL, query string or JSON body), if any."""
+    client_id = view_args.get('client_id') or request.args.get('client_id')
+    if not client_id and request.is_json:
+        client_id = (request.get_json(silent=True) or {}).get('client_id')
+    return client_id
+
+def _not_modified(etag, last_modified):
+    """Whether the client's copy (If-None-Match, else If-Modified-Since) is still current."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    return request.if_modified_since is not None and last_modified <= request.if_modified_since.timestamp()
+
+def cached(*tables):
+    """Serve a GET endpoint from response_cache; `tables` are the tables its response is built from.
+
+    Responses carry an ETag and Last-Modified from table_versions; a conditional
+    request whose tables have not changed since gets a 304 without running the endpoint.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return func(*args, **kwargs)
+            etag, last_modified = table_versions.validators(tables)
+            if _not_modified(etag, last_modified):
+                response = app.response_class(status=304)
+            else:
+                response = _cached_response(func, tables, args, kwargs)
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+def _cached_response(func, tables, args, kwargs):
+    """The endpoint's response from response_cache, or from running it (and caching a 200)."""
+    key = (request.endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))))
+    hit = response_cache.get(key)
+    if hit is not None:
+        body, status, headers = hit
+        response = app.response_class(body, status=status, headers=headers)
+        response.headers['X-Cache'] = 'HIT'
+        return response
+    response = app.make_response(func(*args, **kwargs))
+    if response.status_code == 200:
+        response_cache.set(key, (response.get_data(), response.status_code, list(response.headers.items())),
+                           tables, _request_client_id(kwargs))
+    response.headers['X-Cache'] = 'MISS'
+    return response
+
+def invalidates(*tables):
+    """After a successful write, drop cached responses built from `tables` (narrowed to the client when known)."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            response = app.make_response(func(*args, **kwargs))
+            if request.method != 'GET' and response.status_code < 400:
+                if (replica_sync is not None and replica.ready and not request.headers.get(REPLAY_HEADER)
+                        and not g.get('write_deferred')):
+                    replica_sync.refresh()  # Read-your-writes: the replica serves the next GET
+                response_cache.invalidate(tables, _request_client_id(kwargs))
+                table_versions.bump(tables)
+            return response
+        return wrapper
+    return decorator
+
+def is_network_error(error):
+    """Whether error, or an exception it was raised from, means Supabase could not be reached."""
+    while error is not None:
+        if isinstance(error, (ConnectionError, TimeoutError, socket.gaierror)) or type(error).__name__ in NETWORK_ERROR_NAMES:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+def queues_offline(apply_locally=None):
+    """Queue an idempotent write in the outbox (202) when Supabase cannot be reached.
+
+    The background sync replays it once Supabase answers again.
+    apply_locally(view_args) mirrors the write in the replica meanwhile, so
+    the GUI reads what it just saved; place it under @invalidates, which then
+    also expires the cached responses for the 202.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if request.method == 'GET' or outbox is None or not is_network_error(e):
+                    raise
+                if request.headers.get(REPLAY_HEADER):
+                    return jsonify({"error": f"Supabase nu răspunde: {e}"}), 503
+                entry_id = outbox.add(request.method, request.full_path, request.get_data(as_text=True), request.content_type)
+                g.write_deferred = True  # Queued, not sent: nothing for the replica to pull yet
+                if replica_sync is not None:
+                    replica_sync.mark_offline(e)
+                if apply_locally is not None and replica is not None and replica.ready:
+                    apply_locally(kwargs)
+                app.logger.warning(f"Supabase unreachable, queued {request.method} {request.full_path} as outbox entry {entry_id}: {e}")
+                return jsonify({
+                    "queued": True,
+                    "outbox_id": entry_id,
+                    "message": "Fără conexiune: modificarea a fost salvată local și va fi trimisă automat."
+                }), 202
+        return wrapper
+    return decorator
+
+@app.route('/cache/stats', methods=['GET'], endpoint='cache_stats')
+def cache_stats():
+    return jsonify({**response_cache.stats(), "versions": table_versions.stats()}), 200
+
+def warm_up_steps():
+    """(name, required, func) of the server warm-up; /health is ready once the required steps are done."""
+    steps = [
+        ('supabase', True, lambda: registry.get('supabase')),
+        ('localitati', True, lambda: (registry.get('localitati_index'), registry.get('judete_index'))),
+    ]
+    if config.get("search_index_warmup", True):
+        steps.append(('search_index', False, rebuild_search_index))
+    return steps
+
+warm_up_status = {}
+warm_up_lock = threading.Lock()
+
+def _run_warm_up_step(name, func):
+    started = time.perf_counter()
+    try:
+        func()
+        warm_up_status[name] = {"state": "ok", "ms": round((time.perf_counter() - started) * 1000, 1)}
+    except Exception as e:
+        app.logger.error(f"Error in warm-up step {name}: {e}")
+        warm_up_status[name] = {"state": "error", "error": str(e)}
+
+def start_warm_up():
+    """Run the warm-up steps in parallel background threads (once per process)."""
+    with warm_up_lock:
+        if warm_up_status:
+            return
+        for name, _, func in warm_up_steps():
+            warm_up_status[name] = {"state": "running"}
+            threading.Thread(target=_run_warm_up_step, args=(name, func), name=f"warm-up-{name}", daemon=True).start()
+        if replica_sync is not None:
+            replica_sync.start()
+        if write_behind is not None:
+            write_behind.start()
+
+@app.before_request
+def ensure_warm_up():
+    # Servers started without run_app.py (flask run, python app.py) warm up on their first request
+    if not warm_up_status:
+        start_warm_up()
+
+@app.before_request
+def start_request_timer():
+    g.request_timer = request_metrics.begin()
+
+@app.after_request
+def record_response_status(response):
+    g.response_status = response.status_code
+    return response
+
+@app.teardown_request
+def record_request_metrics(exception=None):
+    timer = g.pop('request_timer', None)
+    if timer is None:
+        return
+    status = g.pop('response_status', 500)
+    elapsed_ms = request_metrics.finish(timer, request.endpoint or 'unmatched', request.method, request.path, status)
+    if elapsed_ms >= request_metrics.slow_ms:
+        app.logger.warning(f"Slow request: {request.method} {request.full_path.rstrip('?')} -> {status} in {elapsed_ms:.0f} ms "
+                           f"({timer.db_calls} Supabase calls, {timer.db_ms:.0f} ms)")
+
+@app.route('/metrics', methods=['GET'], endpoint='metrics')
+def metrics():
+    """Prometheus text: request latency and DB time per endpoint, Supabase call latency, serving gauges."""
+    server = request_limiter.stats()
+    extra = [
+        ("cms_server_requests_active", "gauge", "Requests being served.", server["active"]),
+        ("cms_server_requests_queued", "gauge", "Requests waiting for a serving slot.", server["queued"]),
+        ("cms_server_requests_rejected_total", "counter", "Requests turned away with 503 because the queue was full.", server["rejected"]),
+    ]
+    return Response(request_metrics.prometheus(extra), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/metrics/slow', methods=['GET'], endpoint='slow_requests')
+def slow_requests():
+    """The rolling slow-request log, most recent first, with the Supabase calls each request made."""
+    return jsonify({"threshold_ms": request_metrics.slow_ms, "requests": request_metrics.slow_requests()}), 200
+
+@app.route('/metrics/stats', methods=['GET'], endpoint='metrics_stats')
+def metrics_stats():
+    return jsonify(request_metrics.stats()), 200
+
+@app.route('/health', methods=['GET'], endpoint='health')
+def health():
+    """Readiness probe for the launcher: 200 once every required warm-up step is done, 503 before."""
+    required = {name for name, is_required, _ in warm_up_steps() if is_required}
+    steps = {name: dict(status, required=name in required) for name, status in list(warm_up_status.items())}
+    ready = all(steps.get(name, {}).get("state") == "ok" for name in required)
+    return jsonify({"ready": ready, "steps": steps}), 200 if ready else 503
+
+@app.route('/server/stats', methods=['GET'], endpoint='server_stats')
+def server_stats():
+    """Serving mode, requests in flight and queued, and how long requests waited for a slot."""
+    return jsonify({"mode": SERVER_MODE, **request_limiter.stats()}), 200
+
+@app.route('/services/stats', methods=['GET'], endpoint='services_stats')
+def services_stats():
+    """Which lazily built services exist yet, and how long each took to build."""
+    return jsonify(registry.stats()), 200
+
 def paginate_results(queryset, page, per_page):
     """Utility function to paginate results."""
     offset = (page - 1) * per_page
@@ -103,19 +484,144 @@ def paginate_results(queryset, page, per_page):
     total_results = len(queryset)
     return paginated_data, total_results
 
-def fetch_from_supabase(table, filters=None):
-    """Fetch data from a Supabase table with optional filters."""
-    query = supabase_client.table(table).select('*')
+def fetch_from_supabase(table, filters=None, fields='*', count=None):
+    """Fetch data from a Supabase table with optional filters.
+
+    fields is the select list (a string or a list of column names); with
+    count ('exact' or 'estimated') response.count holds the number of matching rows.
+    """
+    if replica is not None:
+        local = replica.select(table, filters, fields, count)
+        if local is not None:
+            return local
+    if not isinstance(fields, str):
+        fields = ', '.join(fields)
+    query = supabase_client.table(table).select(fields, count=count)
     if filters:
         for key, value in filters.items():
             query = query.eq(key, value)
     response = query.execute()
     return response
 
+def count_from_supabase(table, filters=None, count='exact', query=None):
+    """Number of rows of table matching filters (or of a prepared select query), without fetching them."""
+    if query is None and replica is not None:
+        local = replica.select(table, filters, 'id', count)
+        if local is not None:
+            return local.count
+    if query is None:
+        query = supabase_client.table(table).select('id', count=count)
+        for key, value in (filters or {}).items():
+            query = query.eq(key, value)
+    return query.limit(1).execute().count or 0
+
+def select_in(table, column, values, columns='*', local=True):
+    """Rows of table whose column is one of values, queried in chunks to keep PostgREST URLs short.
+
+    With local (the default) they come from the replica when it is ready.
+    """
+    if local and replica is not None:
+        local = replica.select_in(table, column, values, columns)
+        if local is not None:
+            return local
+    rows = []
+    for start in range(0, len(values), IN_FILTER_CHUNK_SIZE):
+        chunk = values[start:start + IN_FILTER_CHUNK_SIZE]
+        rows.extend(supabase_client.table(table).select(columns).in_(column, chunk).execute().data or [])
+    return rows
+
+def group_rows(rows, key):
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row[key], []).append(row)
+    return grouped
+
+def parse_id_list(name, limit=MAX_BATCH_IDS):
+    """Comma-separated ids from the query string, de-duplicated in order; raises ValueError past limit."""
+    ids = list(dict.fromkeys(part.strip() for part in request.args.get(name, '').split(',') if part.strip()))
+    if len(ids) > limit:
+        raise ValueError(f"At most {limit} values are accepted for {name}")
+    return ids
+
+def parse_fields():
+    """Column names from the fields= query parameter (None when absent); raises ValueError on bad names."""
+    value = request.args.get('fields', '').strip()
+    if not value:
+        return None
+    fields = list(dict.fromkeys(part.strip() for part in value.split(',') if part.strip()))
+    bad = [field for field in fields if not FIELD_NAME.match(field)]
+    if bad or not fields:
+        raise ValueError(f"Invalid fields: {', '.join(bad) or value}")
+    return fields
+
+def parse_count():
+    """The count= query parameter ('exact' or 'estimated', None when absent); raises ValueError otherwise."""
+    value = request.args.get('count', '').strip().lower() or None
+    if value is not None and value not in COUNT_METHODS:
+        raise ValueError(f"count must be one of {', '.join(COUNT_METHODS)}")
+    return value
+
+def list_options():
+    """(fields, count) of a list route, or a 400 response as the third value."""
+    try:
+        return parse_fields(), parse_count(), None
+    except ValueError as e:
+        return None, None, (jsonify({"error": str(e)}), 400)
+
+def project(rows, fields):
+    """rows restricted to fields (rows unchanged when fields is None)."""
+    if fields is None:
+        return rows
+    return [{field: row[field] for field in fields if field in row} for row in rows]
+
 def insert_into_supabase(table, data):
     """Insert data into a Supabase table."""
     return supabase_client.table(table).insert(data).execute()
 
+def insert_many_into_supabase(table, rows, chunk_size=BULK_INSERT_CHUNK_SIZE):
+    """Insert a list of rows with one request per chunk_size rows; returns all inserted rows."""
+    inserted = []
+    for start in range(0, len(rows), chunk_size):
+        response = supabase_client.table(table).insert(rows[start:start + chunk_size]).execute()
+        inserted.extend(response.data or [])
+    return inserted
+
+class StepTimer:
+    """Collect the wall-clock duration (ms) of the named steps of one request."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+
+    @contextmanager
+    def step(self, name):
+        step_started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - step_started) * 1000, 2)
+
+    def as_dict(self):
+        return {**self.timings, "total": round((time.perf_counter() - self.started) * 1000, 2)}
+
+def offer_product_rows(offer_number, categories):
+    """Build offer_products rows from the GUI's {category: {"products": [[...], ...]}} payload."""
+    rows = []
+    for category, cat_data in categories.items():
+        for product in cat_data['products']:
+            rows.append({
+                'offer_number': offer_number,
+                'categorie': category,
+                'produs': product[0],
+                'brand': product[1],
+                'cod_produs': product[2],
+                'cantitate': int(product[3]),  # Ensure cantitate is an integer
+                'pret_unitar': float(product[4]),  # Ensure pret_unitar is a float
+                'pret_total': float(product[5]),  # Ensure pret_total is a float
+                'discount': float(product[6]) if product[6] else 0.0,  # Ensure discount is a float
+                'pret_cu_discount': float(product[7])  # Ensure pret_cu_discount is a float
+            })
+    return rows
+
 def update_supabase(table, data, filters):
     """Update data in a Supabase table with filters."""
     query = supabase_client.table(table).update(data)
@@ -130,36 +636,96 @@ def delete_from_supabase(table, filters):
         query = query.eq(key, value)
     return query.execute()
 
+def call_rpc(name, params=None):
+    """Call a Postgres function (see sql/), or its SQLite stand-in when local_db_path is configured."""
+    params = params or {}
+    if local_db_conn is not None:
+        return local_db.call(local_db_conn, name, params)
+    return supabase_client.rpc(name, params).execute().data or []
+
+def _balance_row(row):
+    """Normalize a ledger/order_totals row and attach the computed balance."""
+    total = float(row.get('total') or 0)
+    paid = float(row.get('paid') or 0)
+    return {
+        **row,
+        'total': total,
+        'paid': paid,
+        'refunded': float(row.get('refunded') or 0),
+        'balance': total - paid
+    }
+
+def fetch_order_balances(order_ids):
+    """Return {order_id: {total, paid, refunded, balance}} read from the order_balances ledger.
+
+    The ledger comes from the replica when it is ready (it is one of the
+    synced tables), else from Supabase. Orders that have no ledger row yet
+    (created before the ledger existed) are computed from the raw tables instead.
+    """
+    if not order_ids:
+        return {}
+    local = replica.select_in('order_balances', 'order_id', order_ids) if replica is not None else None
+    if local is not None:
+        balances = {row['order_id']: _balance_row(row) for row in local}
+    else:
+        balances = {row['order_id']: _balance_row(row)
+                    for row in call_rpc('order_balances_get', {'p_order_ids': order_ids})}
+    missing = [oid for oid in order_ids if oid not in balances]
+    if missing:
+        app.logger.warning(f"order_balances has no rows for orders {missing}; run verify-balances --repair")
+        totals = replica.order_totals(missing) if local is not None else None
+        for row in totals if totals is not None else call_rpc('order_totals', {'p_order_ids': missing}):
+            balances[row['order_id']] = _balance_row(row)
+    return with_pending_writes(balances)
+
+def pending_ledger_writes(order_ids, kind=None):
+    """(order id as given in order_ids, entry) of the payments / returns of order_ids still in write_behind."""
+    if write_behind is None or not order_ids:
+        return []
+    keys = {str(order_id): order_id for order_id in order_ids}
+    return [(keys[entry['order_id']], entry) for entry in write_behind.pending(order_ids)
+            if kind is None or entry['kind'] == kind]
+
+def with_pending_writes(balances):
+    """Add the queued payments and refunds to balances, so the GUI sees what it just saved."""
+    if write_behind is None:
+        return balances
+    return write_behind.add_pending(balances)
+
+def parse_date_arg(name):
+    """Read an optional YYYY-MM-DD query parameter; raises ValueError on bad input."""
+    value = request.args.get(name, '').strip()
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+
 @app.route('/get_judete', methods=['GET'], endpoint='get_judete')
 @handle_api_error
 def get_judete():
     """Return all counties (keys from the JSON)."""
-    return jsonify(sorted(judete_localitati.keys()))
+    return jsonify(sorted(registry.get('judete_localitati').keys()))
 
 @app.route('/get_localitati/<judet>', methods=['GET'], endpoint='get_localitati')
 @handle_api_error
 def get_localitati(judet):
     """Return the list of localities for the given county."""
-    localitati = judete_localitati.get(judet, [])
+    localitati = registry.get('judete_localitati').get(judet, [])
     return jsonify(sorted(localitati))
 
 @app.route('/search_localitati', methods=['GET'], endpoint='search_localitati')
 @handle_api_error
 def search_localitati():
+    """Localities containing query (diacritics ignored), best matches first; limit caps the list."""
     query = request.args.get('query', '')
-    results = []
-    for judet, localitati in judete_localitati.items():
-        for localitate in localitati:
-            if query.lower() in localitate.lower():
-                results.append({'judet': judet, 'localitate': localitate})
-    return jsonify(results)
+    limit = max(1, min(request.args.get('limit', LOCALITATI_SEARCH_LIMIT, type=int), LOCALITATI_SEARCH_MAX_LIMIT))
+    return jsonify(registry.get('localitati_index').search(query, limit))
 
 @app.route('/search_judete', methods=['GET'], endpoint='search_judete')
 @handle_api_error
 def search_judete():
     query = request.args.get('query', '')
-    results = [judet for judet in judete_localitati.keys() if query.lower() in judet.lower()]
-    return jsonify(results)
+    limit = max(1, min(request.args.get('limit', LOCALITATI_SEARCH_LIMIT, type=int), LOCALITATI_SEARCH_MAX_LIMIT))
+    return jsonify(registry.get('judete_index').search(query, limit))
 
 @app.route('/', endpoint='home')
 def home():
@@ -189,31 +755,55 @@ def login():
 
 @app.route('/add_client', methods=['POST'], endpoint='add_client')
 @handle_api_error
+@invalidates('clients')
 def add_client():
     data = request.json
     response = insert_into_supabase(TABLE_CLIENTS, data)
+    sync_search_index('upsert', 'client', response.data or [])
     return jsonify(response.data)
 
 @app.route('/clients', methods=['GET'], endpoint='get_clients')
 @handle_api_error
+@cached('clients')
 def get_clients():
+    """Clients, optionally filtered by name; fields= picks the columns, count= returns {"count": n} only."""
+    fields, count, error = list_options()
+    if error:
+        return error
     name = request.args.get('name')
+    if name and search_index.ready and len(fold(name)) >= 3:
+        # Same substring match as the ilike below, but diacritic-insensitive
+        needle = " ".join(fold(name).split())
+        hits = search_index.search(name, kinds=['client'], limit=SEARCH_MAX_RESULTS, fuzzy=False)
+        clients = [hit['data'] for hit in hits if needle in " ".join(fold(hit['data'].get('nume')).split())]
+        return jsonify({"count": len(clients)} if count else project(clients, fields))
+
+    local = replica.select(TABLE_CLIENTS) if replica is not None else None
+    if local is not None:
+        clients = [client for client in local.data if not name or name.lower() in (client.get('nume') or '').lower()]
+        return jsonify({"count": len(clients)} if count else project(clients, fields))
+
     filters = None
     if name:
         filters = {'nume': name}  # Use exact match for now
     print(f"[DEBUG] Filters for /clients endpoint: {filters}")  # Debug: Log the filters
 
-    query = supabase_client.table(TABLE_CLIENTS).select('*')
+    query = supabase_client.table(TABLE_CLIENTS).select('id' if count else ', '.join(fields or ['*']), count=count)
     if filters:
         for key, value in filters.items():
             query = query.ilike(key, f"%{value}%")  # Use ilike for case-insensitive partial matching
+    if count:
+        return jsonify({"count": count_from_supabase(TABLE_CLIENTS, query=query)})
     response = query.execute()
 
-    print(f"[DEBUG] Response from Supabase for /clients: {response.data}")  # Debug: Log the response
+    print(f"[DEBUG] Response from Supabase for /clients: {len(response.data)} rows")  # Debug: Log the response
     return jsonify(response.data)
 
 @app.route('/clients/<client_id>', methods=['GET', 'PATCH'], endpoint='client_details')
 @handle_api_error
+@cached('clients')
+@invalidates('clients')
+@queues_offline(lambda view_args: replica.merge('clients', view_args['client_id'], request.get_json(silent=True) or {}))
 def client_details(client_id):
     if request.method == 'GET':
         response = fetch_from_supabase(TABLE_CLIENTS, {'id': client_id})
@@ -226,23 +816,33 @@ def client_details(client_id):
     elif request.method == 'PATCH':
         data = request.json
         response = update_supabase(TABLE_CLIENTS, data, {'id': client_id})
+        sync_search_index('upsert', 'client', response.data or [])
         return jsonify(response.data)
 
 @app.route('/delete_client', methods=['DELETE'], endpoint='delete_client')
 @handle_api_error
+@invalidates('clients', 'vehicles', 'offers', 'orders')
+@queues_offline(lambda view_args: replica.delete('clients', 'id', request.args.get('client_id')))
 def delete_client():
     client_id = request.args.get('client_id')
     response = delete_from_supabase(TABLE_CLIENTS, {'id': client_id})
+    sync_search_index('remove_client', client_id)
     return jsonify(response.data)
 
 @app.route('/vehicles', methods=['GET'], endpoint='get_vehicles')
 @handle_api_error
+@cached('vehicles')
 def get_vehicles():
+    fields, count, error = list_options()
+    if error:
+        return error
     client_id = request.args.get('client_id')
     if client_id is None:
         return jsonify({"message": "ID-ul clientului nu este valid."}), 400
+    if count:
+        return jsonify({"count": count_from_supabase(TABLE_VEHICLES, {'client_id': client_id}, count)})
     print(f"[DEBUG] Fetching vehicles for client_id: {client_id}")  # Debug statement
-    response = fetch_from_supabase(TABLE_VEHICLES, {'client_id': client_id})
+    response = fetch_from_supabase(TABLE_VEHICLES, {'client_id': client_id}, fields or '*')
     print(f"[DEBUG] Retrieved vehicles: {response.data}")  # Debug statement
     return jsonify(response.data)
 
@@ -261,6 +861,7 @@ def get_vehicle_by_id(vehicle_id):
         return jsonify({"error": str(e)}), 500
 
 @app.route('/vehicles/<vehicle_id>', methods=['PATCH'])
+@invalidates('vehicles')
 def update_vehicle(vehicle_id):
     """Update details of a specific vehicle by its ID."""
     try:
@@ -292,6 +893,7 @@ def update_vehicle(vehicle_id):
         # Check if the update was successful
         if response.data and len(response.data) > 0:
             print(f"[DEBUG] Vehicle updated successfully: {response.data}")
+            sync_search_index('upsert', 'vehicle', response.data)
             return jsonify({"message": "Vehicle details updated successfully"}), 200
         else:
             print(f"[ERROR] Update failed. Supabase response: {response}")
@@ -302,9 +904,11 @@ def update_vehicle(vehicle_id):
 
 @app.route('/add_vehicle', methods=['POST'], endpoint='add_vehicle')
 @handle_api_error
+@invalidates('vehicles')
 def add_vehicle():
     data = request.json
     response = insert_into_supabase(TABLE_VEHICLES, data)
+    sync_search_index('upsert', 'vehicle', response.data or [])
     return jsonify(response.data)
     
 @app.route('/search_vehicles', methods=['GET'])
@@ -332,6 +936,7 @@ def search_vehicles():
 
 @app.route('/add_offer', methods=['POST'], endpoint='add_offer')
 @handle_api_error
+@invalidates('offers', 'offer_products')
 def add_offer():
     data = request.json
     print("[DEBUG] Full /add_offer payload:", json.dumps(data, indent=2))  # Debug log for the full payload
@@ -355,66 +960,70 @@ def add_offer():
     if not all([client_id, vehicle_id, offer_number, categories, status, raw_date]):
         return jsonify({"message": "Toate câmpurile sunt obligatorii!"}), 400
 
+    timer = StepTimer()
+
     # Insert the new offer into the database
-    response = insert_into_supabase(TABLE_OFFERS, {
-        'client_id': client_id,
-        'vehicle_id': vehicle_id,
-        'offer_number': offer_number,  # Use offer_number instead of offer_id
-        'status': status,
-        'observations': observations,
-        'date': date_obj.isoformat()  # Date should be in ISO format
-    })
+    with timer.step("insert_offer"):
+        insert_into_supabase(TABLE_OFFERS, {
+            'client_id': client_id,
+            'vehicle_id': vehicle_id,
+            'offer_number': offer_number,  # Use offer_number instead of offer_id
+            'status': status,
+            'observations': observations,
+            'date': date_obj.isoformat()  # Date should be in ISO format
+        })
 
     # Nicio reasignare, doar verificare
     print(f"[DEBUG] Offer successfully inserted with number: {offer_number}")
 
-    # Insert the products for each category
-    for category, data in categories.items():
-        print(f"[DEBUG] Adding category '{category}' with products: {data['products']}")  # Debug print
-        for product in data['products']:
-            result = insert_into_supabase(TABLE_OFFER_PRODUCTS, {
-                'offer_number': offer_number,
-                'categorie': category,
-                'produs': product[0],
-                'brand': product[1],
-                'cod_produs': product[2],
-                'cantitate': int(product[3]),  # Ensure cantitate is an integer
-                'pret_unitar': float(product[4]),  # Ensure pret_unitar is a float
-                'pret_total': float(product[5]),  # Ensure pret_total is a float
-                'discount': float(product[6]) if product[6] else 0.0,  # Ensure discount is a float
-                'pret_cu_discount': float(product[7])  # Ensure pret_cu_discount is a float
-            })
-            print(f"[DEBUG] Insert result for product: {result}")
+    # Insert the products of all categories in bulk
+    product_rows = offer_product_rows(offer_number, categories)
+    with timer.step("insert_products"):
+        inserted = insert_many_into_supabase(TABLE_OFFER_PRODUCTS, product_rows)
+    print(f"[DEBUG] Inserted {len(product_rows)} products for offer {offer_number}")
+    sync_search_index('replace_children', 'offer_product', offer_number, inserted, client_id)
+
+    return jsonify({
+        "message": "Ofertă adăugată cu succes!",
+        "products_inserted": len(product_rows),
+        "timings_ms": timer.as_dict()
+    }), 200
 
-    return jsonify({"message": "Ofertă adăugată cu succes!"}, 200)
+def client_offers(client_id):
+    """Offers of a client with their options, via the get_offers_with_options Supabase function."""
+    response = supabase_client.rpc('get_offers_with_options', {'p_client_id': client_id}).execute()
+    print("[DEBUG] /offers response data:", response.data)
+    return response.data or []
 
 @app.route('/offers', methods=['GET'], endpoint='get_offers')
 @handle_api_error
+@cached('offers', 'offer_products', 'clients')
 def get_offers():
+    fields, count, error = list_options()
+    if error:
+        return error
     client_id = request.args.get('client_id')
     if not client_id:
         app.logger.error("Client ID is missing in the request.")
         return jsonify({"error": "Client ID is required"}), 400
+    if count:
+        return jsonify({"count": count_from_supabase(TABLE_OFFERS, {'client_id': client_id}, count)})
 
     app.logger.debug(f"Fetching offers for client_id: {client_id}")
     try:
-        # Call the Supabase function
-        response = supabase_client.rpc('get_offers_with_options', {'p_client_id': client_id}).execute()
-        
-        # Debug print for response data
-        print("[DEBUG] /offers response data:", response.data)
+        offers = client_offers(client_id)
 
-        if response.data:
+        if offers:
             # Fetch client name
-            client_resp = fetch_from_supabase(TABLE_CLIENTS, {'id': client_id})
+            client_resp = fetch_from_supabase(TABLE_CLIENTS, {'id': client_id}, 'nume')
             client_name = client_resp.data[0]['nume'] if client_resp.data else "N/A"
 
             # Attach client name to each offer
-            for offer in response.data:
+            for offer in offers:
                 offer["client_name"] = client_name
 
-            app.logger.debug(f"Offers fetched successfully: {response.data}")
-            return jsonify(response.data), 200
+            app.logger.debug(f"Offers fetched successfully: {offers}")
+            return jsonify(project(offers, fields)), 200
         else:
             app.logger.error(f"No offers found for client_id: {client_id}")
             return jsonify({"error": "No offers found"}), 404
@@ -453,6 +1062,15 @@ def get_offer_details(offer_number):
         offer['categories'] = categories
         print(f"[DEBUG] categories built: {json.dumps(categories, indent=2)}")
 
+        # Optional ?expand=vehicle,client so callers get everything in one request
+        expand = {part.strip() for part in request.args.get('expand', '').split(',') if part.strip()}
+        if 'vehicle' in expand and offer.get('vehicle_id'):
+            vehicle_resp = fetch_from_supabase(TABLE_VEHICLES, {'id': offer['vehicle_id']})
+            offer['vehicle'] = vehicle_resp.data[0] if vehicle_resp.data else None
+        if 'client' in expand and offer.get('client_id'):
+            client_resp = supabase_client.table(TABLE_CLIENTS).select('nume').eq('id', offer['client_id']).execute()
+            offer['client_name'] = client_resp.data[0]['nume'] if client_resp.data else None
+
         return jsonify(offer), 200  # Ensure proper JSON response
     except Exception as e:
         app.logger.error(f"Error calling get_full_offer_data: {e}")
@@ -460,6 +1078,7 @@ def get_offer_details(offer_number):
 
 @app.route('/offers/<offer_number>', methods=['PATCH'], endpoint='update_offer')
 @handle_api_error
+@invalidates('offers', 'offer_products')
 def update_offer(offer_number):
     data = request.json
     vehicle_id = data.get('vehicle_id')
@@ -468,40 +1087,40 @@ def update_offer(offer_number):
     observations = data.get('observations')
     date = data.get('date')
 
+    timer = StepTimer()
+
     # Update the offer details
-    response = update_supabase(TABLE_OFFERS, {
-        'vehicle_id': vehicle_id,
-        'status': status,
-        'observations': observations,
-        'date': date
-    }, {'offer_number': offer_number})
+    with timer.step("update_offer"):
+        response = update_supabase(TABLE_OFFERS, {
+            'vehicle_id': vehicle_id,
+            'status': status,
+            'observations': observations,
+            'date': date
+        }, {'offer_number': offer_number})
 
     # ✅ Guard clause: skip if no categories
     if not categories:
-        return jsonify({"message": "Ofertă actualizată fără produse."}), 200
+        return jsonify({"message": "Ofertă actualizată fără produse.", "timings_ms": timer.as_dict()}), 200
 
     # Delete existing products
-    delete_from_supabase(TABLE_OFFER_PRODUCTS, {'offer_number': response.data[0]['offer_number']})
+    with timer.step("delete_products"):
+        delete_from_supabase(TABLE_OFFER_PRODUCTS, {'offer_number': response.data[0]['offer_number']})
 
-    # Insert updated products
-    for category, cat_data in categories.items():
-        for product in cat_data['products']:
-            insert_into_supabase(TABLE_OFFER_PRODUCTS, {
-                'offer_number': response.data[0]['offer_number'],
-                'categorie': category,
-                'produs': product[0],
-                'brand': product[1],
-                'cod_produs': product[2],
-                'cantitate': int(product[3]),
-                'pret_unitar': float(product[4]),
-                'pret_total': float(product[5]),
-                'discount': float(product[6]) if product[6] else 0.0,
-                'pret_cu_discount': float(product[7])
-            })
+    # Insert updated products in bulk
+    product_rows = offer_product_rows(response.data[0]['offer_number'], categories)
+    with timer.step("insert_products"):
+        inserted = insert_many_into_supabase(TABLE_OFFER_PRODUCTS, product_rows)
+    sync_search_index('replace_children', 'offer_product', response.data[0]['offer_number'], inserted,
+                      response.data[0].get('client_id'))
 
-    return jsonify({"message": "Ofertă actualizată cu succes!"}, 200)
+    return jsonify({
+        "message": "Ofertă actualizată cu succes!",
+        "products_inserted": len(product_rows),
+        "timings_ms": timer.as_dict()
+    }), 200
 
 @app.route('/update_offer_status', methods=['POST'])
+@invalidates('offers')
 def update_offer_status():
     print(f"[DEBUG] Raw request data: {request.data}")  # ✅ Log raw request data
     print(f"[DEBUG] request.is_json: {request.is_json}")  # ✅ Log JSON status
@@ -518,72 +1137,79 @@ def update_offer_status():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/orders', methods=['GET'], endpoint='get_orders')
-@handle_api_error
-def get_orders():
-    client_id = request.args.get('client_id')
-    if not client_id:
-        return jsonify({"error": "client_id query param is required"}), 400
-
+def client_orders_with_balances(client_id):
+    """Orders of a client with products, payments and ledger totals, plus the raw balances by order id."""
     # 1. Fetch all orders for this client
-    resp = supabase_client.table(TABLE_ORDERS) \
-                         .select('*') \
-                         .eq('client_id', client_id) \
-                         .execute()
-    orders = resp.data or []
+    resp = fetch_from_supabase(TABLE_ORDERS, {'client_id': client_id})
+    return enrich_orders(resp.data or [])
+
+# Keys enrich_orders adds to each order row
+ORDER_DERIVED_FIELDS = frozenset(['products', 'payments', 'total', 'paid', 'balance'])
 
+def enrich_orders(orders):
+    """Attach products, payments and ledger totals to orders; returns (orders, balances by order id)."""
     if not orders:
-        return jsonify([]), 200
+        return [], {}
 
     # 2. Gather all order IDs
     order_ids = [o['id'] for o in orders]
 
-    # 3. Fetch line items and payments for all orders
-    prods_resp = supabase_client.table(TABLE_ORDER_PRODUCTS) \
-                                .select('order_id, produs, brand, cod_produs, cantitate, pret_unitar, pret_total, discount, pret_cu_discount') \
-                                .in_('order_id', order_ids) \
-                                .execute()
-    prods = prods_resp.data or []
-
-    payments_resp = supabase_client.table('payments') \
-                                   .select('order_id, amount, date, recorded_by, observations') \
-                                   .in_('order_id', order_ids) \
-                                   .execute()
-    payments = payments_resp.data or []
+    # 3. Totals, paid amounts and balances from the order_balances ledger
+    balances = fetch_order_balances(order_ids)
 
-    # 4. Build maps for totals, products, and payments per order_id
-    totals_map = {}
-    products_map = {}
-    for p in prods:
-        oid = p['order_id']
-        totals_map[oid] = totals_map.get(oid, 0) + float(p['pret_cu_discount'])
-        products_map.setdefault(oid, []).append(p)
+    # 4. Fetch line items and payments for all orders
+    prods = select_in(TABLE_ORDER_PRODUCTS, 'order_id', order_ids,
+                      'order_id, produs, brand, cod_produs, cantitate, pret_unitar, pret_total, discount, pret_cu_discount')
+    payments = select_in('payments', 'order_id', order_ids, 'order_id, amount, date, recorded_by, observations')
+    for order_id, entry in pending_ledger_writes(order_ids, 'payment'):
+        row = entry['row']
+        payments.append({'order_id': order_id, 'amount': row['amount'], 'date': row['date'],
+                         'recorded_by': row['recorded_by'], 'observations': row['observations'], 'pending': True})
 
-    paid_map = {}
-    payments_map = {}
-    for p in payments:
-        oid = p['order_id']
-        paid_map[oid] = paid_map.get(oid, 0) + float(p['amount'])
-        payments_map.setdefault(oid, []).append(p)
+    # 5. Group products and payments per order_id
+    products_map = group_rows(prods, 'order_id')
+    payments_map = group_rows(payments, 'order_id')
 
-    # 5. Attach total, paid, balance, and lists (products + payments) to each order
+    # 6. Attach total, paid, balance, and lists (products + payments) to each order
     enriched_orders = []
     for o in orders:
         oid = o['id']
-        total = totals_map.get(oid, 0.0)
-        paid = paid_map.get(oid, 0.0)
-        balance = total - paid
+        balance = balances.get(oid, {})
 
         enriched_orders.append({
             **o,  # Include all fields from the order
             "products": products_map.get(oid, []),
             "payments": payments_map.get(oid, []),
-            "total": total,
-            "paid": paid,
-            "balance": balance
+            "total": balance.get('total', 0.0),
+            "paid": balance.get('paid', 0.0),
+            "balance": balance.get('balance', 0.0)
         })
 
-    return jsonify(enriched_orders), 200
+    return enriched_orders, balances
+
+@app.route('/orders', methods=['GET'], endpoint='get_orders')
+@handle_api_error
+@cached('orders', 'order_products', 'payments', 'order_balances')
+def get_orders():
+    """Orders of a client with products, payments and balances.
+
+    fields= limits the keys of each order; when it names only order columns
+    the products, payments and balances are not looked up at all.
+    count= returns {"count": n} only.
+    """
+    fields, count, error = list_options()
+    if error:
+        return error
+    client_id = request.args.get('client_id')
+    if not client_id:
+        return jsonify({"error": "client_id query param is required"}), 400
+    if count:
+        return jsonify({"count": count_from_supabase(TABLE_ORDERS, {'client_id': client_id}, count)})
+
+    if fields is not None and not ORDER_DERIVED_FIELDS.intersection(fields):
+        return jsonify(fetch_from_supabase(TABLE_ORDERS, {'client_id': client_id}, fields).data or []), 200
+    enriched_orders, _ = client_orders_with_balances(client_id)
+    return jsonify(project(enriched_orders, fields)), 200
 
 @app.route('/order_products', methods=['GET'])
 @handle_api_error
@@ -636,6 +1262,8 @@ def search_order_products_by_any():
 
 @app.route('/delete_vehicle', methods=['DELETE'], endpoint='delete_vehicle')
 @handle_api_error
+@invalidates('vehicles')
+@queues_offline(lambda view_args: replica.delete('vehicles', 'id', request.args.get('vehicle_id')))
 def delete_vehicle():
     vehicle_id = request.args.get('vehicle_id')
     if not vehicle_id:
@@ -643,6 +1271,7 @@ def delete_vehicle():
 
     response = delete_from_supabase(TABLE_VEHICLES, {'id': vehicle_id})
     print(f"Supabase response: {response}")  # Add detailed logging
+    sync_search_index('remove', 'vehicle', vehicle_id)
     if response.data:
         return jsonify({"message": "Vehicle deleted successfully"}), 200
     else:
@@ -651,117 +1280,253 @@ def delete_vehicle():
 @app.route('/highest_offer_number', methods=['GET'], endpoint='highest_offer_number')
 @handle_api_error
 def highest_offer_number():
-    response = fetch_from_supabase(TABLE_OFFERS)
-    offer_numbers = [int(offer['offer_number'][1:]) for offer in response.data if offer['offer_number'].startswith('O')]
-    highest_offer_number = f"O{max(offer_numbers)}" if offer_numbers else 'O0'
-    return jsonify({"highest_offer_number": highest_offer_number}), 200
+    # Indexed max over the numeric part of offer_number (sql/document_numbers.sql)
+    highest = call_rpc('highest_offer_number') or 'O0'
+    return jsonify({"highest_offer_number": highest}), 200
+
+@app.route('/next_offer_number', methods=['POST'], endpoint='next_offer_number')
+@handle_api_error
+def next_offer_number():
+    """Allocate the next offer number from a database sequence; safe when several workstations create offers at once."""
+    offer_number = call_rpc('next_offer_number')
+    return jsonify({"offer_number": offer_number}), 200
+
+@app.route('/highest_order_number', methods=['GET'], endpoint='highest_order_number')
+@handle_api_error
+def highest_order_number():
+    highest = call_rpc('highest_order_number') or 'CMD0'
+    return jsonify({"highest_order_number": highest}), 200
+
+def encode_search_cursor(offset):
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode()
+
+def decode_search_cursor(cursor):
+    """Offset stored in a cursor from encode_search_cursor; raises ValueError if it is malformed."""
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor.encode()))["o"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+def search_rows(query, category, page, per_page):
+    """One page of search_universal rows for (query, category).
+
+    Pages live in response_cache, so paging back and forth does not query
+    Supabase again until a write to the searched tables invalidates them.
+    """
+    key = ('search_universal', query, category, page, per_page)
+    results = response_cache.get(key)
+    if results is not None:
+        return results
+
+    response = supabase_client.rpc("search_universal", {
+        "query": query,
+        "category": category,
+        "page": page,
+        "per_page": per_page
+    }).execute()
+
+    # The function may return the whole result as a single JSON string
+    results = response.data or []
+    if len(results) == 1 and isinstance(results[0], str):
+        results = json.loads(results[0])
+
+    # Keep only the fields the GUI renders for product rows
+    fields = SEARCH_PRODUCT_FIELDS.get(category)
+    if fields:
+        results = [
+            {section: {name: (item.get(section) or {}).get(name) for name in names} for section, names in fields.items()}
+            for item in results
+        ]
+
+    logging.debug(f"search_universal query='{query}' category='{category}' page={page}: {len(results)} rows")
+    response_cache.set(key, results, SEARCH_TABLES)
+    return results
+
+def search_total(query, category):
+    """Number of search_universal rows for (query, category), counted in the database (sql/search_universal_count.sql)."""
+    key = ('search_universal_count', query, category)
+    total = response_cache.get(key)
+    if total is None:
+        total = int(supabase_client.rpc("search_universal_count", {"query": query, "category": category}).execute().data or 0)
+        response_cache.set(key, total, SEARCH_TABLES)
+    return total
+
+def search_page(results, offset, per_page, total):
+    limit = min(total, SEARCH_MAX_RESULTS)
+    next_offset = offset + per_page
+    return {
+        "results": results,
+        "total": limit,
+        "truncated": total > SEARCH_MAX_RESULTS,
+        "page": offset // per_page + 1,
+        "per_page": per_page,
+        "next_cursor": encode_search_cursor(next_offset) if next_offset < limit else None,
+        "prev_cursor": encode_search_cursor(max(offset - per_page, 0)) if offset > 0 else None
+    }
 
 @app.route('/search_universal', methods=['GET'], endpoint='search_universal')
 @handle_api_error
 def search_universal():
-    """Search across multiple categories."""
+    """Search across multiple categories, one page at a time.
+
+    Query params: query, category, per_page (default SEARCH_PER_PAGE) and either
+    cursor (next_cursor/prev_cursor of a previous page) or page. Returns
+    {results, total, page, per_page, next_cursor, prev_cursor}. With stream=1
+    the response is NDJSON with one such page object per line, starting at the
+    requested page: each page is fetched from Supabase and written out before
+    the next one is asked for, so the first page can be rendered at once.
+    total comes from a count query run alongside the first page.
+    """
     query = request.args.get('query', '').strip()
     category = request.args.get('category', '').strip().lower()
-    page = int(request.args.get('page', 1))
-    per_page = int(request.args.get('per_page', 1000000))  # Set a very high default limit
-
-    logging.debug(f"Received search request: query='{query}', category='{category}', page={page}, per_page={per_page}")
 
     if not query or not category:
         logging.error("Query or category is missing.")
         return jsonify({"error": "Query and category are required"}), 400
 
     try:
-        # Call the Supabase RPC function
-        logging.debug("Calling Supabase RPC function 'search_universal'.")
-        response = supabase_client.rpc("search_universal", {
-            "query": query,
-            "category": category,
-            "page": page,
-            "per_page": per_page
-        }).execute()
-
-        logging.debug(f"Supabase RPC raw response: {response.data}")
+        per_page = min(max(int(request.args.get('per_page', SEARCH_PER_PAGE)), 1), SEARCH_MAX_PER_PAGE)
+        cursor = request.args.get('cursor')
+        offset = decode_search_cursor(cursor) if cursor else (max(int(request.args.get('page', 1)), 1) - 1) * per_page
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    offset -= offset % per_page  # search_universal pages by page number
 
-        # Check if it's a single JSON string in a list
-        if isinstance(response.data, list) and len(response.data) == 1 and isinstance(response.data[0], str):
-            try:
-                results = json.loads(response.data[0])
-            except json.JSONDecodeError:
-                logging.error("Failed to decode JSON from search_universal RPC.")
-                return jsonify({"error": "Invalid response from search_universal function"}), 500
-        else:
-            results = response.data
-
-        logging.debug(f"Processed results for category '{category}': {results}")
-
-        # Transform flat data into nested structure for specific categories
-        if category == "order_products":
-            for item in results:
-                item["order"] = {
-                    "id": item.get("order", {}).get("id"),
-                    "order_number": item.get("order", {}).get("order_number"),
-                }
-                item["client"] = {
-                    "id": item.get("client", {}).get("id"),
-                    "nume": item.get("client", {}).get("nume"),
-                    "telefon": item.get("client", {}).get("telefon"),
-                }
-                item["vehicle"] = {
-                    "marca": item.get("vehicle", {}).get("marca"),
-                    "model": item.get("vehicle", {}).get("model"),
-                    "numar_inmatriculare": item.get("vehicle", {}).get("numar_inmatriculare"),
-                    "vin": item.get("vehicle", {}).get("vin"),
-                    "an": item.get("vehicle", {}).get("an"),
-                }
-                item["order_product"] = {
-                    "produs": item.get("order_product", {}).get("produs"),
-                    "brand": item.get("order_product", {}).get("brand"),
-                    "cod_produs": item.get("order_product", {}).get("cod_produs"),
-                    "cantitate": item.get("order_product", {}).get("cantitate"),
-                    "pret_unitar": item.get("order_product", {}).get("pret_unitar"),
-                    "pret_total": item.get("order_product", {}).get("pret_total"),
-                    "discount": item.get("order_product", {}).get("discount"),
-                    "pret_cu_discount": item.get("order_product", {}).get("pret_cu_discount"),
-                }
-
-        elif category == "offer_products":
-            for item in results:
-                item["offer"] = {
-                    "id": item.get("offer", {}).get("id"),
-                    "offer_number": item.get("offer", {}).get("offer_number"),
-                }
-                item["client"] = {
-                    "id": item.get("client", {}).get("id"),
-                    "nume": item.get("client", {}).get("nume"),
-                    "telefon": item.get("client", {}).get("telefon"),
-                }
-                item["vehicle"] = {
-                    "marca": item.get("vehicle", {}).get("marca"),
-                    "model": item.get("vehicle", {}).get("model"),
-                    "numar_inmatriculare": item.get("vehicle", {}).get("numar_inmatriculare"),
-                    "vin": item.get("vehicle", {}).get("vin"),
-                    "an": item.get("vehicle", {}).get("an"),
-                }
-                item["offer_product"] = {
-                    "produs": item.get("offer_product", {}).get("produs"),
-                    "brand": item.get("offer_product", {}).get("brand"),
-                    "cod_produs": item.get("offer_product", {}).get("cod_produs"),
-                    "cantitate": item.get("offer_product", {}).get("cantitate"),
-                    "pret_unitar": item.get("offer_product", {}).get("pret_unitar"),
-                    "pret_total": item.get("offer_product", {}).get("pret_total"),
-                    "discount": item.get("offer_product", {}).get("discount"),
-                    "pret_cu_discount": item.get("offer_product", {}).get("pret_cu_discount"),
-                }
-
-        logging.debug(f"Transformed results for category '{category}': {results}")
-        return jsonify(results), 200
+    try:
+        total_future = fetch_executor.submit(search_total, query, category)
+        results = search_rows(query, category, offset // per_page + 1, per_page)
+        total = total_future.result()
     except Exception as e:
         logging.error(f"Error during search_universal: {e}")
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
+    if request.args.get('stream') in ('1', 'true'):
+        def pages():
+            start, rows = offset, results
+            while True:
+                yield json.dumps(search_page(rows, start, per_page, total)) + "\n"
+                start += per_page
+                if len(rows) < per_page or start >= min(total, SEARCH_MAX_RESULTS):
+                    break
+                try:
+                    rows = search_rows(query, category, start // per_page + 1, per_page)
+                except Exception as e:
+                    # The status line is already sent: end the stream, the GUI sees it cut short
+                    logging.error(f"Error during search_universal stream: {e}")
+                    break
+        return Response(stream_with_context(pages()), mimetype='application/x-ndjson',
+                        headers={'X-Total-Count': str(min(total, SEARCH_MAX_RESULTS))})
+
+    page = search_page(results, offset, per_page, total)
+    return jsonify(page), 200, {'X-Total-Count': str(page['total'])}
+
+def fetch_all_rows(table, columns='*', page_size=SEARCH_INDEX_PAGE_SIZE):
+    """Every row of table, read in pages of page_size rows ordered by its key (else pages may overlap or skip rows)."""
+    rows = []
+    start = 0
+    while True:
+        batch = supabase_client.table(table).select(columns).order(KEY_COLUMNS.get(table, 'id')) \
+            .range(start, start + page_size - 1).execute().data or []
+        rows.extend(batch)
+        if len(batch) < page_size:
+            return rows
+        start += page_size
+
+def search_index_docs():
+    """(kind, row, client_id) for every row indexed by search_index."""
+    offer_clients = {row['offer_number']: row['client_id'] for row in fetch_all_rows(TABLE_OFFERS, 'offer_number, client_id')}
+    order_clients = {row['id']: row['client_id'] for row in fetch_all_rows(TABLE_ORDERS, 'id, client_id')}
+    for row in fetch_all_rows(TABLE_CLIENTS):
+        yield 'client', row, None
+    for row in fetch_all_rows(TABLE_VEHICLES):
+        yield 'vehicle', row, None
+    for row in fetch_all_rows(TABLE_OFFER_PRODUCTS):
+        yield 'offer_product', row, offer_clients.get(row.get('offer_number'))
+    for row in fetch_all_rows(TABLE_ORDER_PRODUCTS):
+        yield 'order_product', row, order_clients.get(row.get('order_id'))
+
+def rebuild_search_index():
+    count = search_index.rebuild(search_index_docs)
+    print(f"[DEBUG] Search index built: {count} documents in {search_index.build_ms} ms")
+
+def sync_search_index(action, *args):
+    """Apply a write to search_index (upsert, remove, replace_children, remove_client).
+
+    The index is derived data: a failure here is logged and never fails the
+    write, and the next rebuild corrects it.
+    """
+    try:
+        getattr(search_index, action)(*args)
+    except Exception as e:
+        app.logger.error(f"Error updating the search index ({action}): {e}")
+
+def reindex_order_products(order_id, client_id=None):
+    try:
+        rows = fetch_from_supabase(TABLE_ORDER_PRODUCTS, {'order_id': order_id}).data or []
+    except Exception as e:
+        app.logger.error(f"Error reading order_products of order {order_id} for the search index: {e}")
+        return
+    sync_search_index('replace_children', 'order_product', order_id, rows, client_id)
+
+@app.route('/search_index', methods=['GET'], endpoint='query_search_index')
+@handle_api_error
+def query_search_index():
+    """Prefix/substring/typo-tolerant search over the local index.
+
+    q: the text; kinds: comma-separated subset of client, vehicle,
+    offer_product, order_product; limit: at most SEARCH_INDEX_MAX_LIMIT;
+    fuzzy=0 disables the typo fallback.
+    """
+    if not search_index.ready:
+        return jsonify({"error": "Indexul de căutare se construiește, încercați din nou."}), 503
+    query = request.args.get('q', '')
+    kinds = [kind.strip() for kind in request.args.get('kinds', '').split(',') if kind.strip()] or None
+    limit = max(1, min(request.args.get('limit', 20, type=int), SEARCH_INDEX_MAX_LIMIT))
+    started = time.perf_counter()
+    results = search_index.search(query, kinds=kinds, limit=limit, fuzzy=request.args.get('fuzzy', '1') != '0')
+    return jsonify({
+        "results": results,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2)
+    }), 200
+
+@app.route('/search_index/suggest', methods=['GET'], endpoint='suggest_search_index')
+def suggest_search_index():
+    """Type-ahead entries for the dashboard search box (clients, plates/VINs, product codes)."""
+    if not search_index.ready:
+        return jsonify({"suggestions": [], "ready": False}), 200
+    limit = max(1, min(request.args.get('limit', 8, type=int), SEARCH_INDEX_MAX_LIMIT))
+    started = time.perf_counter()
+    suggestions = search_index.suggest(request.args.get('q', ''), limit=limit)
+    return jsonify({
+        "suggestions": suggestions,
+        "ready": True,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2)
+    }), 200
+
+@app.route('/search_index/stats', methods=['GET'], endpoint='search_index_stats')
+def search_index_stats():
+    return jsonify(search_index.stats()), 200
+
+def client_totals(balances, order_count):
+    """Client totals from its order_balances rows:
+       - total_cheltuit = suma tuturor pret_cu_discount (orice comandă, indiferent de plată)
+       - de_platit = suma pentru fiecare order unde (order_total - paid) > 0
+       - sold = suma refund-urilor din return_products
+       - total_comenzi = numărul total de comenzi
+    """
+    return {
+        "total_cheltuit": round(sum(b['total'] for b in balances.values()), 2),
+        "de_platit":      round(sum(b['balance'] for b in balances.values() if b['balance'] > 0), 2),
+        "sold":           round(sum(b['refunded'] for b in balances.values()), 2),
+        "total_comenzi":  order_count
+    }
+
 @app.route('/totals/<client_id>', methods=['GET'], endpoint='get_totals')
 @handle_api_error
+@cached('orders', 'order_products', 'payments', 'return_products', 'order_balances')
 def get_totals(client_id):
     """Calculate totals for a specific client:
        - total_cheltuit: sumă totală a tuturor pret_cu_discount din order_products
@@ -769,162 +1534,136 @@ def get_totals(client_id):
        - sold: suma refund-urilor înregistrate în return_products
        - total_comenzi: numărul total de comenzi pentru client
     """
-    # 1. Fetch all orders for acest client
-    orders_resp = supabase_client.table(TABLE_ORDERS) \
-                                 .select('id') \
-                                 .eq('client_id', client_id) \
-                                 .execute()
+    orders_resp = fetch_from_supabase(TABLE_ORDERS, {'client_id': client_id}, 'id')
     orders = orders_resp.data or []
     order_ids = [o['id'] for o in orders]
 
-    # Dacă nu există comenzi, returnăm toate valorile 0
-    if not order_ids:
-        return jsonify({
-            "total_cheltuit": 0.0,
-            "de_platit":      0.0,
-            "sold":           0.0,
-            "total_comenzi":  0
-        }), 200
-
-    # 2. Fetch all order_products pentru aceste order_ids  
-    prods_resp = supabase_client.table(TABLE_ORDER_PRODUCTS) \
-                                .select('id, order_id, pret_cu_discount') \
-                                .in_('order_id', order_ids) \
-                                .execute()
-    prods = prods_resp.data or []
-
-    # 3. Construim două hărți:
-    #    - totals_map: order_id -> suma pret_cu_discount (totalul comenzii)
-    #    - op_ids: lista tuturor order_product.id pentru a căuta refund-uri
-    totals_map = {}
-    op_ids = []
-    for p in prods:
-        oid = p['order_id']
-        op_ids.append(p['id'])
-        totals_map[oid] = totals_map.get(oid, 0) + float(p.get('pret_cu_discount', 0))
-
-    # 4. Fetch plățile (payments) pentru aceste order_ids
-    payments_resp = supabase_client.table('payments') \
-                                   .select('order_id, amount') \
-                                   .in_('order_id', order_ids) \
-                                   .execute()
-    payments = payments_resp.data or []
+    balances = fetch_order_balances(order_ids) if order_ids else {}
+    return jsonify(client_totals(balances, len(order_ids))), 200
+
+def batch_client_ids():
+    """client_ids for the /<category>/by_clients endpoints, or an error response."""
+    try:
+        client_ids = parse_id_list('client_ids')
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 400)
+    if not client_ids:
+        return None, (jsonify({"error": "client_ids query param is required"}), 400)
+    return client_ids, None
+
+@app.route('/vehicles/by_clients', methods=['GET'], endpoint='vehicles_by_clients')
+@handle_api_error
+@cached('vehicles')
+def vehicles_by_clients():
+    """Vehicles of several clients in one call: {client_id: [vehicle, ...]}."""
+    client_ids, error = batch_client_ids()
+    if error:
+        return error
+    return jsonify(group_rows(select_in(TABLE_VEHICLES, 'client_id', client_ids), 'client_id')), 200
+
+@app.route('/orders/by_clients', methods=['GET'], endpoint='orders_by_clients')
+@handle_api_error
+@cached('orders', 'order_products', 'payments', 'order_balances')
+def orders_by_clients():
+    """Orders (same shape as /orders) of several clients in one call: {client_id: [order, ...]}."""
+    client_ids, error = batch_client_ids()
+    if error:
+        return error
+    orders, _ = enrich_orders(select_in(TABLE_ORDERS, 'client_id', client_ids))
+    return jsonify(group_rows(orders, 'client_id')), 200
+
+@app.route('/offers/by_clients', methods=['GET'], endpoint='offers_by_clients')
+@handle_api_error
+@cached('offers', 'clients')
+def offers_by_clients():
+    """Offers of several clients in one call: {client_id: [offer, ...]}, each with client_name."""
+    client_ids, error = batch_client_ids()
+    if error:
+        return error
+    offers = select_in(TABLE_OFFERS, 'client_id', client_ids)
+    names = {c['id']: c['nume'] for c in select_in(TABLE_CLIENTS, 'id', client_ids, 'id, nume')}
+    for offer in offers:
+        offer['client_name'] = names.get(offer['client_id'], "N/A")
+    return jsonify(group_rows(offers, 'client_id')), 200
+
+@app.route('/clients/<client_id>/bundle', methods=['GET'], endpoint='client_bundle')
+@handle_api_error
+@cached('clients', 'vehicles', 'offers', 'offer_products', 'orders', 'order_products', 'payments',
+        'return_products', 'order_balances')
+def client_bundle(client_id):
+    """Everything the client screens show for one client, fetched concurrently:
+    client, vehicles, offers, orders (with products, payments and balances) and totals.
+    """
+    client_future = fetch_executor.submit(fetch_from_supabase, TABLE_CLIENTS, {'id': client_id})
+    vehicles_future = fetch_executor.submit(fetch_from_supabase, TABLE_VEHICLES, {'client_id': client_id})
+    offers_future = fetch_executor.submit(client_offers, client_id)
+    orders_future = fetch_executor.submit(client_orders_with_balances, client_id)
+
+    client_rows = client_future.result().data
+    if not client_rows:
+        return jsonify({"message": "Clientul nu a fost găsit!"}), 404
+    client = client_rows[0]
 
-    # 5. Construim un map payment_map: order_id -> suma plătită
-    paid_map = {}
-    for pay in payments:
-        oid = pay['order_id']
-        paid_map[oid] = paid_map.get(oid, 0) + float(pay.get('amount', 0))
-
-    # 6. Calculăm:
-    #    - total_cheltuit = suma tuturor pret_cu_discount (orice comandă, indiferent de plată)
-    #    - de_platit = suma pentru fiecare order unde (order_total - paid) > 0
-    total_cheltuit = sum(totals_map.values())
-    de_platit = 0.0
-    for oid, order_total in totals_map.items():
-        paid = paid_map.get(oid, 0.0)
-        balance = order_total - paid
-        if balance > 0:
-            de_platit += balance
-
-    # 7. Calculăm refund-uri (suma din return_products) doar pentru order_product_ids op_ids
-    refund_amount = 0.0
-    if op_ids:
-        returns_resp = supabase_client.table('return_products') \
-                                      .select('total_refund') \
-                                      .in_('order_product_id', op_ids) \
-                                      .execute()
-        returns = returns_resp.data or []
-        for r in returns:
-            refund_amount += float(r.get('total_refund', 0))
-
-    # 8. Număr total comenzi
-    total_comenzi = len(order_ids)
+    offers = offers_future.result()
+    for offer in offers:
+        offer["client_name"] = client['nume']
+    orders, balances = orders_future.result()
 
     return jsonify({
-        "total_cheltuit": round(total_cheltuit, 2),
-        "de_platit":      round(de_platit, 2),
-        "sold":           round(refund_amount, 2),
-        "total_comenzi":  total_comenzi
+        "client": client,
+        "vehicles": vehicles_future.result().data or [],
+        "offers": offers,
+        "orders": orders,
+        "totals": client_totals(balances, len(orders))
     }), 200
 
 @app.route('/sales_report', methods=['GET'], endpoint='sales_report')
 @handle_api_error
+@cached('orders', 'order_products', 'clients')
 def sales_report():
-    """Return a sales report grouped by localitate and judet with total sales and number of orders."""
-
-    # Fetch all orders
-    orders_response = fetch_from_supabase(TABLE_ORDERS)
-    orders = orders_response.data if orders_response.data else []
-
-    # Fetch all order_products
-    order_products_response = fetch_from_supabase(TABLE_ORDER_PRODUCTS)
-    order_products = order_products_response.data if order_products_response.data else []
-
-    # Fetch clients (needed for localitate and judet)
-    clients_response = fetch_from_supabase(TABLE_CLIENTS)
-    clients = clients_response.data if clients_response.data else []
-
-    # Map client ID -> localitate + judet
-    client_map = {
-        client["id"]: {
-            "localitate": client.get("localitate", "N/A"),
-            "judet": client.get("judet", "N/A")
-        } for client in clients
-    }
-
-    # Map order_id → list of product prices (cu discount)
-    order_product_totals = {}
-    for prod in order_products:
-        order_id = prod.get("order_id")
-        total = float(prod.get("pret_cu_discount", 0))
-        order_product_totals.setdefault(order_id, 0)
-        order_product_totals[order_id] += total
-
-    # Build final report
-    report = {}
-    for order in orders:
-        client_id = order.get("client_id")
-        order_id = order.get("id")
-        total_vanzare = order_product_totals.get(order_id, 0)
-
-        if client_id not in client_map:
-            continue
+    """Return a sales report grouped by localitate and judet with total sales and number of orders.
 
-        loc = client_map[client_id]["localitate"]
-        jud = client_map[client_id]["judet"]
-        key = (loc, jud)
-
-        if key not in report:
-            report[key] = {"nr_comenzi": 0, "total_vanzari": 0.0}
+    Optional filters: date_from / date_to (YYYY-MM-DD, inclusive) and judet.
+    The grouping runs in the database (sql/sales_report.sql), so only the
+    aggregated rows travel over HTTP.
+    """
+    try:
+        date_from = parse_date_arg('date_from')
+        date_to = parse_date_arg('date_to')
+    except ValueError:
+        return jsonify({"error": "date_from și date_to trebuie să fie în formatul YYYY-MM-DD"}), 400
+    judet = request.args.get('judet', '').strip() or None
 
-        report[key]["nr_comenzi"] += 1
-        report[key]["total_vanzari"] += total_vanzare
+    rows = call_rpc('sales_report', {
+        'p_date_from': date_from,
+        'p_date_to': date_to,
+        'p_judet': judet
+    })
 
-    # Format final JSON response
     response_data = [
         {
-            "localitate": loc,
-            "judet": jud,
-            "nr_comenzi": data["nr_comenzi"],
-            "total_vanzari": round(data["total_vanzari"], 2)
+            "localitate": row["localitate"],
+            "judet": row["judet"],
+            "nr_comenzi": int(row["nr_comenzi"]),
+            "total_vanzari": round(float(row["total_vanzari"] or 0), 2)
         }
-        for (loc, jud), data in sorted(report.items())
+        for row in rows
     ]
 
     return jsonify(response_data), 200
 
 @app.route('/top_clients', methods=['GET'], endpoint='top_clients')
 @handle_api_error
+@cached('clients', 'orders', 'order_products')
 def top_clients():
     """Return top clients by total value or number of orders."""
 
     sort_by = request.args.get('sort_by', 'Total Cheltuit')
 
-    # Fetch all clients, orders, and order products
-    clients = fetch_from_supabase(TABLE_CLIENTS).data or []
-    orders = fetch_from_supabase(TABLE_ORDERS).data or []
-    order_products = fetch_from_supabase(TABLE_ORDER_PRODUCTS).data or []
+    # Fetch all clients, orders, and order products (only the columns the ranking uses)
+    clients = fetch_from_supabase(TABLE_CLIENTS, fields='id, nume').data or []
+    orders = fetch_from_supabase(TABLE_ORDERS, fields='id, client_id').data or []
+    order_products = fetch_from_supabase(TABLE_ORDER_PRODUCTS, fields='order_id, pret_cu_discount').data or []
 
     # Build a lookup for products by order_id
     order_totals = {}
@@ -973,124 +1712,182 @@ def top_clients():
 
 @app.route('/debts', methods=['GET'], endpoint='debts_report')
 @handle_api_error
+@cached('orders', 'order_balances', 'clients', 'vehicles')
 def debts_report():
-    """Return a list of clients with outstanding debts (unpaid or partially paid orders)."""
+    """Return a list of clients with outstanding debts (unpaid or partially paid orders).
+
+    Optional pagination: page / per_page. The total number of debtors is
+    returned in the X-Total-Count header; the body keeps the same list shape.
+    """
+    page = request.args.get('page', type=int)
+    per_page = request.args.get('per_page', 10, type=int)
 
-    # Fetch relevant orders
+    # Fetch relevant orders (only the columns the report needs)
     relevant_statuses = [
         "Comandată și neplătită",
         "Comandată și plătită parțial",
         "Ridicată și neplătită",
         "Ridicată și plătită parțial"
     ]
-    orders_response = supabase_client.table("orders").select("*").in_("plata", relevant_statuses).execute()
-    orders = orders_response.data or []
+    orders = supabase_client.table(TABLE_ORDERS) \
+                            .select('id, client_id, vehicle_id') \
+                            .in_('plata', relevant_statuses) \
+                            .order('id') \
+                            .execute().data or []
 
     if not orders:
-        return jsonify([]), 200
+        return jsonify([]), 200, {'X-Total-Count': '0'}
 
-    # Fetch products from these orders
+    # Per-order balances from the order_balances ledger
     order_ids = [order["id"] for order in orders]
-    order_products_response = supabase_client.table("order_products").select("*").in_("order_id", order_ids).execute()
-    order_products = order_products_response.data or []
-
-    # Fetch payments related to these orders
-    payments_response = supabase_client.table("payments").select("*").in_("order_id", order_ids).execute()
-    payments = payments_response.data or []
+    balances = fetch_order_balances(order_ids)
 
-    # Fetch clients and vehicles
-    clients_response = supabase_client.table("clients").select("*").execute()
-    clients = {client["id"]: client for client in clients_response.data}
-
-    vehicles_response = supabase_client.table("vehicles").select("*").execute()
-    vehicle_map = {v["id"]: v for v in vehicles_response.data}
-
-    # Compute debts per client
+    # Compute debts per client; the vehicle shown is the one of the first debtor order
     client_debts = {}
-
     for order in orders:
-        client_id = order["client_id"]
-        vehicle = vehicle_map.get(order.get("vehicle_id"), {})
-        order_id = order["id"]
+        row = balances.get(order["id"])
+        if not row:
+            continue
+        debt_remaining = row["balance"]
+        if debt_remaining <= 0:
+            continue
+        debt = client_debts.setdefault(order["client_id"], {
+            "client_id": order["client_id"],
+            "vehicle_id": order.get("vehicle_id"),
+            "suma_datorata": 0.0
+        })
+        debt["suma_datorata"] += debt_remaining
 
-        # Calculate total from order products
-        order_total = sum(
-            float(p["pret_cu_discount"]) for p in order_products if p["order_id"] == order_id
-        )
+    debts = sorted(client_debts.values(), key=lambda x: x["suma_datorata"], reverse=True)
+    total_results = len(debts)
+    if page:
+        debts, total_results = paginate_results(debts, max(page, 1), max(per_page, 1))
 
-        # Calculate payments for this order
-        order_paid = sum(
-            float(p["amount"]) for p in payments if p["order_id"] == order_id
-        )
+    # Fetch only the clients and vehicles referenced by the rows being returned
+    client_ids = list({d["client_id"] for d in debts if d["client_id"]})
+    vehicle_ids = list({d["vehicle_id"] for d in debts if d["vehicle_id"]})
+    clients = {c["id"]: c for c in select_in(TABLE_CLIENTS, 'id', client_ids, 'id, nume, telefon, adresa, localitate, judet')}
+    vehicle_map = {v["id"]: v for v in select_in(TABLE_VEHICLES, 'id', vehicle_ids, 'id, marca, model, numar_inmatriculare')}
 
-        # If still debt, record it
-        debt_remaining = order_total - order_paid
-        if debt_remaining > 0:
-            if client_id not in client_debts:
-                client = clients.get(client_id, {})
-                client_debts[client_id] = {
-                    "nume": client.get("nume", "N/A"),
-                    "telefon": client.get("telefon", "N/A"),
-                    "adresa": f"{client.get('adresa', '')}, {client.get('localitate', '')}, {client.get('judet', '')}",
-                    "suma_datorata": 0.0,
-                    "vehicul": f"{vehicle.get('marca', '')} {vehicle.get('model', '')} ({vehicle.get('numar_inmatriculare', '')})"
-                }
-
-            client_debts[client_id]["suma_datorata"] += debt_remaining
-
-    # Convert to list
-    result = list(client_debts.values())
-    result.sort(key=lambda x: x["suma_datorata"], reverse=True)
+    result = []
+    for debt in debts:
+        client = clients.get(debt["client_id"], {})
+        vehicle = vehicle_map.get(debt["vehicle_id"], {})
+        result.append({
+            "nume": client.get("nume", "N/A"),
+            "telefon": client.get("telefon", "N/A"),
+            "adresa": f"{client.get('adresa', '')}, {client.get('localitate', '')}, {client.get('judet', '')}",
+            "suma_datorata": debt["suma_datorata"],
+            "vehicul": f"{vehicle.get('marca', '')} {vehicle.get('model', '')} ({vehicle.get('numar_inmatriculare', '')})"
+        })
 
-    return jsonify(result), 200
+    return jsonify(result), 200, {'X-Total-Count': str(total_results)}
 
 @app.route('/add_payment', methods=['POST'], endpoint='add_payment')
 @handle_api_error
+@invalidates('payments', 'orders', 'order_balances')
 def add_payment():
+    """Record a payment: answered once it is queued locally, sent to Supabase by write_behind.
+
+    record_ledger_writes inserts it, adds it to the order_balances ledger and
+    sets orders.plata ("Comandată și plătită" / "... parțial") unless the order
+    was already picked up ("Ridicată ..."). "ref" identifies the queued payment
+    (GET /pending_writes/<ref> gives its id once sent).
+    """
     data = request.json
-    client_id = data.get('client_id')
     order_id = data.get('order_id')
-    amount = float(data.get('amount', 0))
-    observations = data.get('observations', "")
-    recorded_by = data.get('recorded_by', "admin")
-    now = datetime.utcnow().isoformat()
-
-    # 1. Insert payment
-    insert_resp = insert_into_supabase("payments", [{
-        "client_id": client_id,
+    try:
+        amount = float(data.get('amount', 0))
+    except (TypeError, ValueError):
+        amount = 0
+    if not order_id or amount <= 0:
+        return jsonify({"error": "order_id și o sumă pozitivă sunt obligatorii"}), 400
+    # From the replica when it is ready, else from Supabase: the payment is acknowledged before it is sent
+    if not fetch_from_supabase('orders', {'id': order_id}, 'id').data:
+        return jsonify({"error": "Comanda nu a fost găsită"}), 404
+
+    payment = {
+        "client_id": data.get('client_id'),
         "order_id": order_id,
         "amount": amount,
-        "recorded_by": recorded_by,
-        "observations": observations,
-        "date": now
-    }])
-
-    # 2. Calculate total paid for this order
-    payments_resp = supabase_client.table("payments").select("amount").eq("order_id", order_id).execute()
-    total_paid = sum(float(p["amount"]) for p in payments_resp.data)
-
-    # 3. Calculate total order amount
-    products_resp = supabase_client.table("order_products").select("pret_cu_discount").eq("order_id", order_id).execute()
-    total_order = sum(float(p["pret_cu_discount"]) for p in products_resp.data)
-
-    # 4. Fetch current order status (can be None)
-    order_resp = supabase_client.table("orders").select("plata").eq("id", order_id).execute()
-    raw_status = order_resp.data[0].get("plata") if order_resp.data else None
-
-    # Normalize to an empty string if None
-    current_status = raw_status or ""
-
-    # 5. Update status only if it doesn't start with "Ridicată"
-    if not current_status.startswith("Ridicată"):
-        if total_paid >= total_order:
-            new_status = "Comandată și plătită"
-        else:
-            new_status = "Comandată și plătită parțial"
+        "recorded_by": data.get('recorded_by', "admin"),
+        "observations": data.get('observations', ""),
+        "date": datetime.utcnow().isoformat()
+    }
+    ref = record_ledger_write('payment', order_id, payment)
+    return jsonify({"message": "Plata înregistrată cu succes", "ref": ref, "pending": write_behind is not None}), 200
 
-        # Update the `plata` field in the orders table
-        update_supabase("orders", {"plata": new_status}, {"id": order_id})
+def record_ledger_write(kind, order_id, row):
+    """Queue a payment / return row in write_behind and return its client_ref.
 
-    return jsonify({"message": "Plata înregistrată cu succes"}), 200
+    Without the replica file (replica_path null) the row is sent right away instead.
+    """
+    if write_behind is None:
+        ref = str(uuid.uuid4())
+        send_ledger_writes([{'ref': ref, 'kind': kind, 'row': {**row, 'client_ref': ref}}])
+        return ref
+    g.write_deferred = True  # Nothing reached Supabase yet, so there is nothing for the replica to pull
+    return write_behind.add(kind, order_id, row)
+
+def send_ledger_writes(entries):
+    """Record a batch of queued payments and returns in one record_ledger_writes call; returns {client_ref: id}."""
+    recorded = call_rpc('record_ledger_writes', {
+        'p_payments': [entry['row'] for entry in entries if entry['kind'] == 'payment'],
+        'p_returns': [entry['row'] for entry in entries if entry['kind'] == 'return'],
+    })
+    return {row['ref']: row['row_id'] for row in recorded}
+
+def ledger_writes_sent(entries, ids):
+    """Put the rows just recorded in the replica under their server ids and expire what was built without them."""
+    if replica is not None and replica.ready:
+        for kind, table in (('payment', 'payments'), ('return', 'return_products')):
+            replica.upsert(table, [{**entry['row'], 'id': int(ids[entry['ref']])}
+                                   for entry in entries if entry['kind'] == kind and entry['ref'] in ids])
+    tables = ('payments', 'return_products', 'orders', 'order_balances')
+    response_cache.invalidate(tables)
+    table_versions.bump(tables)
+    if replica_sync is not None:
+        replica_sync.refresh()  # Bring in the order_balances and orders.plata rows the batch changed
+
+if REPLICA_PATH:
+    write_behind = WriteBehind(
+        REPLICA_PATH,
+        send_ledger_writes,
+        on_sent=ledger_writes_sent,
+        is_retryable=is_network_error,
+        batch_size=WRITE_BEHIND_BATCH_SIZE,
+        interval=config.get("write_behind_seconds", 1)
+    )
+
+@app.route('/pending_writes', methods=['GET'], endpoint='pending_writes')
+def pending_writes():
+    """Payments and returns not yet in Supabase, the rejected ones, and the queue's counters."""
+    if write_behind is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **write_behind.stats(),
+                    "pending_entries": write_behind.pending(), "failed_entries": write_behind.entries("failed")}), 200
+
+@app.route('/pending_writes/failed', methods=['GET'], endpoint='failed_pending_writes')
+def failed_pending_writes():
+    """Payments / returns Supabase rejected after they were acknowledged; polled by the dashboard."""
+    if write_behind is None:
+        return jsonify([]), 200
+    return jsonify(write_behind.entries("failed")), 200
+
+@app.route('/pending_writes/<ref>', methods=['GET'], endpoint='pending_write')
+def pending_write(ref):
+    """State of a queued payment / return and, once sent, the id Supabase gave it."""
+    entry = write_behind.entry(ref) if write_behind is not None else None
+    if entry is None:
+        return jsonify({"error": "Înregistrare necunoscută"}), 404
+    return jsonify(entry), 200
+
+@app.route('/pending_writes/retry', methods=['POST'], endpoint='retry_pending_writes')
+def retry_pending_writes():
+    """Queue the rejected payments / returns again (e.g. after applying a missing migration)."""
+    if write_behind is None:
+        return jsonify({"error": "Coada locală este dezactivată."}), 400
+    return jsonify({"requeued": write_behind.retry_failed()}), 200
 
 @app.route('/returnable_items', methods=['GET'], endpoint='get_returnable_items')
 @handle_api_error
@@ -1112,6 +1909,7 @@ def get_returnable_items():
         .select('order_product_id, return_qty') \
         .in_('order_product_id', item_ids) \
         .execute().data or []
+    returned.extend(entry['row'] for _, entry in pending_ledger_writes([order_id], 'return'))
 
     # 3. Build a map of how many have already been returned
     returned_map = {}
@@ -1128,6 +1926,7 @@ def get_returnable_items():
 
 @app.route('/add_return', methods=['POST'], endpoint='add_return')
 @handle_api_error
+@invalidates('return_products', 'order_balances')
 def add_return():
     """Record returned items and compute refund same as original sale price."""
     data = request.json
@@ -1138,31 +1937,31 @@ def add_return():
     if not op_id or ret_qty <= 0:
         return jsonify({"error": "order_product_id and positive return_qty required"}), 400
 
-    # 1. Fetch the original order_product to get price + discount
-    op = supabase_client.table('order_products') \
-        .select('pret_unitar, discount') \
-        .eq('id', op_id) \
-        .single() \
-        .execute().data
+    # 1. Fetch the original order_product to get price + discount (from the replica when it is ready)
+    products = fetch_from_supabase('order_products', {'id': op_id}, 'order_id, pret_unitar, discount').data
+    if not products:
+        return jsonify({"error": "Produsul comenzii nu a fost găsit"}), 404
+    op = products[0]
 
     unit_price   = float(op['pret_unitar'])
-    discount_pct = float(op['discount'])
+    discount_pct = float(op['discount'] or 0)
     refund_total = ret_qty * unit_price * (1 - discount_pct/100)
 
-    # 2. Insert into return_products
-    supabase_client.table('return_products').insert({
+    # 2. Queue the return_products row; record_ledger_writes also adds the refund to order_balances
+    ref = record_ledger_write('return', op['order_id'], {
         'order_product_id': op_id,
         'return_qty':       ret_qty,
         'unit_price':       unit_price,
         'discount_pct':     discount_pct,
         'total_refund':     refund_total,
         'notes':            notes
-    }).execute()
+    })
 
-    return jsonify({"message": "Return recorded", "refund": round(refund_total,2)}), 200
+    return jsonify({"message": "Return recorded", "refund": round(refund_total,2), "ref": ref}), 200
 
 @app.route("/add_order", methods=["POST"], endpoint="add_order")
 @handle_api_error
+@invalidates('orders', 'order_products', 'payments', 'order_balances', 'offers')
 def add_order():
     data = request.get_json()
     offer_number = data.get("offer_number")
@@ -1172,67 +1971,37 @@ def add_order():
     observations = data.get("observations", "")
     date = data.get("date", datetime.utcnow().strftime("%Y-%m-%d"))
 
-    # 1. Get offer details
-    offer_resp = supabase_client.table("offers").select("*").eq("offer_number", offer_number).single().execute()
-    if not offer_resp.data:
-        return jsonify({"error": "Oferta nu a fost găsită!"}), 404
-    offer = offer_resp.data
-
-    # 2. Insert new order
-    order_resp = supabase_client.table("orders").insert({
-        "client_id": offer["client_id"],
-        "vehicle_id": offer["vehicle_id"],
-        "date": date,
-        "status": status,  # ✅ CORECT: folosește `status`
-        "observations": observations,
-        "order_number": data.get("order_number", f"CMD{int(datetime.now().timestamp())}"),
-        "source_offer_number": offer["offer_number"],  # ✅ Add source_offer_number
-        "source_category": selected_category           # ✅ Add source_category
-    }).execute()
-
-    if not order_resp.data:
-        return jsonify({"error": "Eroare la inserarea comenzii!"}), 500
-    new_order_id = order_resp.data[0]["id"]
+    timer = StepTimer()
 
-    # 3. Get products from offer_products
-    products_resp = supabase_client.table("offer_products") \
-        .select("*") \
-        .eq("offer_number", offer_number) \
-        .eq("categorie", selected_category) \
-        .execute()
-    if not products_resp.data:
-        return jsonify({"error": "Nu există produse pentru această categorie!"}), 400
-
-    # 4. Insert products into order_products
+    # Order, line items, advance payment, ledger row and offer status are all
+    # written by one database function (sql/convert_offer_to_order.sql), atomically
     try:
-        for product in products_resp.data:
-            supabase_client.table("order_products").insert({
-                "order_id": new_order_id,
-                "produs": str(product["produs"]),
-                "brand": str(product["brand"]),
-                "cod_produs": str(product["cod_produs"]),
-                "cantitate": int(float(product["cantitate"])),  # ✅ Safe integer conversion
-                "pret_unitar": float(product["pret_unitar"]),   # ✅ Safe float conversion
-                "pret_total": float(product["pret_total"]),     # ✅ Safe float conversion
-                "discount": float(product["discount"]) if product["discount"] is not None else 0.0,  # ✅ Handle None
-                "pret_cu_discount": float(product["pret_cu_discount"])  # ✅ Safe float conversion
-            }).execute()
+        with timer.step("convert_offer_to_order"):
+            order = call_rpc('convert_offer_to_order', {
+                'p_offer_number': offer_number,
+                'p_category': selected_category,
+                'p_order_number': data.get("order_number"),
+                'p_status': status,
+                'p_date': date,
+                'p_observations': observations,
+                'p_amount_paid': amount_paid,
+                'p_recorded_by': data.get("recorded_by", "admin")
+            })
     except Exception as e:
-        app.logger.error(f"Error inserting product: {product} — {e}")
-        return jsonify({"error": f"Eroare la salvarea produselor: {e}"}), 500
-
-    # 5. Insert payment if amount_paid > 0
-    if amount_paid > 0:
-        supabase_client.table("payments").insert({
-            "client_id": offer["client_id"],
-            "order_id": new_order_id,
-            "amount": amount_paid,
-            "recorded_by": "admin",
-            "observations": observations,
-            "date": datetime.utcnow().isoformat()
-        }).execute()
+        status_code = RPC_ERROR_STATUS.get(getattr(e, 'code', None))
+        if status_code is None:
+            raise
+        return jsonify({"error": getattr(e, 'message', str(e))}), status_code
 
-    return jsonify({"message": "Comandă salvată!", "order_id": new_order_id}), 200
+    # The line items were copied by the database function; index them off the request path
+    fetch_executor.submit(reindex_order_products, order["id"], order.get("client_id"))
+
+    return jsonify({
+        "message": "Comandă salvată!",
+        "order_id": order["id"],
+        "order": order,
+        "timings_ms": timer.as_dict()
+    }), 200
 
 @app.route("/orders/<order_number>", methods=["GET"], endpoint="get_order_by_number")
 def get_order_by_number(order_number):
@@ -1248,36 +2017,32 @@ def get_payments():
     client_id = request.args.get('client_id')
     order_id  = request.args.get('order_id')
 
-    # 1. Base query on payments table
-    query = supabase_client.table('payments') \
-                           .select('id, date, client_id, order_id, amount, recorded_by, observations')
-
-    # 2. Apply filters if provided
+    # 1. Payments, filtered by client and/or order if provided
+    filters = {}
     if client_id:
-        query = query.eq('client_id', client_id)
+        filters['client_id'] = client_id
     if order_id:
-        query = query.eq('order_id', order_id)
-
-    payments_resp = query.execute()
+        filters['order_id'] = order_id
+    payments_resp = fetch_from_supabase('payments', filters, 'id, date, client_id, order_id, amount, recorded_by, observations')
     payments = payments_resp.data or []
-
-    # 3. Fetch clients to map IDs → names
+    # Payments still queued in write_behind are listed under their client_ref
+    if write_behind is not None:
+        payments.extend({**entry['row'], 'id': entry['ref'], 'pending': True}
+                        for entry in write_behind.pending([order_id] if order_id else None)
+                        if entry['kind'] == 'payment'
+                        and all(str(entry['row'].get(key)) == str(value) for key, value in filters.items()))
+
+    # 2. Fetch clients to map IDs → names
     client_ids = list({p['client_id'] for p in payments})
-    clients = supabase_client.table(TABLE_CLIENTS) \
-                             .select('id, nume') \
-                             .in_('id', client_ids) \
-                             .execute().data or []
+    clients = select_in(TABLE_CLIENTS, 'id', client_ids, 'id, nume')
     client_map = {c['id']: c['nume'] for c in clients}
 
-    # 4. Fetch orders to map IDs → order_number
+    # 3. Fetch orders to map IDs → order_number
     order_ids = [p['order_id'] for p in payments if p['order_id']]
-    orders = supabase_client.table(TABLE_ORDERS) \
-                            .select('id, order_number') \
-                            .in_('id', order_ids) \
-                            .execute().data or []
+    orders = select_in(TABLE_ORDERS, 'id', order_ids, 'id, order_number')
     order_map = {o['id']: o['order_number'] for o in orders}
 
-    # 5. Build the final list with Romanian labels
+    # 4. Build the final list with Romanian labels
     result = []
     for p in payments:
         result.append({
@@ -1287,11 +2052,141 @@ def get_payments():
             'comanda':        order_map.get(p['order_id'], ''),
             'suma':           p['amount'],
             'inregistrat_de': p['recorded_by'],
-            'observations':   p.get('observations', '')
+            'observations':   p.get('observations', ''),
+            'pending':        p.get('pending', False)
         })
 
     return jsonify(result), 200
 
+def change_log_id(newest):
+    """Id of the newest (or oldest) change_log entry, None while the log is empty."""
+    rows = supabase_client.table(TABLE_CHANGE_LOG).select('id').order('id', desc=newest).limit(1).execute().data
+    return rows[0]['id'] if rows else None
+
+def sync_snapshot(tables):
+    """Every row of tables, with the cursor to ask for the changes that follow."""
+    # The cursor is read first: changes made while copying show up again in the next delta
+    cursor = change_log_id(newest=True) or 0
+    futures = {table: fetch_executor.submit(fetch_all_rows, table) for table in tables}
+    return {
+        "cursor": str(cursor),
+        "full": True,
+        "more": False,
+        "changes": {table: future.result() for table, future in futures.items()},
+        "deleted": {table: [] for table in tables},
+    }
+
+def sync_delta(tables, since, limit):
+    """Rows of tables changed after change_log id `since`, and the ids of rows deleted since then.
+
+    At most limit log entries are read ("more" says whether there are
+    others); several changes to one row collapse into its latest state.
+    """
+    entries = supabase_client.table(TABLE_CHANGE_LOG) \
+                             .select('id, table_name, row_id, op') \
+                             .gt('id', since) \
+                             .order('id') \
+                             .limit(limit) \
+                             .execute().data or []
+    latest = {}
+    for entry in entries:
+        if entry['table_name'] in tables:
+            latest[(entry['table_name'], entry['row_id'])] = entry['op']
+
+    deleted = {table: [] for table in tables}
+    upserted = {}
+    for (table, row_id), op in latest.items():
+        (deleted[table] if op == 'delete' else upserted.setdefault(table, [])).append(row_id)
+    futures = {table: fetch_executor.submit(select_in, table, KEY_COLUMNS.get(table, 'id'), ids, local=False)
+               for table, ids in upserted.items()}
+    changes = {table: [] for table in tables}
+    for table, future in futures.items():
+        changes[table] = future.result()
+        found = {str(row[KEY_COLUMNS.get(table, 'id')]) for row in changes[table]}
+        # Rows deleted again since they were logged; their tombstone may lie past this page
+        deleted[table].extend(row_id for row_id in upserted[table] if row_id not in found)
+
+    return {
+        "cursor": str(entries[-1]['id'] if entries else since),
+        "full": False,
+        "more": len(entries) == limit,
+        "changes": changes,
+        "deleted": deleted,
+    }
+
+@app.route('/sync', methods=['GET'], endpoint='sync')
+@handle_api_error
+def sync():
+    """Changes to the synced tables since a cursor, for clients keeping a local copy.
+
+    Without since (or when the log entries after it were pruned) the answer
+    is a full snapshot ("full": true). Otherwise "changes" holds the current
+    rows changed after the cursor and "deleted" the ids of deleted rows, per
+    table; "cursor" goes into the next call, made right away while "more" is
+    true. tables= narrows the answer to some of SYNC_TABLES.
+    """
+    try:
+        tables = parse_id_list('tables') or list(SYNC_TABLES)
+        since = request.args.get('since', '').strip()
+        since = int(since) if since else None
+    except ValueError:
+        return jsonify({"error": "since trebuie să fie un cursor întors de /sync"}), 400
+    unknown = [table for table in tables if table not in SYNC_TABLES]
+    if unknown:
+        return jsonify({"error": f"Tabele necunoscute: {', '.join(unknown)}"}), 400
+    limit = min(max(request.args.get('limit', SYNC_PAGE_SIZE, type=int), 1), SYNC_MAX_PAGE_SIZE)
+    return jsonify(sync_changes(tables, since, limit)), 200
+
+def sync_changes(tables, since, limit=SYNC_PAGE_SIZE):
+    """The /sync payload: a delta after change_log id since, or a snapshot without one (or when it was pruned)."""
+    if since:
+        oldest = change_log_id(newest=False)
+        if oldest is not None and since < oldest - 1:
+            since = None  # Entries after the cursor were pruned
+    if not since:
+        return sync_snapshot(tables)
+    return sync_delta(tables, since, limit)
+
+def replay_outbox_entry(entry):
+    """Send a queued write through the app again: DONE, RETRY while Supabase is unreachable, else FAILED."""
+    with app.test_client() as client:
+        response = client.open(entry['path'], method=entry['method'], data=entry['body'],
+                               content_type=entry['content_type'], headers={REPLAY_HEADER: str(entry['id'])})
+    if response.status_code < 400:
+        return DONE
+    return (RETRY if response.status_code == 503 else FAILED), response.get_data(as_text=True)
+
+def replica_changed(tables):
+    """Changes pulled into the replica (other workstations' included) expire the cached responses built on them."""
+    response_cache.invalidate(tables)
+    table_versions.bump(tables)
+
+if replica is not None:
+    replica_sync = ReplicaSync(
+        replica,
+        lambda cursor: sync_changes(SYNC_TABLES, int(cursor) if cursor else None),
+        outbox=outbox,
+        replay=replay_outbox_entry,
+        on_change=replica_changed,
+        interval=config.get("replica_sync_seconds", 5)
+    )
+
+@app.route('/replica/stats', methods=['GET'], endpoint='replica_stats')
+def replica_stats():
+    """Replica row counts and cursor, sync state, and the outbox (pending and failed writes)."""
+    if replica_sync is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **replica_sync.stats(),
+                    "failed_writes": outbox.entries("failed")}), 200
+
+@app.route('/replica/sync', methods=['POST'], endpoint='replica_sync_now')
+def replica_sync_now():
+    """Ask the background sync to run now (replay the outbox, then pull)."""
+    if replica_sync is None:
+        return jsonify({"error": "Replica locală este dezactivată."}), 400
+    replica_sync.wake()
+    return jsonify({"message": "Sincronizare pornită."}), 202
+
 @app.route('/order_products/search_global', methods=['GET'], endpoint='search_order_products_global')
 @handle_api_error
 def search_order_products_global():
@@ -1314,6 +2209,31 @@ def search_order_products_global():
     # Ensure the response includes the required keys
     return jsonify(resp.data or []), 200
 
+@app.cli.command('verify-balances')
+@click.option('--repair', is_flag=True, help='Overwrite drifted ledger rows with the recomputed values.')
+def verify_balances(repair):
+    """Recompute order_balances from the raw tables and report drift."""
+    drift = call_rpc('order_balances_verify', {'p_repair': repair})
+    for row in drift:
+        click.echo(
+            f"order {row['order_id']}: "
+            f"total {row['ledger_total']} -> {row['actual_total']}, "
+            f"paid {row['ledger_paid']} -> {row['actual_paid']}, "
+            f"refunded {row['ledger_refunded']} -> {row['actual_refunded']}"
+        )
+    if not drift:
+        click.echo("order_balances is in sync with the raw tables.")
+    elif repair:
+        click.echo(f"Repaired {len(drift)} order(s).")
+    else:
+        click.echo(f"{len(drift)} order(s) drifted; run with --repair to fix them.")
+
+def run_server(host='127.0.0.1', port=5000, mode=None):
+    """Start the warm-up and serve the app in the configured mode (blocks)."""
+    start_warm_up()
+    serve(app, mode or SERVER_MODE, host=host, port=port, threads=SERVER_THREADS, queue_depth=SERVER_QUEUE_DEPTH)
+
 if __name__ == '__main__':
     print("Starting Flask app...")
+    start_warm_up()
     app.run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
@@ -0,0 +1,184 @@
+# filepath: flask-app/background_api.py
+# Runs the GUI's HTTP calls on a worker pool and hands the results back to the Tk main thread.
+import queue
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from api_client import api_client
+
+class RequestHandle:
+    """A request submitted to BackgroundApi; cancel() drops its callbacks."""
+    def __init__(self, owner):
+        self.owner = owner
+        self.cancelled = False
+        self.future = None
+
+    def cancel(self):
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+class BackgroundApi:
+    """Thread-pool HTTP client for Tk windows.
+
+    Requests run on worker threads; their callbacks are queued and run on the
+    Tk main thread by a root.after poll, so windows never block on the network.
+    Every request belongs to an owner window: while the owner has requests in
+    flight it shows a busy cursor, and when it is destroyed its pending
+    requests are cancelled and their callbacks dropped.
+    """
+    POLL_MS = 25
+
+    def __init__(self, max_workers=6, send=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gui-http")
+        self._send = send or api_client.request
+        self._results = queue.Queue()
+        self._pending = {}  # owner -> set of RequestHandle (touched on the Tk thread only)
+        self._cursors = {}  # owner -> cursor to restore once idle
+        self._watched = set()  # owners with the <Destroy> hook installed
+        self._poll_root = None
+
+    def request(self, owner, method, url, on_success=None, on_error=None, **kwargs):
+        """Send method/url (a path on the shared ApiClient) in the background.
+
+        on_success(response) gets every HTTP response, whatever its status code;
+        on_error(exception) gets connection errors and timeouts. Both run on the
+        Tk main thread, and neither runs if the request was cancelled.
+        """
+        handle = RequestHandle(owner)
+        self._track(owner, handle)
+        handle.future = self._executor.submit(self._run, handle, method, url, kwargs, on_success, on_error)
+        handle.future.add_done_callback(lambda future: self._results.put(handle))
+        self._ensure_polling(owner)
+        return handle
+
+    def get(self, owner, url, on_success=None, on_error=None, **kwargs):
+        return self.request(owner, "GET", url, on_success, on_error, **kwargs)
+
+    def post(self, owner, url, on_success=None, on_error=None, **kwargs):
+        return self.request(owner, "POST", url, on_success, on_error, **kwargs)
+
+    def put(self, owner, url, on_success=None, on_error=None, **kwargs):
+        return self.request(owner, "PUT", url, on_success, on_error, **kwargs)
+
+    def patch(self, owner, url, on_success=None, on_error=None, **kwargs):
+        return self.request(owner, "PATCH", url, on_success, on_error, **kwargs)
+
+    def delete(self, owner, url, on_success=None, on_error=None, **kwargs):
+        return self.request(owner, "DELETE", url, on_success, on_error, **kwargs)
+
+    def stream_lines(self, owner, path, on_line, on_done=None, on_error=None, **kwargs):
+        """GET path with a streamed body and call on_line(line) on the Tk thread for each line as it arrives.
+
+        on_done(response) runs after the last line (also for non-200 responses,
+        which produce no lines); on_error(exception) as for request().
+        """
+        handle = RequestHandle(owner)
+        self._track(owner, handle)
+        handle.future = self._executor.submit(self._run_stream, handle, path, kwargs, on_line, on_done, on_error)
+        handle.future.add_done_callback(lambda future: self._results.put(handle))
+        self._ensure_polling(owner)
+        return handle
+
+    def cancel_all(self, owner):
+        """Cancel every request of owner (called automatically when it is destroyed)."""
+        for handle in self._pending.pop(owner, set()):
+            handle.cancel()
+        self._set_busy(owner, False)
+
+    def _forget(self, owner):
+        self.cancel_all(owner)
+        self._watched.discard(owner)
+
+    def is_busy(self, owner):
+        return bool(self._pending.get(owner))
+
+    def _run(self, handle, method, url, kwargs, on_success, on_error):
+        if handle.cancelled:
+            return None, None
+        try:
+            return on_success, self._send(method, url, **kwargs)
+        except Exception as e:
+            return on_error, e
+
+    def _run_stream(self, handle, path, kwargs, on_line, on_done, on_error):
+        if handle.cancelled:
+            return None, None
+        try:
+            with self._send("GET", path, stream=True, **kwargs) as response:
+                if response.status_code == 200:
+                    for line in response.iter_lines(decode_unicode=True):
+                        if handle.cancelled:
+                            return None, None
+                        if line:
+                            self._results.put((handle, on_line, line))
+            return on_done, response
+        except Exception as e:
+            return on_error, e
+
+    def _track(self, owner, handle):
+        if owner not in self._watched:
+            self._watched.add(owner)
+            owner.bind("<Destroy>", lambda event, o=owner: event.widget is o and self._forget(o), add="+")
+        self._pending.setdefault(owner, set()).add(handle)
+        self._set_busy(owner, True)
+
+    def _finish(self, handle):
+        handles = self._pending.get(handle.owner)
+        if handles is None:
+            return
+        handles.discard(handle)
+        if not handles:
+            del self._pending[handle.owner]
+            self._set_busy(handle.owner, False)
+
+    def _set_busy(self, owner, busy):
+        """Loading state: a watch cursor on the owner window while it waits for the server."""
+        try:
+            if busy and owner not in self._cursors:
+                self._cursors[owner] = owner.cget("cursor")
+                owner.config(cursor="watch")
+            elif not busy and owner in self._cursors:
+                owner.config(cursor=self._cursors.pop(owner))
+        except tk.TclError:
+            self._cursors.pop(owner, None)  # Window already destroyed
+
+    def _ensure_polling(self, owner):
+        if self._poll_root is None:
+            self._poll_root = owner._root()
+            self._poll_root.after(self.POLL_MS, self._drain)
+
+    def _drain(self):
+        while True:
+            try:
+                item = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, tuple):
+                # Progress event of a streaming request (the request itself is still pending)
+                handle, callback, result = item
+                if not handle.cancelled:
+                    self._call(callback, result)
+                continue
+            handle = item
+            self._finish(handle)
+            if handle.cancelled or handle.future.cancelled():
+                continue
+            callback, result = handle.future.result()
+            self._call(callback, result)
+
+        if self._pending or not self._results.empty():
+            self._poll_root.after(self.POLL_MS, self._drain)
+        else:
+            self._poll_root = None
+
+    @staticmethod
+    def _call(callback, result):
+        if callback is None:
+            return
+        try:
+            callback(result)
+        except Exception as e:
+            print(f"[ERROR] Exception in background request callback: {e}")
+
+# Shared by every window
+api = BackgroundApi()
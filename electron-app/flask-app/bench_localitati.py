@@ -0,0 +1,70 @@
+# filepath: flask-app/bench_localitati.py
+"""/search_localitati: the folded TextIndex against the old per-request loop.
+
+Types sample locality names one character at a time (as the comboboxes in
+new_customer.py do) and times each lookup both ways, in-process, on
+resources/judete_localitati.json.
+
+    python bench_localitati.py --queries 300
+"""
+import argparse
+import json
+import os
+import random
+import time
+from text_index import TextIndex
+
+def loop_search(judete_localitati, query):
+    """The loop /search_localitati used before TextIndex."""
+    results = []
+    for judet, localitati in judete_localitati.items():
+        for localitate in localitati:
+            if query.lower() in localitate.lower():
+                results.append({'judet': judet, 'localitate': localitate})
+    return results
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def time_keystrokes(lookup, queries):
+    timings = []
+    for query in queries:
+        for end in range(1, len(query) + 1):
+            started = time.perf_counter()
+            lookup(query[:end])
+            timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=300, help="locality names typed character by character")
+    parser.add_argument("--limit", type=int, default=50, help="result limit passed to the index")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    path = os.path.join(os.path.dirname(__file__), 'resources', 'judete_localitati.json')
+    with open(path, 'r', encoding='utf-8') as json_file:
+        judete_localitati = json.load(json_file)
+
+    started = time.perf_counter()
+    index = TextIndex(
+        (localitate, {'judet': judet, 'localitate': localitate})
+        for judet, localitati in judete_localitati.items()
+        for localitate in localitati
+    )
+    print(f"Index: {len(index)} localities in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    rng = random.Random(args.seed)
+    names = [localitate for localitati in judete_localitati.values() for localitate in localitati]
+    queries = rng.sample(names, min(args.queries, len(names)))
+
+    for label, lookup in (
+        ("loop", lambda text: loop_search(judete_localitati, text)),
+        ("index", lambda text: index.search(text, args.limit)),
+    ):
+        timings = time_keystrokes(lookup, queries)
+        print(f"{label:>6}: {len(timings)} keystrokes   p50 {percentile(timings, 0.50):.3f} ms   "
+              f"p99 {percentile(timings, 0.99):.3f} ms   max {timings[-1]:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# filepath: flask-app/bench_replica.py
+"""Read latency of the local replica (replica.py) for the lookups the read routes make.
+
+Fills an in-memory replica with a synthetic shop (clients with vehicles,
+orders, products, payments and returns) through Replica.apply, the way the
+background sync does, then times each lookup; compare with the 100+ ms of a
+Supabase round trip.
+
+    python bench_replica.py --clients 5000 --rounds 500
+"""
+import argparse
+import random
+import time
+import uuid
+from replica import Replica
+
+def synthetic_snapshot(clients, seed):
+    rng = random.Random(seed)
+    tables = {table: [] for table in ('clients', 'vehicles', 'offers', 'offer_products', 'orders',
+                                      'order_products', 'payments', 'return_products')}
+    order_id = product_id = 0
+    for index in range(clients):
+        client_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        tables['clients'].append({"id": client_id, "nume": f"Client {index}", "telefon": f"07{index:08d}",
+                                  "localitate": "Cluj-Napoca", "judet": "Cluj"})
+        for _ in range(rng.randint(1, 3)):
+            tables['vehicles'].append({"id": str(uuid.UUID(int=rng.getrandbits(128))), "client_id": client_id,
+                                       "marca": "Dacia", "model": "Logan", "vin": f"VIN{rng.getrandbits(40)}"})
+        for _ in range(rng.randint(0, 4)):
+            order_id += 1
+            tables['orders'].append({"id": order_id, "client_id": client_id, "order_number": f"CMD{order_id}",
+                                     "plata": "Comandată și neplătită"})
+            for _ in range(rng.randint(1, 5)):
+                product_id += 1
+                tables['order_products'].append({"id": product_id, "order_id": order_id, "produs": "Anvelopă",
+                                                 "cantitate": 4, "pret_cu_discount": rng.randint(100, 2000)})
+                if rng.random() < 0.05:
+                    tables['return_products'].append({"id": product_id, "order_product_id": product_id,
+                                                      "return_qty": 1, "total_refund": 100})
+            tables['payments'].append({"id": order_id, "client_id": client_id, "order_id": order_id,
+                                       "amount": rng.randint(0, 1000)})
+    return {"cursor": "1", "full": True, "more": False, "changes": tables, "deleted": {table: [] for table in tables}}
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def time_lookup(name, lookup, arguments):
+    timings = []
+    for argument in arguments:
+        started = time.perf_counter()
+        lookup(argument)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(f"{name:<38} p50 {percentile(timings, 0.5):7.3f} ms   p99 {percentile(timings, 0.99):7.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=500, help="lookups timed per query kind")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    snapshot = synthetic_snapshot(args.clients, args.seed)
+    replica = Replica(":memory:")
+    started = time.perf_counter()
+    replica.apply(snapshot)
+    print(f"Snapshot of {sum(len(rows) for rows in snapshot['changes'].values())} rows applied in "
+          f"{(time.perf_counter() - started) * 1000:.0f} ms")
+
+    rng = random.Random(args.seed)
+    client_ids = [rng.choice(snapshot['changes']['clients'])['id'] for _ in range(args.rounds)]
+    orders_by_client = {}
+    for order in snapshot['changes']['orders']:
+        orders_by_client.setdefault(order['client_id'], []).append(order['id'])
+
+    time_lookup("client by id (/clients/<id>)", lambda client_id: replica.select('clients', {'id': client_id}), client_ids)
+    time_lookup("vehicles of a client (/vehicles)", lambda client_id: replica.select('vehicles', {'client_id': client_id}),
+                client_ids)
+    time_lookup("orders of a client", lambda client_id: replica.select('orders', {'client_id': client_id}), client_ids)
+    time_lookup("order totals of a client (/totals)", lambda client_id: replica.order_totals(orders_by_client.get(client_id, [])),
+                client_ids)
+    time_lookup("all clients (/clients)", lambda _: replica.select('clients'), range(max(args.rounds // 50, 5)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# filepath: flask-app/bench_typeahead.py
+"""Per-keystroke latency of the dashboard type-ahead (SearchIndex.suggest).
+
+Types sample names, plates, VINs and product codes one character at a time,
+times every lookup and prints p50/p99/max against the 50 ms budget. By default
+the lookups run in-process on a synthetic index; with --url the same synthetic
+values are sent to GET /search_index/suggest of a running server (HTTP and JSON
+included).
+
+    python bench_typeahead.py --clients 20000
+    python bench_typeahead.py --url http://127.0.0.1:5000
+"""
+import argparse
+import json
+import random
+import string
+import sys
+import time
+from search_index import SearchIndex
+
+# Same budget as typeahead.SUGGEST_BUDGET_MS
+SUGGEST_BUDGET_MS = 50
+
+FIRST_NAMES = ["Ion", "Maria", "Ștefan", "Mărioara", "Gheorghe", "Ioana", "Vasile", "Elena", "Țugui", "Andrei"]
+LAST_NAMES = ["Popescu", "Ionescu", "Dumitrașcu", "Ștefănescu", "Răducanu", "Munteanu", "Țăranu", "Constantin"]
+CITIES = ["Brașov", "Constanța", "Iași", "Timișoara", "Pitești", "București"]
+MAKES = [("Dacia", "Logan"), ("Dacia", "Duster"), ("Volkswagen", "Golf"), ("Hyundai", "Elantra"), ("Ford", "Focus")]
+PRODUCTS = [("Ulei de motor", "Castrol", "CST"), ("Plăcuțe frână", "Bosch", "BSH"), ("Filtru aer", "Mann", "MNF"),
+            ("Anvelope", "Michelin", "MCH"), ("Baterie", "Varta", "VRT")]
+
+def synthetic_docs(clients, products_per_client, rng):
+    for i in range(clients):
+        client_id = f"c{i}"
+        yield "client", {
+            "id": client_id,
+            "nume": f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}",
+            "telefon": f"07{rng.randrange(10 ** 8):08d}",
+            "localitate": rng.choice(CITIES),
+        }, None
+        make, model = rng.choice(MAKES)
+        yield "vehicle", {
+            "id": f"v{i}",
+            "client_id": client_id,
+            "marca": make,
+            "model": model,
+            "vin": "".join(rng.choices(string.ascii_uppercase + string.digits, k=17)),
+            "numar_inmatriculare": f"{rng.choice(['B', 'BV', 'CT', 'IS'])}-{rng.randrange(1, 100):02d}-"
+                                   + "".join(rng.choices(string.ascii_uppercase, k=3)),
+        }, None
+        for j in range(products_per_client):
+            produs, brand, prefix = rng.choice(PRODUCTS)
+            yield "offer_product", {
+                "id": f"p{i}-{j}",
+                "offer_number": f"O{i}",
+                "produs": produs,
+                "brand": brand,
+                "cod_produs": f"{prefix}-{rng.randrange(1000):03d}",
+            }, client_id
+
+def sample_queries(index, count, rng):
+    """Values users type: client names, plates, VINs and product codes taken from the index."""
+    rows = index.conn.execute("select kind, data from search_docs order by random() limit ?", (count,)).fetchall()
+    queries = []
+    for kind, data in rows:
+        row = json.loads(data)
+        if kind == "client":
+            queries.append(row["nume"])
+        elif kind == "vehicle":
+            queries.append(rng.choice([row["numar_inmatriculare"], row["vin"][:10]]))
+        else:
+            queries.append(row["cod_produs"])
+    return queries
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20000, help="synthetic clients (each with a vehicle and products)")
+    parser.add_argument("--products", type=int, default=3, help="offer products per synthetic client")
+    parser.add_argument("--queries", type=int, default=200, help="values typed character by character")
+    parser.add_argument("--limit", type=int, default=8, help="suggestions per lookup")
+    parser.add_argument("--url", help="time a running server instead, e.g. http://127.0.0.1:5000")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.rebuild(lambda: synthetic_docs(args.clients, args.products, rng))
+    print(f"Index: {sum(index.stats()['documents'].values())} documents in {time.perf_counter() - started:.1f} s")
+    queries = sample_queries(index, args.queries, rng)
+
+    if args.url:
+        from api_client import ApiClient
+        client = ApiClient(args.url)
+        lookup = lambda text: client.get("/search_index/suggest", params={"q": text, "limit": args.limit}).json()
+    else:
+        lookup = lambda text: index.suggest(text, limit=args.limit)
+
+    timings = []
+    for query in queries:
+        for end in range(2, len(query) + 1):
+            keystroke_started = time.perf_counter()
+            lookup(query[:end])
+            timings.append((time.perf_counter() - keystroke_started) * 1000)
+
+    timings.sort()
+    p50, p99 = percentile(timings, 0.50), percentile(timings, 0.99)
+    over = sum(1 for value in timings if value > SUGGEST_BUDGET_MS)
+    print(f"Keystrokes: {len(timings)} ({'HTTP ' + args.url if args.url else 'in-process'})")
+    print(f"p50 {p50:.2f} ms   p99 {p99:.2f} ms   max {timings[-1]:.2f} ms")
+    print(f"Budget {SUGGEST_BUDGET_MS} ms: {over} keystroke(s) over")
+    return 0 if p99 <= SUGGEST_BUDGET_MS else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
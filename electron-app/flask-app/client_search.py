@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
+from background_api import api
 from vezi_comenzi import open_view_orders_window_with_orders  # Import the function to open the view orders window with orders
 from vezi_oferte import open_view_offers_window_with_offers  # Import the function to open the view offers window with offers
 
@@ -50,8 +50,14 @@ def add_client_search_content(frame, search_window, on_client_selected_callback)
 
 def search_clients(query, client_list):
     print(f"Searching for clients with query: {query}")  # Debugging statement
+    owner = client_list.winfo_toplevel()
+    api.cancel_all(owner)  # A newer query replaces the one in flight
+    api.get(owner, f'/clients?name={query}',
+            on_success=lambda response: show_clients(response, client_list),
+            on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+
+def show_clients(response, client_list):
     try:
-        response = requests.get(f'http://127.0.0.1:5000/clients?name={query}')
         print(f"Response status code: {response.status_code}")  # Debugging statement
         print(f"Response content: {response.content}")  # Debugging statement
         clients = response.json()
@@ -86,46 +92,52 @@ def on_client_selected(client_id, client_name, search_window, on_client_selected
         search_window.destroy()  # Close the search window
         on_client_selected_callback(client_id, client_name)
 
-def get_client_id_by_name(client_name):
-    try:
-        response = requests.get(f'http://127.0.0.1:5000/clients?name={client_name}')
-        client_data = response.json()
-        if response.status_code == 200 and client_data:
-            return client_data[0]['id']
-    except Exception as e:
-        messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
-    return None
+def get_client_id_by_name(owner, client_name, on_found):
+    """Look the client up in the background and call on_found(client_id), or on_found(None) if there is none."""
+    def on_loaded(response):
+        try:
+            client_data = response.json()
+            if response.status_code == 200 and client_data:
+                on_found(client_data[0]['id'])
+                return
+        except Exception as e:
+            messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+        on_found(None)
+
+    api.get(owner, '/clients', params={'name': client_name, 'fields': 'id'},
+            on_success=on_loaded,
+            on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
 
 def search_client_orders(root, client_name):
-    def search():
-        if client_name:
-            try:
-                response = requests.get(f'http://127.0.0.1:5000/orders?client_name={client_name}')
-                if response.status_code == 200:
-                    orders = response.json()
-                    open_view_orders_window_with_orders(root, orders)
-                else:
-                    messagebox.showerror("Eroare", "Nu s-au putut găsi comenzile pentru clientul specificat.")
-            except Exception as e:
-                messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
-        else:
-            messagebox.showerror("Eroare", "Introduceți numele clientului.")
-
-    search()
+    def on_loaded(response):
+        try:
+            if response.status_code == 200:
+                orders = response.json()
+                open_view_orders_window_with_orders(root, orders)
+            else:
+                messagebox.showerror("Eroare", "Nu s-au putut găsi comenzile pentru clientul specificat.")
+        except Exception as e:
+            messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+
+    if client_name:
+        api.get(root, f'/orders?client_name={client_name}', on_success=on_loaded,
+                on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+    else:
+        messagebox.showerror("Eroare", "Introduceți numele clientului.")
 
 def search_client_offers(root, client_name):
-    def search():
-        if client_name:
-            try:
-                response = requests.get(f'http://127.0.0.1:5000/offers?client_name={client_name}')
-                if response.status_code == 200:
-                    offers = response.json()
-                    open_view_offers_window_with_offers(root, offers)
-                else:
-                    messagebox.showerror("Eroare", "Nu s-au putut găsi ofertele pentru clientul specificat.")
-            except Exception as e:
-                messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
-        else:
-            messagebox.showerror("Eroare", "Introduceți numele clientului.")
-
-    search()
+    def on_loaded(response):
+        try:
+            if response.status_code == 200:
+                offers = response.json()
+                open_view_offers_window_with_offers(root, offers)
+            else:
+                messagebox.showerror("Eroare", "Nu s-au putut găsi ofertele pentru clientul specificat.")
+        except Exception as e:
+            messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+
+    if client_name:
+        api.get(root, f'/offers?client_name={client_name}', on_success=on_loaded,
+                on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+    else:
+        messagebox.showerror("Eroare", "Introduceți numele clientului.")
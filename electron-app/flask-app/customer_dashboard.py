@@ -1,11 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, Menu, simpledialog
-import requests
+from api_client import api_client
+from background_api import api
 from PIL import Image, ImageTk
 import os
 import json
 import sys
-from supabase import create_client, Client
 from config import SUPABASE_URL, SUPABASE_KEY
 from edit_offer import open_edit_offer_window
 from edit_order import open_edit_order_window
@@ -16,9 +16,6 @@ import subprocess
 
 CONFIG_FILE = "config.json"
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 class CustomerDashboardApp:
     def __init__(self, root, client_id):
         self.root = root
@@ -222,72 +219,82 @@ class CustomerDashboardApp:
         self.resize_order_container()
 
     def load_client_details(self):
+        # One background request for client, vehicles, offers, orders and totals;
+        # the window stays responsive and the request is dropped if it is closed
+        api.get(self.root, f'/clients/{self.client_id}/bundle',
+                on_success=self.on_client_bundle_loaded,
+                on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+
+    def on_client_bundle_loaded(self, response):
         try:
-            response = requests.get(f'http://127.0.0.1:5000/clients/{self.client_id}')
             if response.status_code == 200:
-                client_details = response.json()
+                bundle = response.json()
+                client_details = bundle['client']
                 self.client_name_value.config(text=client_details['nume'])
                 self.client_phone_value.config(text=client_details['telefon'])
                 self.client_address_value.config(text=f"{client_details['adresa']}, {client_details['localitate']}, {client_details['judet']}")  # Full address
-                self.load_client_vehicles()
-                self.load_client_offers()
-                self.load_client_orders()
+                self.load_client_vehicles(bundle['vehicles'])
+                self.load_client_offers(bundle['offers'])
+                self.load_client_orders(bundle['orders'])
             else:
                 messagebox.showerror("Eroare", "Nu s-au putut încărca detaliile clientului.")
         except Exception as e:
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
-    def load_client_vehicles(self):
+    def load_client_vehicles(self, vehicles=None):
         try:
-            response = requests.get(f'http://127.0.0.1:5000/vehicles?client_id={self.client_id}')
-            if response.status_code == 200:
+            if vehicles is None:
+                response = api_client.get(f'/vehicles?client_id={self.client_id}')
+                if response.status_code != 200:
+                    messagebox.showerror("Eroare", "Nu s-au putut încărca vehiculele clientului.")
+                    return
                 vehicles = response.json()
-                for vehicle in vehicles:
-                    self.client_vehicles_list.insert('', 'end', values=(vehicle['marca'], vehicle['model'], vehicle['an'], vehicle['vin'], vehicle['numar_inmatriculare'], vehicle['image_url']))
-            else:
-                messagebox.showerror("Eroare", "Nu s-au putut încărca vehiculele clientului.")
+            for vehicle in vehicles:
+                self.client_vehicles_list.insert('', 'end', values=(vehicle['marca'], vehicle['model'], vehicle['an'], vehicle['vin'], vehicle['numar_inmatriculare'], vehicle['image_url']))
         except Exception as e:
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
-    def load_client_offers(self):
+    def load_client_offers(self, offers=None):
         try:
-            response = requests.get(f'http://127.0.0.1:5000/offers?client_id={self.client_id}')
-            if response.status_code == 200:
+            if offers is None:
+                response = api_client.get(f'/offers?client_id={self.client_id}')
+                if response.status_code != 200:
+                    messagebox.showerror("Eroare", "Nu s-au putut încărca ofertele clientului.")
+                    return
                 offers = response.json()
-                print(f"Offers loaded: {offers}")  # Debug print
+            print(f"Offers loaded: {offers}")  # Debug print
 
-                # Clear previous cards
-                for widget in self.offers_canvas_frame.winfo_children():
-                    widget.destroy()
+            # Clear previous cards
+            for widget in self.offers_canvas_frame.winfo_children():
+                widget.destroy()
 
-                # Display up to 4 offers only
-                for index, offer in enumerate(offers[:4]):
-                    self.create_offer_card(self.offers_canvas_frame, offer, index)
+            # Display up to 4 offers only
+            for index, offer in enumerate(offers[:4]):
+                self.create_offer_card(self.offers_canvas_frame, offer, index)
 
-                self.root.after(100, self.resize_offer_container)  # Adjust UI
-            else:
-                messagebox.showerror("Eroare", "Nu s-au putut încărca ofertele clientului.")
+            self.root.after(100, self.resize_offer_container)  # Adjust UI
         except Exception as e:
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
-    def load_client_orders(self):
+    def load_client_orders(self, orders=None):
         try:
-            response = requests.get(f'http://127.0.0.1:5000/orders?client_id={self.client_id}')
-            if response.status_code == 200:
+            if orders is None:
+                response = api_client.get(f'/orders?client_id={self.client_id}')
+                if response.status_code != 200:
+                    messagebox.showerror("Eroare", "Nu s-au putut încărca comenzile clientului.")
+                    return
                 orders = response.json()
-                print(f"Orders loaded: {orders}")  # Debug print
+            print(f"Orders loaded: {orders}")  # Debug print
 
-                # Clear previous cards
-                for widget in self.orders_canvas_frame.winfo_children():
-                    widget.destroy()
+            # Clear previous cards
+            for widget in self.orders_canvas_frame.winfo_children():
+                widget.destroy()
 
-                # Display up to 4 orders only
-                for index, order in enumerate(orders[:4]):
-                    self.create_order_card(self.orders_canvas_frame, order, index)
+            # Display up to 4 orders only
+            for index, order in enumerate(orders[:4]):
+                self.create_order_card(self.orders_canvas_frame, order, index)
 
-                self.root.after(100, self.resize_order_container)  # Adjust UI
-            else:
-                messagebox.showerror("Eroare", "Nu s-au putut încărca comenzile clientului.")
+            self.root.after(100, self.resize_order_container)  # Adjust UI
         except Exception as e:
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
@@ -360,7 +367,7 @@ class CustomerDashboardApp:
     def transform_to_order(self, offer):
         try:
             offer_number = offer["offer_number"]
-            response = requests.get(f"http://127.0.0.1:5000/offers/{offer_number}")
+            response = api_client.get(f"/offers/{offer_number}")
             if response.status_code != 200:
                 raise Exception("Nu s-au putut încărca detaliile ofertei.")
 
@@ -438,9 +445,10 @@ class CustomerDashboardApp:
     def delete_vehicle(self, vehicle_id, vin):
         if messagebox.askyesno("Confirmare", f"Sunteți sigur că doriți să ștergeți vehiculul cu ID {vehicle_id}?", icon='warning', default='no'):
             try:
-                response = requests.delete(f'http://127.0.0.1:5000/delete_vehicle', params={'vehicle_id': vehicle_id})
-                if response.status_code == 200:
-                    messagebox.showinfo("Succes", "Vehiculul a fost șters cu succes!")
+                response = api_client.delete('/delete_vehicle', params={'vehicle_id': vehicle_id})
+                if response.status_code in (200, 202):  # 202: queued while offline
+                    messagebox.showinfo("Succes", response.json()["message"] if response.status_code == 202
+                                        else "Vehiculul a fost șters cu succes!")
                     self.load_client_vehicles()
                 else:
                     messagebox.showerror("Eroare", "Ștergerea vehiculului a eșuat!")
@@ -449,14 +457,14 @@ class CustomerDashboardApp:
 
     def refresh_client_offers(self, client_name, vehicle_id=None):
         try:
-            client_response = requests.get(f'http://127.0.0.1:5000/clients?name={client_name}')
+            client_response = api_client.get('/clients', params={'name': client_name, 'fields': 'id'})
             client_data = client_response.json()
             if client_response.status_code == 200 and client_data:
                 client_id = client_data[0]['id']
                 if vehicle_id:
-                    response = requests.get(f'http://127.0.0.1:5000/offers?client_id={client_id}&vehicle_id={vehicle_id}')
+                    response = api_client.get(f'/offers?client_id={client_id}&vehicle_id={vehicle_id}')
                 else:
-                    response = requests.get(f'http://127.0.0.1:5000/offers?client_id={client_id}')
+                    response = api_client.get(f'/offers?client_id={client_id}')
                 offers = response.json()
 
                 # Clear the existing offers list
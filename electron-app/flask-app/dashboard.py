@@ -2,7 +2,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox, Menu, simpledialog, Toplevel, StringVar, Label, Button
 import json
 import os
-import requests  # Import the requests module
+from api_client import api_client  # Shared HTTP session for the Flask API
+from background_api import api  # Background HTTP calls with callbacks on the Tk thread
 from new_customer import open_add_client_window  # Import the function to open the client window
 from new_car import open_add_vehicle_window  # Import the function to open the vehicle window
 from new_offer import open_add_offer_window  # Import the function to open the offer window
@@ -23,8 +24,8 @@ from vezi_comenzi import open_view_orders_window  # Ensure this import statement
 from client_search import search_client_orders, search_client_offers  # Ensure this import statement is present
 from client_search import open_client_search_window  # Ensure this import statement is present
 from search_function import open_search_window, search_database, display_search_results
+from typeahead import TypeAhead  # As-you-type suggestions for the search box
 
-from supabase import create_client, Client  # Import Supabase client
 import subprocess  # Add this import statement
 from window_payments import open_payments_window  # Import the payments window function
 from add_payment import AddPaymentWindow
@@ -33,9 +34,7 @@ from return_window import ReturnWindow as ReturnProductsWindow  # Import the Ret
 import logging  # Add logging module
 
 CONFIG_FILE = "config.json"
-
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+FAILED_WRITES_POLL_MS = 30000  # How often to ask the server for payments / returns Supabase rejected
 
 class DashboardApp:
     def __init__(self, root):
@@ -59,9 +58,14 @@ class DashboardApp:
         self.style.configure("TEntry", font=("Segoe UI", 10))
         self.style.configure("Treeview.Heading", font=("Segoe UI", 10, "bold"))
 
+        self.client_bundle_request = None  # In-flight /clients/<id>/bundle request, if any
+        self.new_offer_loads = []  # Requests still preparing a "new offer" click
+
         self.create_widgets()
         self.update_canvas_colors()  # Move this line here
         self.refresh_client_list()  # Fetch and display client data when the app is initialized
+        self.reported_failed_writes = set()  # client_refs of rejected payments / returns already shown
+        self.root.after(FAILED_WRITES_POLL_MS, self.check_failed_writes)
 
         # Setup undo stack and activity log
         self.undo_stack = []
@@ -135,6 +139,7 @@ class DashboardApp:
         payments_menu = tk.Menu(menubar, tearoff=0)
         payments_menu.add_command(label="Plăți", command=lambda: open_payments_window(self.root))
         payments_menu.add_command(label="Plată Nouă", command=lambda: AddPaymentWindow(self.root))  # New menu item
+        payments_menu.add_command(label="Retrimite plățile respinse", command=self.retry_failed_writes)
         menubar.add_cascade(label="Plăți", menu=payments_menu)
 
         # Add "Return" menu
@@ -190,6 +195,8 @@ class DashboardApp:
         self.search_entry = ttk.Entry(search_frame, width=50, font=("Segoe UI", 12))
         self.search_entry.pack(side="left", fill="x", expand=True, padx=10, ipady=6)
         self.search_entry.bind("<Return>", self.on_search)  # Bind Enter key to search
+        # Suggestions while typing; Enter on a highlighted one jumps to it instead of searching
+        self.search_suggestions = TypeAhead(self.search_entry, self.on_suggestion_picked)
 
         search_button = ttk.Button(search_frame, text="🔍 Caută", width=10, command=self.on_search)
         search_button.pack(side="right", padx=10)
@@ -423,7 +430,7 @@ class DashboardApp:
             context_menu = Menu(self.root, tearoff=0)
             if event.widget == self.client_list:
                 client = self.client_list.item(selected_item, "values")
-                client_id = self.get_id_by_field('clients', 'name', client[0])
+                client_id = self.selected_client_id()
                 if client_id:
                     context_menu.add_command(label="📝 Editează Client", command=lambda: open_edit_client_window(self.root, client_id))
                     context_menu.add_command(label="🚗 Adaugă Vehicul", command=lambda: open_add_vehicle_window(self.root, client_id, client[0]))
@@ -439,7 +446,7 @@ class DashboardApp:
                 if vehicle_id:
                     context_menu.add_command(label="🛠️ Modifică Detalii Vehicul", command=lambda: subprocess.Popen(["python", "edit_vehicle.py", vehicle_id]))
                     context_menu.add_command(label="🗑️ Șterge Vehicul", command=lambda: self.delete_vehicle(vehicle_id, vehicle[3]))
-                    context_menu.add_command(label="📜 Vezi Oferte", command=lambda: self.refresh_client_offers(self.client_list.item(self.client_list.selection(), "values")[0], vehicle_id))
+                    context_menu.add_command(label="📜 Vezi Oferte", command=lambda: self.refresh_client_offers(vehicle_id))
             elif event.widget == self.orders_list:
                 order = self.orders_list.item(selected_item, "values")
                 order_number = order[0]
@@ -460,7 +467,7 @@ class DashboardApp:
 
     def generate_pdf(self, offer_number):
         try:
-            response = requests.get(f'http://127.0.0.1:5000/offers/{offer_number}')
+            response = api_client.get(f'/offers/{offer_number}')
             if (response.status_code == 200):
                 offer_details = response.json()
                 pdf_generator = PDFGenerator(offer_details)
@@ -471,27 +478,26 @@ class DashboardApp:
         except Exception as e:
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
-    def get_client_id_by_name(self, client_name):
-        """Retrieve the client_id for a given client name."""
-        try:
-            response = requests.get(f'http://127.0.0.1:5000/clients', params={'name': client_name})
-            print(f"[DEBUG] API response for client name '{client_name}': {response.json()}")  # Debug: Log the API response
-
-            if response.status_code == 200:
-                client_data = response.json()
-                if client_data:
-                    return client_data[0]['id']  # Assuming the first result is the correct client
-                else:
-                    print(f"[DEBUG] No client found for name: {client_name}")  # Debug: Log if no client is found
-            else:
-                print(f"[ERROR] Failed to fetch client_id for '{client_name}'. Status code: {response.status_code}")  # Debug: Log API error
-        except Exception as e:
-            print(f"[ERROR] Exception in get_client_id_by_name: {e}")  # Debug: Log any exception
-        return None
+    def select_client_row(self, client_id):
+        """Select (and scroll to) the client's row in the client list; False if it is not listed."""
+        items = self.client_list.tag_has(client_id)
+        if not items:
+            return False
+        self.client_list.selection_set(items[0])
+        self.client_list.see(items[0])
+        return True
+
+    def selected_client_id(self):
+        """Id of the client selected in the client list (stored in the row tags)."""
+        selected_item = self.client_list.selection()
+        if not selected_item:
+            return None
+        tags = self.client_list.item(selected_item[0], "tags")
+        return tags[0] if tags else None
 
     def get_vehicle_id_by_vin(self, vin):
         try:
-            response = requests.get(f'http://127.0.0.1:5000/vehicles?vin={vin}')
+            response = api_client.get(f'/vehicles?vin={vin}')
             vehicle_data = response.json()
             if response.status_code == 200 and vehicle_data:
                 return vehicle_data[0]['id']
@@ -507,10 +513,10 @@ class DashboardApp:
         if messagebox.askyesno("Confirmare", f"Sunteți sigur că doriți să ștergeți clientul {client_name}?", icon='warning', default='no'):
             try:
                 # Log before deleting and push inverse onto undo stack
-                resp_get = requests.get(f'http://127.0.0.1:5000/clients/{client_id}')
+                resp_get = api_client.get(f'/clients/{client_id}')
                 old_client = resp_get.json() if resp_get.ok else None
                 logging.info(f"Deleting client {client_id}")
-                response = requests.delete(f'http://127.0.0.1:5000/delete_client', params={'client_id': client_id})
+                response = api_client.delete('/delete_client', params={'client_id': client_id})
                 if response.ok and old_client:
                     self.undo_stack.append({
                         'description': f"delete_client {client_id}",
@@ -518,8 +524,9 @@ class DashboardApp:
                         'endpoint': '/add_client',
                         'payload': old_client
                     })
-                if response.status_code == 200:
-                    messagebox.showinfo("Succes", "Clientul a fost șters cu succes!")
+                if response.status_code in (200, 202):  # 202: queued while offline
+                    messagebox.showinfo("Succes", response.json()["message"] if response.status_code == 202
+                                        else "Clientul a fost șters cu succes!")
                     self.refresh_client_list()
                 else:
                     messagebox.showerror("Eroare", "Ștergerea clientului a eșuat!")
@@ -529,14 +536,12 @@ class DashboardApp:
     def delete_vehicle(self, vehicle_id, vin):
         if messagebox.askyesno("Confirmare", f"Sunteți sigur că doriți să ștergeți vehiculul cu ID {vehicle_id}?", icon='warning', default='no'):
             try:
-                response = requests.delete(f'http://127.0.0.1:5000/delete_vehicle', params={'vehicle_id': vehicle_id})
-                if response.status_code == 200:
-                    messagebox.showinfo("Succes", "Vehiculul a fost șters cu succes!")
+                response = api_client.delete('/delete_vehicle', params={'vehicle_id': vehicle_id})
+                if response.status_code in (200, 202):  # 202: queued while offline
+                    messagebox.showinfo("Succes", response.json()["message"] if response.status_code == 202
+                                        else "Vehiculul a fost șters cu succes!")
                     # Refresh the vehicle list after deletion
-                    selected_client = self.client_list.selection()
-                    if selected_client:
-                        client_name = self.client_list.item(selected_client, "values")[0]
-                        self.refresh_client_vehicles(client_name)
+                    self.refresh_client_vehicles()
                 else:
                     messagebox.showerror("Eroare", "Ștergerea vehiculului a eșuat!")
             except Exception as e:
@@ -569,8 +574,7 @@ class DashboardApp:
         if not selected_item:
             messagebox.showerror("Eroare", "Selectați un client pentru a vedea ofertele.")
             return
-        client_name = self.client_list.item(selected_item, "values")[0]
-        client_id = self.get_client_id_by_name(client_name)
+        client_id = self.selected_client_id()
         if not client_id:
             messagebox.showerror("Eroare", "ID-ul clientului nu a fost găsit.")
             return
@@ -590,8 +594,7 @@ class DashboardApp:
         if not selected_item:
             messagebox.showerror("Eroare", "Selectați un client pentru a vedea comenzile.")
             return
-        client_name = self.client_list.item(selected_item, "values")[0]
-        client_id = self.get_client_id_by_name(client_name)
+        client_id = self.selected_client_id()
         if not client_id:
             messagebox.showerror("Eroare", "ID-ul clientului nu a fost găsit.")
             return
@@ -667,7 +670,7 @@ class DashboardApp:
     def search(self, query):
         try:
             print(f"Searching for offers with query: {query}")  # Debug print
-            response = requests.get(f'http://127.0.0.1:5000/offers?offer_number={query}')
+            response = api_client.get(f'/offers?offer_number={query}')
             if response.status_code == 200:
                 offers = response.json()
                 # Clear the existing offers list
@@ -684,7 +687,7 @@ class DashboardApp:
 
     def refresh_list(self, api_url, treeview, column_keys):
         try:
-            response = requests.get(api_url)
+            response = api_client.get(api_url)
             data = response.json()
             if response.status_code == 200:
                 treeview.delete(*treeview.get_children())
@@ -698,112 +701,165 @@ class DashboardApp:
 
     def get_id_by_field(self, endpoint, field, value):
         try:
-            response = requests.get(f'http://127.0.0.1:5000/{endpoint}?{field}={value}')
+            response = api_client.get(f'/{endpoint}?{field}={value}')
             data = response.json()
             return data[0]['id'] if response.status_code == 200 and data else None
         except Exception as e:
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
             return None
 
+    def check_failed_writes(self):
+        """Poll for payments / returns that were acknowledged but rejected by Supabase, and show new ones."""
+        api.get(self.root, '/pending_writes/failed',
+                on_success=self.on_failed_writes_loaded,
+                on_error=lambda e: print(f"[ERROR] Could not check rejected payments: {e}"))
+        self.root.after(FAILED_WRITES_POLL_MS, self.check_failed_writes)
+
+    def on_failed_writes_loaded(self, response):
+        if response.status_code != 200:
+            return
+        new_entries = [entry for entry in response.json() if entry['ref'] not in self.reported_failed_writes]
+        if not new_entries:
+            return
+        lines = []
+        for entry in new_entries:
+            self.reported_failed_writes.add(entry['ref'])
+            row = entry['row']
+            if entry['kind'] == 'payment':
+                lines.append(f"Plata de {float(row['amount']):.2f} RON pentru comanda {entry['order_id']}: {entry['last_error']}")
+            else:
+                lines.append(f"Returul de {float(row['total_refund']):.2f} RON pentru comanda {entry['order_id']}: {entry['last_error']}")
+        messagebox.showerror(
+            "Plăți respinse",
+            "Următoarele înregistrări au fost salvate local, dar serverul le-a respins:\n\n" + "\n".join(lines) +
+            "\n\nDupă remedierea problemei folosiți Plăți → Retrimite plățile respinse."
+        )
+
+    def retry_failed_writes(self):
+        def on_success(response):
+            if response.status_code == 200:
+                self.reported_failed_writes.clear()
+                messagebox.showinfo("Plăți", f"Au fost retrimise {response.json()['requeued']} înregistrări.")
+            else:
+                messagebox.showerror("Eroare", f"Nu s-au putut retrimite plățile: {response.text}")
+
+        api.post(self.root, '/pending_writes/retry', on_success=on_success,
+                 on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+
     def refresh_client_list(self):
+        api.get(self.root, '/clients',
+                on_success=self.on_client_list_loaded,
+                on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+
+    def on_client_list_loaded(self, response):
         try:
-            response = requests.get('http://127.0.0.1:5000/clients')
-            data = response.json()
             if response.status_code == 200:
+                if getattr(response, 'not_modified', False) and self.client_list.get_children():
+                    return  # Server answered 304: the rows on screen are current
+                data = response.json()
                 self.client_list.delete(*self.client_list.get_children())  # Clear existing rows
                 # Sort clients alphabetically by name
                 sorted_clients = sorted(data, key=lambda client: client['nume'].lower())
                 for client in sorted_clients:
                     localitate_judet = f"{client.get('localitate', '')}, {client.get('judet', '')}"  # Combine Localitate and Județ
-                    self.client_list.insert("", "end", values=(client['nume'], client['telefon'], localitate_judet))
+                    self.client_list.insert(
+                        "", "end",
+                        values=(client['nume'], client['telefon'], localitate_judet),
+                        tags=(client['id'],)  # Store the client ID in the tags
+                    )
+                self.search_suggestions.invalidate()
             else:
                 messagebox.showerror("Eroare", "Nu s-au putut încărca clienții.")
         except Exception as e:
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
-    def refresh_client_vehicles(self, client_name):
+    def refresh_client_vehicles(self):
         """Refresh the vehicle list for the selected client."""
-        client_id = self.get_id_by_field('clients', 'name', client_name)
+        client_id = self.selected_client_id()
         if client_id:
-            try:
-                response = requests.get(f'http://127.0.0.1:5000/vehicles?client_id={client_id}')
-                vehicles = response.json() if response.status_code == 200 else []
-
-                self.client_vehicles_list.delete(*self.client_vehicles_list.get_children())  # Clear existing rows
-
-                for vehicle in vehicles:
-                    self.client_vehicles_list.insert(
-                        "", "end",
-                        values=(vehicle['marca'], vehicle['model'], vehicle['an'], vehicle['vin'], vehicle['numar_inmatriculare'], vehicle['image_url']),
-                        tags=(vehicle['id'],)  # Store the vehicle ID in the tags
-                    )
-            except Exception as e:
-                messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+            api.get(self.root, '/vehicles', params={'client_id': client_id},
+                    on_success=lambda response: self.render_client_vehicles(response.json() if response.status_code == 200 else []),
+                    on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+
+    def render_client_vehicles(self, vehicles):
+        """Fill the vehicle list with already fetched vehicles."""
+        self.client_vehicles_list.delete(*self.client_vehicles_list.get_children())  # Clear existing rows
+
+        for vehicle in vehicles:
+            self.client_vehicles_list.insert(
+                "", "end",
+                values=(vehicle['marca'], vehicle['model'], vehicle['an'], vehicle['vin'], vehicle['numar_inmatriculare'], vehicle['image_url']),
+                tags=(vehicle['id'],)  # Store the vehicle ID in the tags
+            )
 
-    def refresh_client_offers(self, client_name, vehicle_id=None):
-        client_id = self.get_id_by_field('clients', 'name', client_name)
+    def refresh_client_offers(self, vehicle_id=None):
+        """Refresh the offer cards for the selected client, optionally only those of vehicle_id."""
+        client_id = self.selected_client_id()
         if client_id:
-            try:
-                if vehicle_id:
-                    response = requests.get(f'http://127.0.0.1:5000/offers?client_id={client_id}&vehicle_id={vehicle_id}')
-                else:
-                    response = requests.get(f'http://127.0.0.1:5000/offers?client_id={client_id}')
-                
-                offers = response.json() if response.status_code == 200 else []
-                print(f"[DEBUG] Offers fetched: {offers}")  # Debug: Log the offers
-
-                # Clear the existing offers list
-                for widget in self.offers_canvas_frame.winfo_children():
-                    widget.destroy()
-
-                if not offers:
-                    print("[DEBUG] No offers to display.")  # Debug: Log if no offers
-                    return  # Exit early if no offers
-
-                # Inject client_id into each offer and display as cards
-                for index, offer in enumerate(offers[:4]):
-                    offer["client_id"] = client_id  # ✅ Inject client_id here
-                    is_last_row = index == len(offers[:4]) - 1
-                    self.create_offer_card(self.offers_canvas_frame, offer, index, is_last_row)
-
-                # Add "View More" card if there are more than 4 offers
-                if len(offers) > 4:
-                    self.create_view_more_offer_card(self.offers_canvas_frame, 4)
-
-                self.root.after(100, self.resize_offer_container)  # Adjust UI
-            except Exception as e:
-                print(f"[ERROR] Exception in refresh_client_offers: {e}")  # Debug: Log the exception
-
-    def refresh_client_orders(self, client_name):
-        client_id = self.get_id_by_field('clients', 'name', client_name)
+            params = {'client_id': client_id}
+            if vehicle_id:
+                params['vehicle_id'] = vehicle_id
+            api.get(self.root, '/offers', params=params,
+                    on_success=lambda response: self.render_client_offers(response.json() if response.status_code == 200 else [], client_id),
+                    on_error=lambda e: print(f"[ERROR] Exception in refresh_client_offers: {e}"))  # Debug: Log the exception
+
+    def render_client_offers(self, offers, client_id):
+        """Draw the offer cards (first 4 plus "View More") for already fetched offers."""
+        print(f"[DEBUG] Offers fetched: {offers}")  # Debug: Log the offers
+
+        # Clear the existing offers list
+        for widget in self.offers_canvas_frame.winfo_children():
+            widget.destroy()
+
+        if not offers:
+            print("[DEBUG] No offers to display.")  # Debug: Log if no offers
+            return  # Exit early if no offers
+
+        # Inject client_id into each offer and display as cards
+        for index, offer in enumerate(offers[:4]):
+            offer["client_id"] = client_id  # ✅ Inject client_id here
+            is_last_row = index == len(offers[:4]) - 1
+            self.create_offer_card(self.offers_canvas_frame, offer, index, is_last_row)
+
+        # Add "View More" card if there are more than 4 offers
+        if len(offers) > 4:
+            self.create_view_more_offer_card(self.offers_canvas_frame, 4)
+
+        self.root.after(100, self.resize_offer_container)  # Adjust UI
+
+    def refresh_client_orders(self):
+        """Refresh the order cards for the selected client."""
+        client_id = self.selected_client_id()
         if not client_id:
             return
 
-        try:
-            # Fetch all orders (including "balance") in one shot:
-            resp = requests.get(f'http://127.0.0.1:5000/orders?client_id={client_id}')
-            orders = resp.json() if resp.status_code == 200 else []
-
-            # Clear old cards
-            for widget in self.orders_canvas_frame.winfo_children():
-                widget.destroy()
-
-            # Iterate over each "order" object returned by the backend:
-            for idx, order in enumerate(orders):
-                # Create each order card, passing the full order object:
-                self.create_order_card(
-                    self.orders_canvas_frame,
-                    order,
-                    idx,
-                    is_last_row=(idx == len(orders) - 1)
-                )
-
-            self.root.after(100, self.resize_order_container)
-
-        except Exception as e:
+        def on_error(e):
             print(f"[ERROR] Exception in refresh_client_orders: {e}")
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
+        # Fetch all orders (including "balance") in one shot:
+        api.get(self.root, '/orders', params={'client_id': client_id},
+                on_success=lambda resp: self.render_client_orders(resp.json() if resp.status_code == 200 else []),
+                on_error=on_error)
+
+    def render_client_orders(self, orders):
+        """Draw one card per order (orders already carry total, paid and balance)."""
+        # Clear old cards
+        for widget in self.orders_canvas_frame.winfo_children():
+            widget.destroy()
+
+        # Iterate over each "order" object returned by the backend:
+        for idx, order in enumerate(orders):
+            # Create each order card, passing the full order object:
+            self.create_order_card(
+                self.orders_canvas_frame,
+                order,
+                idx,
+                is_last_row=(idx == len(orders) - 1)
+            )
+
+        self.root.after(100, self.resize_order_container)
+
     def display_client_details(self, event):
         """Display details of the selected client."""
         try:
@@ -813,22 +869,15 @@ class DashboardApp:
                 print(f"[DEBUG] Selected client: {client}")  # Debug: Log the selected client
 
                 client_name = client[0]  # Assuming the first column is the client's name
-                client_id = self.get_client_id_by_name(client_name)
+                client_id = self.selected_client_id()
                 print(f"[DEBUG] Retrieved client_id for '{client_name}': {client_id}")  # Debug: Log the retrieved client_id
 
                 if client_id:
                     # Update the client details section
                     self.client_name_value.config(text=client[0])
                     self.client_phone_value.config(text=client[1])
-                    # Combine Adresă, Localitate, and Județ
-                    client_details = self.get_client_details(client_id)
-                    if client_details:
-                        full_address = f"{client_details.get('adresa', '')}, {client_details.get('localitate', '')}, {client_details.get('judet', '')}"
-                        self.client_address_value.config(text=full_address)
-                    self.refresh_client_vehicles(client_name)
-                    self.refresh_client_orders(client_name)
-                    self.refresh_client_offers(client_name)
-                    self.refresh_client_balances(client_name)
+                    # Client, vehicles, offers, orders and totals in one background request
+                    self.load_client_bundle(client_id)
                 else:
                     messagebox.showerror("Eroare", "ID-ul clientului nu a fost găsit.")
             else:
@@ -837,22 +886,56 @@ class DashboardApp:
             print(f"[ERROR] Exception in display_client_details: {e}")  # Debug: Log any exception
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
-    def get_client_details(self, client_id):
-        """Fetch client details by client ID."""
-        try:
-            response = requests.get(f'http://127.0.0.1:5000/clients/{client_id}')
-            if response.status_code == 200:
-                return response.json()
-            else:
+    def get_client_details(self, owner, client_id, on_loaded):
+        """Fetch client details by client ID in the background and call on_loaded(client), or on_loaded(None) if it failed."""
+        def on_response(response):
+            try:
+                if response.status_code == 200:
+                    on_loaded(response.json())
+                    return
                 print(f"[ERROR] Failed to fetch client details for ID {client_id}.")
-                return None
-        except Exception as e:
+            except Exception as e:
+                print(f"[ERROR] Exception in get_client_details: {e}")
+            on_loaded(None)
+
+        def on_error(e):
             print(f"[ERROR] Exception in get_client_details: {e}")
-            return None
+            on_loaded(None)
+
+        api.get(owner, f'/clients/{client_id}', on_success=on_response, on_error=on_error)
+
+    def load_client_bundle(self, client_id):
+        """Fetch client, vehicles, offers, orders and totals in one request and render them when it returns.
+
+        A newer selection cancels the previous request so a slow response never
+        overwrites the client that is currently selected.
+        """
+        if self.client_bundle_request:
+            self.client_bundle_request.cancel()
+        self.client_bundle_request = api.get(
+            self.root, f'/clients/{client_id}/bundle',
+            on_success=lambda response: self.on_client_bundle_loaded(client_id, response),
+            on_error=lambda e: print(f"[ERROR] Exception in load_client_bundle: {e}")
+        )
+
+    def on_client_bundle_loaded(self, client_id, response):
+        self.client_bundle_request = None
+        if response.status_code != 200:
+            print(f"[ERROR] Failed to fetch client bundle for ID {client_id}. Status code: {response.status_code}")
+            return
+        bundle = response.json()
+        # Combine Adresă, Localitate, and Județ
+        client_details = bundle['client']
+        full_address = f"{client_details.get('adresa', '')}, {client_details.get('localitate', '')}, {client_details.get('judet', '')}"
+        self.client_address_value.config(text=full_address)
+        self.render_client_vehicles(bundle['vehicles'])
+        self.render_client_orders(bundle['orders'])
+        self.render_client_offers(bundle['offers'], client_id)
+        self.render_client_balances(bundle['totals'])
 
     def load_client_details(self):
         try:
-            response = requests.get(f'http://127.0.0.1:5000/clients/{self.client_id}')
+            response = api_client.get(f'/clients/{self.client_id}')
             if response.status_code == 200:
                 client_details = response.json()
                 self.client_name_value.config(text=client_details['nume'])
@@ -869,8 +952,7 @@ class DashboardApp:
     def edit_selected_client(self):
         selected_item = self.client_list.selection()
         if selected_item:
-            client_name = self.client_list.item(selected_item, "values")[0]  # Assuming the client name is the first value
-            client_id = self.get_client_id_by_name(client_name)
+            client_id = self.selected_client_id()
             if client_id:
                 open_edit_client_window(self.root, client_id)
             else:
@@ -886,7 +968,7 @@ class DashboardApp:
             return
 
         client = self.client_list.item(selected_item, "values")
-        client_id = self.get_client_id_by_name(client[0])
+        client_id = self.selected_client_id()
 
         if not client_id:
             print(f"Failed to retrieve client ID for: {client[0]}")  # Debugging
@@ -899,64 +981,62 @@ class DashboardApp:
     def bind_right_click(self):
         self.client_list.bind("<Button-3>", self.on_right_click)
 
-    def refresh_client_balances(self, client_name=None):
+    def refresh_client_balances(self):
         # Dacă nu avem încă etichetele de Totaluri inițializate, ieșim
         if not hasattr(self, 'total_spent_value'):
             return
 
-        try:
-            if client_name:
-                # 1. Obținem client_id din client_name
-                client_id = self.get_client_id_by_name(client_name)
-                if not client_id:
-                    # Dacă nu găsește ID, afișăm zero în toate câmpurile
-                    self.total_spent_value .config(text="0.00 RON")
-                    self.de_platit_value   .config(text="0.00 RON")
-                    self.sold_value        .config(text="0.00 RON")
-                    self.total_orders_value.config(text="0")
-                    return
+        # 1. Obținem client_id din rândul selectat
+        client_id = self.selected_client_id()
+        if not client_id:
+            # Fără client sau fără ID, afișăm zero
+            self.render_client_balances(None)
+            return
 
-                # 2. Apelăm endpoint-ul /totals/<client_id>
-                response = requests.get(f'http://127.0.0.1:5000/totals/{client_id}')
-                if response.status_code == 200:
-                    data = response.json()
-                    total_cheltuit = data.get('total_cheltuit', 0.0)
-                    de_platit      = data.get('de_platit', 0.0)
-                    sold           = data.get('sold', 0.0)       # suma totală a returnărilor
-                    total_comenzi  = data.get('total_comenzi', 0)
-
-                    # 3. Aplicăm sold-ul (refund) pentru a acoperi întâi balanțele deschise
-                    net_de_platit = max(de_platit - sold, 0.0)
-                    net_sold      = max(sold - de_platit, 0.0)
-
-                    # 4. Actualizăm label-urile
-                    self.total_spent_value .config(text=f"{float(total_cheltuit):,.2f} RON")
-                    self.de_platit_value   .config(text=f"{net_de_platit:,.2f} RON")
-                    self.sold_value        .config(text=f"{net_sold:,.2f} RON")
-                    self.total_orders_value.config(text=str(total_comenzi))
-                else:
-                    # Dacă nu răspunde OK, afișăm zero
-                    self.total_spent_value .config(text="0.00 RON")
-                    self.de_platit_value   .config(text="0.00 RON")
-                    self.sold_value        .config(text="0.00 RON")
-                    self.total_orders_value.config(text="0")
-            else:
-                # Fără client selectat, afișăm zero
-                self.total_spent_value .config(text="0.00 RON")
-                self.de_platit_value   .config(text="0.00 RON")
-                self.sold_value        .config(text="0.00 RON")
-                self.total_orders_value.config(text="0")
-        except Exception as e:
-            messagebox.showerror("Eroare", f"A apărut o eroare la încărcarea totalurilor: {e}")
+        # 2. Apelăm endpoint-ul /totals/<client_id>; fără răspuns OK, afișăm zero
+        api.get(self.root, f'/totals/{client_id}',
+                on_success=lambda response: self.render_client_balances(response.json() if response.status_code == 200 else None),
+                on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare la încărcarea totalurilor: {e}"))
+
+    def render_client_balances(self, data):
+        """Update the totals labels from a /totals payload (None shows zeros)."""
+        if not hasattr(self, 'total_spent_value'):
+            return
+
+        data = data or {}
+        total_cheltuit = data.get('total_cheltuit', 0.0)
+        de_platit      = data.get('de_platit', 0.0)
+        sold           = data.get('sold', 0.0)       # suma totală a returnărilor
+        total_comenzi  = data.get('total_comenzi', 0)
+
+        # Aplicăm sold-ul (refund) pentru a acoperi întâi balanțele deschise
+        net_de_platit = max(de_platit - sold, 0.0)
+        net_sold      = max(sold - de_platit, 0.0)
+
+        self.total_spent_value .config(text=f"{float(total_cheltuit):,.2f} RON")
+        self.de_platit_value   .config(text=f"{net_de_platit:,.2f} RON")
+        self.sold_value        .config(text=f"{net_sold:,.2f} RON")
+        self.total_orders_value.config(text=str(total_comenzi))
 
     def on_search(self, event=None):
         """Handle search action and open the search window with the query."""
+        if event is not None and self.search_suggestions.accept():
+            return
+        self.search_suggestions.cancel()
+        self.search_suggestions.hide()
         query = self.search_entry.get().strip()
         if query:
             open_search_window(self.root, query)
         else:
             messagebox.showinfo("Căutare", "Introduceți un termen de căutare.")
 
+    def on_suggestion_picked(self, suggestion):
+        """Clients and vehicles select their client in the list; product codes open the full search."""
+        if suggestion["kind"] in ("client", "vehicle") and suggestion.get("client_id"):
+            if self.select_client_row(suggestion["client_id"]):
+                return
+        open_search_window(self.root, suggestion["text"])
+
     def create_offer_card(self, parent, offer, column, is_last_row=False):
         """Create a card for an offer."""
         card_frame = ttk.LabelFrame(parent, text=f"🛍️ Ofertă {offer['offer_number']}", padding=10)
@@ -969,8 +1049,11 @@ class DashboardApp:
         ttk.Label(card_frame, text=f"📌 Status: {offer['status']}", font=("Segoe UI", 10)).pack(anchor="w")
         ttk.Label(card_frame, text=f"👤 Client: {offer.get('client_name', 'N/A')}", font=("Segoe UI", 10)).pack(anchor="w")
 
-        # Ensure the client variable is passed to the function
-        client = self.get_client_details(offer["client_id"])  # Fetch client details using client_id
+        # The buttons need the client; they are added once its details arrive (a refresh destroys the card and cancels the fetch)
+        self.get_client_details(card_frame, offer["client_id"],
+                                lambda client: self.add_offer_card_buttons(card_frame, offer, client))
+
+    def add_offer_card_buttons(self, card_frame, offer, client):
         if not client:
             print(f"[ERROR] Client not found for offer: {offer}")
             return
@@ -1023,8 +1106,7 @@ class DashboardApp:
             messagebox.showerror("Eroare", "Selectați un client pentru a deschide dashboard-ul.")
             return
 
-        client = self.client_list.item(selected_item, "values")
-        client_id = self.get_id_by_field('clients', 'name', client[0])
+        client_id = self.selected_client_id()
 
         if not client_id:
             messagebox.showerror("Eroare", "Nu s-a putut găsi ID-ul clientului.")
@@ -1182,9 +1264,9 @@ class DashboardApp:
             offer_number = offer_summary["offer_number"]
             print("[DEBUG] Calling /offers/ with offer_number:", offer_number)
 
-            response = requests.get(f"http://127.0.0.1:5000/offers/{offer_number}")
+            # One request: offer + categories + vehicle + client name
+            response = api_client.get(f"/offers/{offer_number}", params={"expand": "vehicle,client"})
             print("[DEBUG] HTTP status:", response.status_code)
-            print("[DEBUG] Raw text:", response.text)
 
             if response.status_code != 200 or not response.text.strip():
                 messagebox.showerror("Eroare", "Nu s-au putut încărca detaliile ofertei.")
@@ -1197,8 +1279,6 @@ class DashboardApp:
                 messagebox.showerror("Eroare", f"A apărut o eroare la preluarea ofertei:\n{e}")
                 return
 
-            print("[DEBUG] Full offer data received:", offer_data)
-
             if "categories" not in offer_data or not offer_data["categories"]:
                 print("[DEBUG] Categories missing or empty.")
                 messagebox.showerror("Eroare", "Ofertă invalidă: lipsesc categoriile.")
@@ -1209,33 +1289,20 @@ class DashboardApp:
                 messagebox.showwarning("Anulare", "Conversia în comandă a fost anulată.")
                 return
 
-            # Fetch vehicle details
             vehicle_id = offer_data["vehicle_id"]
-            vehicle_response = requests.get(f"http://127.0.0.1:5000/vehicle/{vehicle_id}")
-            try:
-                vehicle_data = vehicle_response.json()
-            except Exception as e:
-                print("[ERROR] JSON decode error for vehicle:", vehicle_response.text)
-                messagebox.showerror("Eroare", f"A apărut o eroare la preluarea vehiculului: {vehicle_response.text}")
-                return
-
-            # Inject client_name into offer_data
-            client_response = requests.get(f"http://127.0.0.1:5000/clients/{offer_data['client_id']}")
-            if client_response.status_code == 200:
-                client_info = client_response.json()
-                offer_data["client_name"] = client_info.get("nume", "Client Necunoscut")
-            else:
-                offer_data["client_name"] = "Client Necunoscut"
+            vehicle_data = offer_data.get("vehicle") or {"marca": "N/A", "model": "N/A", "numar_inmatriculare": "N/A"}
+            vehicle_data["id"] = vehicle_id
 
-            # Prepare order data
+            # Prepare order data; offer_details lets the order window skip refetching the offer
             order_data = {
                 "offer_number": offer_data["offer_number"],
                 "client_id": offer_data["client_id"],
-                "client_name": offer_data.get("client_name", ""),
+                "client_name": offer_data.get("client_name") or "Client Necunoscut",
                 "vehicle_id": vehicle_id,
                 "vehicle_data": vehicle_data,
                 "selected_category": selected_category,
-                "order_number": offer_data["offer_number"].replace("O", "CMD")
+                "order_number": offer_data["offer_number"].replace("O", "CMD"),
+                "offer_details": offer_data
             }
 
             from new_order import open_new_order_window
@@ -1246,48 +1313,18 @@ class DashboardApp:
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
     def handle_order_saved(self, offer_number, order_number, selected_category):
-        """Callback after an order is saved to update the offer status without losing existing fields."""
-        try:
-            # 1. Fetch existing offer
-            response = requests.get(f"http://127.0.0.1:5000/offers/{offer_number}")
-            if response.status_code != 200:
-                messagebox.showerror("Eroare", "Nu s-au putut încărca detaliile ofertei.")
-                return
-
-            offer_data = response.json()
-
-            # 2. Concatenează observațiile (nu le înlocui complet)
-            previous_observations = offer_data.get("observations", "").strip()
-            new_note = f"Transformată în comandă {order_number}, categoria aleasă: {selected_category}"
-            merged_observations = f"{previous_observations}\n{new_note}".strip() if previous_observations else new_note
-
-            # 3. Trimite PATCH cu toate câmpurile esențiale
-            update_payload = {
-                "status": "Acceptată",
-                "observations": merged_observations,
-                "vehicle_id": offer_data.get("vehicle_id"),
-                "date": offer_data.get("date"),
-                "client_id": offer_data.get("client_id"),  # ✅ Include client_id for redundancy
-                "offer_number": offer_data.get("offer_number")  # ✅ Include offer_number for redundancy
-            }
-
-            headers = {"Content-Type": "application/json"}
-            patch_resp = requests.patch(
-                f"http://127.0.0.1:5000/offers/{offer_number}",
-                data=json.dumps(update_payload),
-                headers=headers
-            )
-
-            if patch_resp.status_code == 200:
-                messagebox.showinfo("Actualizare", f"Ofertă {offer_number} marcată ca Acceptată.")
-                self.refresh_client_offers(self.client_name_value.cget("text"))
-            else:
-                messagebox.showerror("Eroare", f"Actualizarea ofertei a eșuat:\n{patch_resp.text}")
+        """Callback after an order is saved.
 
-        except Exception as e:
-            messagebox.showerror("Eroare", f"A apărut o eroare la actualizarea ofertei:\n{e}")
+        /add_order already marked the offer as Acceptată and appended the
+        conversion note to its observations, so only the view is refreshed here.
+        """
+        messagebox.showinfo("Actualizare", f"Ofertă {offer_number} marcată ca Acceptată.")
+        self.refresh_client_offers()
+        self.refresh_client_orders()
 
     def open_new_offer_with_customer(self):
+        if self.new_offer_loads:
+            return  # Still preparing the previous click
         try:
             selected_item = self.client_list.selection()[0]
             customer_data = self.client_list.item(selected_item, "values")
@@ -1295,42 +1332,60 @@ class DashboardApp:
                 messagebox.showerror("Eroare", "Nu a fost selectat niciun client.")
                 return
 
-            customer_id = self.get_client_id_by_name(customer_data[0])  # Assuming the first column contains the customer name
+            customer_id = self.client_list.item(selected_item, "tags")[0]
             customer_name = customer_data[0]  # Assuming the first column contains the customer name
+        except Exception as e:
+            messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+            return
 
-            # Fetch the customer's vehicles
-            response = requests.get(f'http://127.0.0.1:5000/vehicles?client_id={customer_id}')
-            vehicles = response.json() if response.status_code == 200 else []
+        from datetime import datetime
+
+        # Prepare offer details; the vehicles and the offer number are filled in by the two requests below
+        offer_details = {
+            "client_id": customer_id,
+            "client_name": customer_name,
+            "offer_number": None,
+            "categories": {},
+            "status": "Ofertă (în așteptare)",
+            "observations": "",
+            "date": datetime.now().strftime("%Y-%m-%d"),  # Set current date in ISO format
+            "vehicles": []
+        }
 
-            # Fetch next offer number from backen
-            try:
-                response = requests.get("http://127.0.0.1:5000/highest_offer_number")
-                if response.status_code == 200:
-                    last_offer = response.json().get("highest_offer_number", "O0")
-                    next_offer_number = f"O{int(last_offer[1:]) + 1}"
-                else:
-                    next_offer_number = "O1"
-            except:
-                next_offer_number = "O1"
-
-            from datetime import datetime
-
-            # Prepare offer details
-            offer_details = {
-                "client_id": customer_id,
-                "client_name": customer_name,
-                "offer_number": next_offer_number,
-                "categories": {},
-                "status": "Ofertă (în așteptare)",
-                "observations": "",
-                "date": datetime.now().strftime("%Y-%m-%d"),  # Set current date in ISO format
-                "vehicles": vehicles
-            }
+        def on_vehicles_loaded(response):
+            if response.status_code == 200:
+                offer_details["vehicles"] = response.json()
+            finish()
 
+        def on_offer_number_allocated(response):
+            if response.status_code != 200:
+                fail(f"Nu s-a putut aloca numărul ofertei:\n{response.text}")
+                return
+            offer_details["offer_number"] = response.json()["offer_number"]
+            finish()
+
+        def on_error(e):
+            fail(f"A apărut o eroare: {e}")
+
+        def fail(message):
+            for handle in self.new_offer_loads:
+                handle.cancel()
+            self.new_offer_loads = []
+            messagebox.showerror("Eroare", message)
+
+        def finish():
+            self.new_offer_loads.pop()
+            if self.new_offer_loads:
+                return  # The other request is still running
             # Open the new offer window with prefilled customer details
             open_add_offer_window(self.root, offer_details)
-        except Exception as e:
-            messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+
+        # Fetch the customer's vehicles and allocate the next offer number on the backend
+        # (race-free across workstations) side by side
+        self.new_offer_loads = [
+            api.get(self.root, f'/vehicles?client_id={customer_id}', on_success=on_vehicles_loaded, on_error=on_error),
+            api.post(self.root, "/next_offer_number", on_success=on_offer_number_allocated, on_error=on_error),
+        ]
 
     def on_vehicle_right_click(self, event):
         """Show context menu for vehicles when right-clicking."""
@@ -1393,11 +1448,10 @@ class DashboardApp:
         try:
             # Decide how to call the inverse
             method = action['method'].upper()
-            url = f"http://127.0.0.1:5000{action['endpoint']}"
             if method == 'GET':
-                requests.get(url, params=action.get('params'))
+                api_client.get(action['endpoint'], params=action.get('params'))
             else:
-                requests.request(method, url, json=action.get('payload'), params=action.get('params'))
+                api_client.request(method, action['endpoint'], json=action.get('payload'), params=action.get('params'))
             messagebox.showinfo("Undo", "Last action undone.")
         except Exception as e:
             logging.error(f"Undo failed: {e}")
@@ -1410,7 +1464,7 @@ class DashboardApp:
             return
 
         client_name = self.client_list.item(selected, "values")[0]
-        client_id = self.get_client_id_by_name(client_name)
+        client_id = self.selected_client_id()
         if not client_id:
             messagebox.showerror("Eroare", "Nu s-a putut găsi ID-ul clientului.")
             return
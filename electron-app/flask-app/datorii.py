@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests  # Add missing import for requests
+from background_api import api
 
 class DebtsReportApp:
     def __init__(self, root):
@@ -12,10 +12,11 @@ class DebtsReportApp:
         # Center the window on the screen
         self.center_window()
 
-        self.create_widgets()
         self.current_page = 1
         self.page_size = 10
         self.total_pages = 1
+        self.debts_request = None  # In-flight /debts request; a newer page replaces it
+        self.create_widgets()
         self.fetch_debts()
 
     def center_window(self):
@@ -68,14 +69,23 @@ class DebtsReportApp:
         self.next_button.pack(side=tk.LEFT, padx=5)  # Corrected "padx5" to "padx=5"
 
     def fetch_debts(self):
+        if self.debts_request:
+            self.debts_request.cancel()
+        params = {'page': self.current_page, 'per_page': self.page_size}
+        self.debts_request = api.get(self.root, '/debts', params=params,
+                                     on_success=self.on_debts_loaded,
+                                     on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+
+    def on_debts_loaded(self, response):
+        self.debts_request = None
         try:
-            response = requests.get('http://127.0.0.1:5000/debts')
             if response.status_code == 200:
                 data = response.json()
-                self.total_pages = 1  # no pagination
-                self.current_page = 1
+                total_results = int(response.headers.get('X-Total-Count', len(data)))
+                self.total_pages = max((total_results + self.page_size - 1) // self.page_size, 1)
                 self.update_debts_table(data)
-                self.pagination_frame.pack_forget()  # hide the frame
+                self.prev_button.config(state=tk.NORMAL if self.current_page > 1 else tk.DISABLED)
+                self.next_button.config(state=tk.NORMAL if self.current_page < self.total_pages else tk.DISABLED)
             else:
                 messagebox.showerror("Eroare", "Nu s-au putut încărca datoriile.")
         except Exception as e:
@@ -11,9 +11,7 @@ else:
 keyfile = os.path.join(base_path, 'driveuploader-456317-fdcff069c6d3.json')
 os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = keyfile
 
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from services import registry
 
 # Path to your downloaded JSON key file (relative path)
 SERVICE_ACCOUNT_FILE = keyfile
@@ -24,15 +22,27 @@ FOLDER_ID = '1bokrCeqwgYY7qhiMFcNV4jiwdUSp_Foi'
 # Define the required scopes
 SCOPES = ['https://www.googleapis.com/auth/drive']
 
-# Authenticate using the service account
-credentials = service_account.Credentials.from_service_account_file(
-    SERVICE_ACCOUNT_FILE, scopes=SCOPES
-)
+def build_drive_service():
+    """Authenticate with the service account and build the Drive v3 client.
 
-drive_service = build('drive', 'v3', credentials=credentials)
+    The google client libraries are imported here, not at module level: they
+    are slow to import and only needed once a file is actually uploaded.
+    """
+    from google.oauth2 import service_account
+    from googleapiclient.discovery import build
+
+    credentials = service_account.Credentials.from_service_account_file(
+        SERVICE_ACCOUNT_FILE, scopes=SCOPES
+    )
+    return build('drive', 'v3', credentials=credentials)
+
+registry.register('drive', build_drive_service)
 
 def upload_file_to_drive(file_path):
     """Uploads a file to Google Drive and returns the public link."""
+    from googleapiclient.http import MediaFileUpload
+
+    drive_service = registry.get('drive')
     file_name = os.path.basename(file_path)
 
     file_metadata = {
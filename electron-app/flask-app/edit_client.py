@@ -2,7 +2,7 @@ import sys  # Add this import to handle command-line arguments
 import re
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
+from background_api import api
 from ttkwidgets.autocomplete import AutocompleteCombobox
 
 class EditClientApp:
@@ -26,6 +26,9 @@ class EditClientApp:
         self.style.configure("TEntry", font=("Segoe UI", 11))
         self.style.configure("TFrame", background="#d3d3d3")
 
+        self.localitati_request = None  # In-flight /get_localitati request; a newer județ replaces it
+        self.save_request = None  # In-flight PATCH; blocks double submits
+
         # Set up our close-confirmation first
         self.setup_close_protocol()
         # Now we can safely build all widgets that refer to self._on_close
@@ -89,84 +92,110 @@ class EditClientApp:
         self.cancel_button.pack(side="left", padx=10)
 
     def fetch_client_details(self):
-        """Fetch client details from the server and populate the fields."""
+        """Fetch client details and the counties in the background and populate the fields."""
         print(f"[DEBUG] Fetching client details for client_id: {self.client_id}")  # Debug statement
-        try:
-            response = requests.get(f'http://127.0.0.1:5000/clients/{self.client_id}')
-            print(f"[DEBUG] Response status code: {response.status_code}")  # Debug statement
+        api.get(self.root, f'/clients/{self.client_id}', on_success=self.on_client_details_loaded,
+                on_error=self.on_load_error)
+        # Load counties → populate Județ combobox
+        api.get(self.root, '/get_judete', on_success=self.on_judete_loaded,
+                on_error=lambda e: print(f"[ERROR] Exception occurred while fetching counties: {e}"))
+        # When Județ changes, fetch Localități
+        for seq in ("<<ComboboxSelected>>", "<FocusOut>", "<Return>"):
+            self.judet_cb.bind(seq, self.on_judet_change)
+
+    def on_load_error(self, e):
+        print(f"[ERROR] Exception occurred while fetching client details: {e}")  # Debug statement
+        messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+
+    def on_client_details_loaded(self, response):
+        print(f"[DEBUG] Response status code: {response.status_code}")  # Debug statement
+        if response.status_code != 200:
+            print(f"[ERROR] Failed to fetch client details. Status code: {response.status_code}")  # Debug statement
+            messagebox.showerror("Eroare", "Nu s-au putut încărca detaliile clientului.")
+            return
+        client_data = response.json()
+        print(f"[DEBUG] Client data fetched: {client_data}")  # Debug statement
+
+        # Name
+        self.name_entry.insert(0, client_data.get("nume", ""))
+
+        # Telefon: strip out anything except digits
+        raw_tel = client_data.get("telefon", "")
+        clean_tel = re.sub(r"\D+", "", raw_tel)
+        self.phone_entry.insert(0, clean_tel)
+
+        self.address_entry.insert(0, client_data.get("adresa", ""))
+        self.cnp_entry.insert(0, client_data.get("cnp", ""))
+
+        # Preselect the stored Județ & trigger Localități load
+        stored_j = client_data.get("judet") or ""
+        self.judet_cb.set(stored_j)
+        self.on_judet_change()
+
+        # Preselect the stored Localitate
+        self.localitate_cb.set(client_data.get("localitate", ""))
+
+    def on_judete_loaded(self, response):
+        if response.status_code == 200:
+            self.judet_cb.set_completion_list(response.json())
+
+    def on_judet_change(self, evt=None):
+        sel = self.judet_cb.get()
+        if self.localitati_request:
+            self.localitati_request.cancel()
+        if not sel:
+            return
+
+        def on_success(response):
+            self.localitati_request = None
             if response.status_code == 200:
-                client_data = response.json()
-                print(f"[DEBUG] Client data fetched: {client_data}")  # Debug statement
-
-                # Name
-                self.name_entry.insert(0, client_data.get("nume", ""))
-
-                # Telefon: strip out anything except digits
-                raw_tel = client_data.get("telefon", "")
-                clean_tel = re.sub(r"\D+", "", raw_tel)
-                self.phone_entry.insert(0, clean_tel)
-
-                self.address_entry.insert(0, client_data.get("adresa", ""))
-                self.cnp_entry.insert(0, client_data.get("cnp", ""))
-
-                # Load counties → populate Județ combobox
-                judete = requests.get('http://127.0.0.1:5000/get_judete').json()
-                self.judet_cb.set_completion_list(judete)
-
-                # When Județ changes, fetch Localități
-                def on_judet_change(evt=None):
-                    sel = self.judet_cb.get()
-                    locs = requests.get(f'http://127.0.0.1:5000/get_localitati/{sel}').json()
-                    self.localitate_cb.set_completion_list(locs)
-                for seq in ("<<ComboboxSelected>>", "<FocusOut>", "<Return>"):
-                    self.judet_cb.bind(seq, on_judet_change)
-
-                # Preselect the stored Județ & trigger Localități load
-                stored_j = client_data.get("judet") or ""
-                self.judet_cb.set(stored_j)
-                on_judet_change()
-
-                # Preselect the stored Localitate
-                self.localitate_cb.set(client_data.get("localitate", ""))
-            else:
-                print(f"[ERROR] Failed to fetch client details. Status code: {response.status_code}")  # Debug statement
-                messagebox.showerror("Eroare", "Nu s-au putut încărca detaliile clientului.")
-        except Exception as e:
-            print(f"[ERROR] Exception occurred while fetching client details: {e}")  # Debug statement
-            messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+                self.localitate_cb.set_completion_list(response.json())
+
+        self.localitati_request = api.get(
+            self.root, f'/get_localitati/{sel}', on_success=on_success,
+            on_error=lambda e: print(f"[ERROR] Exception occurred while fetching localities: {e}"))
 
     def save_client_details(self):
         """Save the updated client details to the server."""
+        if self.save_request is not None:
+            return  # Still saving the previous click
         print("[DEBUG] Saving client details")  # Debug statement
-        try:
-            updated_data = {
-                "nume": self.name_entry.get(),
-                "telefon": self.phone_entry.get(),
-                "adresa": self.address_entry.get(),
-                "cnp": self.cnp_entry.get(),
-                "localitate": self.localitate_cb.get(),
-                "judet": self.judet_cb.get()
-            }
-            print(f"[DEBUG] Updated data to save: {updated_data}")  # Debug statement
-            response = requests.patch(f'http://127.0.0.1:5000/clients/{self.client_id}', json=updated_data)
-            print(f"[DEBUG] Response status code: {response.status_code}")  # Debug statement
-            if response.status_code == 200:
-                print("[DEBUG] Client details updated successfully")  # Debug statement
-                messagebox.showinfo("Succes", "Detaliile clientului au fost actualizate cu succes!")
-                
-                # Refresh the parent window if it has a `refresh_client_list` method
-                if hasattr(self.root.master, 'refresh_client_list'):
-                    print("[DEBUG] Refreshing client list in parent window")  # Debug statement
-                    self.root.master.refresh_client_list()
-                
-                self.root.destroy()
-            else:
-                print(f"[ERROR] Failed to update client details. Status code: {response.status_code}")  # Debug statement
-                messagebox.showerror("Eroare", "Actualizarea detaliilor clientului a eșuat.")
-        except Exception as e:
+        updated_data = {
+            "nume": self.name_entry.get(),
+            "telefon": self.phone_entry.get(),
+            "adresa": self.address_entry.get(),
+            "cnp": self.cnp_entry.get(),
+            "localitate": self.localitate_cb.get(),
+            "judet": self.judet_cb.get()
+        }
+        print(f"[DEBUG] Updated data to save: {updated_data}")  # Debug statement
+
+        def on_error(e):
+            self.save_request = None
             print(f"[ERROR] Exception occurred while saving client details: {e}")  # Debug statement
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
+        self.save_request = api.patch(self.root, f'/clients/{self.client_id}', json=updated_data,
+                                      on_success=self.on_client_saved, on_error=on_error)
+
+    def on_client_saved(self, response):
+        self.save_request = None
+        print(f"[DEBUG] Response status code: {response.status_code}")  # Debug statement
+        if response.status_code in (200, 202):
+            print("[DEBUG] Client details updated successfully")  # Debug statement
+            messagebox.showinfo("Succes", response.json()["message"] if response.status_code == 202
+                                else "Detaliile clientului au fost actualizate cu succes!")
+
+            # Refresh the parent window if it has a `refresh_client_list` method
+            if hasattr(self.root.master, 'refresh_client_list'):
+                print("[DEBUG] Refreshing client list in parent window")  # Debug statement
+                self.root.master.refresh_client_list()
+
+            self.root.destroy()
+        else:
+            print(f"[ERROR] Failed to update client details. Status code: {response.status_code}")  # Debug statement
+            messagebox.showerror("Eroare", "Actualizarea detaliilor clientului a eșuat.")
+
 def open_edit_client_window(root, client_id):
     """Open the Edit Client window."""
     print(f"[DEBUG] Opening Edit Client window for client_id: {client_id}")  # Debug statement
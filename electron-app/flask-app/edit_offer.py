@@ -1,21 +1,29 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import requests
+from background_api import api
 import tksheet
 from tkcalendar import DateEntry
 from pdf import PDFGenerator  # Import the PDFGenerator class
 
 def open_edit_offer_window(root, offer_number):
-    """Open the Edit Offer window."""
+    """Open the Edit Offer window once the offer details have loaded (in the background)."""
     print(f"[DEBUG] Opening Edit Offer window for offer_number: {offer_number}")
-    try:
-        # Call the updated Supabase RPC function to get offer details
-        response = requests.get(
-            f"http://127.0.0.1:5000/rpc/get_offer_details",
-            params={"p_offer_number": offer_number}
-        )
-        print(f"[DEBUG] Response status code: {response.status_code}")
+    if root is None:
+        print("[ERROR] Root is None. Cannot create Toplevel window.")
+        return
+
+    def on_error(e):
+        print(f"[ERROR] Exception occurred while opening Edit Offer window: {e}")
+        messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+
+    # Call the updated Supabase RPC function to get offer details
+    api.get(root, "/rpc/get_offer_details", params={"p_offer_number": offer_number},
+            on_success=lambda response: show_edit_offer_window(root, offer_number, response),
+            on_error=on_error)
 
+def show_edit_offer_window(root, offer_number, response):
+    print(f"[DEBUG] Response status code: {response.status_code}")
+    try:
         if response.status_code == 404:
             messagebox.showerror("Eroare", f"Oferta cu numărul {offer_number} nu a fost găsită.")
             return
@@ -29,11 +37,6 @@ def open_edit_offer_window(root, offer_number):
                 messagebox.showerror("Eroare", f"Nu s-au găsit detalii pentru oferta cu numărul {offer_number}.")
                 return
 
-            # Create the Toplevel window
-            if root is None:
-                print("[ERROR] Root is None. Cannot create Toplevel window.")
-                return
-
             window = tk.Toplevel(root)
             print(f"[DEBUG] Toplevel window created: {window}")
             window.title(f"Editează Ofertă {offer_number}")
@@ -66,31 +69,34 @@ def add_edit_offer_content(frame, window, offer_details):
         vehicle_dropdown = ttk.Combobox(frame, state="readonly")
         vehicle_dropdown.vehicle_ids = {}
 
-        def fetch_vehicle_details(vehicle_id):
-            try:
-                response = requests.get(f'http://127.0.0.1:5000/vehicles?id=eq.{vehicle_id}')
-                vehicle_data = response.json()
-                if response.status_code == 200 and vehicle_data:
+        def fetch_vehicle_details(vehicle_id, on_loaded):
+            """Call on_loaded(label) with the vehicle's "marca model (numar)" once it has loaded."""
+            def on_success(response):
+                vehicle_data = response.json() if response.status_code == 200 else None
+                if vehicle_data:
                     vehicle = vehicle_data[0]
-                    return f"{vehicle['marca']} {vehicle['model']} ({vehicle['numar_inmatriculare']})"
+                    on_loaded(f"{vehicle['marca']} {vehicle['model']} ({vehicle['numar_inmatriculare']})")
                 else:
-                    return "Unknown Vehicle"
-            except Exception as e:
+                    on_loaded("Unknown Vehicle")
+
+            def on_error(e):
                 messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
-                return "Unknown Vehicle"
+                on_loaded("Unknown Vehicle")
+
+            api.get(window, f'/vehicles?id=eq.{vehicle_id}', on_success=on_success, on_error=on_error)
 
         def refresh_vehicle_dropdown(client_id):
-            try:
-                response = requests.get(f'http://127.0.0.1:5000/vehicles?client_id={client_id}')
-                vehicles = response.json()
+            def on_success(response):
+                vehicles = response.json() if response.status_code == 200 else None
                 if vehicles is not None:
                     vehicle_dropdown['values'] = [f"{v['marca']} {v['model']} ({v['numar_inmatriculare']})" for v in vehicles]
                     vehicle_dropdown.vehicle_ids = {f"{v['marca']} {v['model']} ({v['numar_inmatriculare']})": v['id'] for v in vehicles}
                 else:
                     vehicle_dropdown['values'] = []
                     vehicle_dropdown.vehicle_ids = {}
-            except Exception as e:
-                messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+
+            api.get(window, f'/vehicles?client_id={client_id}', on_success=on_success,
+                    on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
 
         def open_category_window(category, prefilled_data=None):
             try:
@@ -105,14 +111,23 @@ def add_edit_offer_content(frame, window, offer_details):
         print(f"[ERROR] Exception occurred while adding offer content: {e}")
         messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
-def submit_offer(offer_details):
-    """Submit the offer details to the server."""
-    try:
-        response = requests.post("http://127.0.0.1:5000/add_offer", json=offer_details)
+def submit_offer(owner, offer_details, on_saved, on_error=None):
+    """Submit the offer details in the background; on_saved(offer) runs with the server's answer.
+
+    on_error(exception) gets connection errors and rejected offers (the
+    default shows them in a message box).
+    """
+    def report(e):
+        print(f"[ERROR] {e}")
+        if on_error is not None:
+            on_error(e)
+        else:
+            messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+
+    def on_success(response):
         if response.status_code == 200:
-            return response.json()
+            on_saved(response.json())
         else:
-            raise Exception(f"Failed to submit offer: {response.status_code}")
-    except Exception as e:
-        print(f"[ERROR] {e}")
-        raise
\ No newline at end of file
+            report(Exception(f"Failed to submit offer: {response.status_code}"))
+
+    return api.post(owner, "/add_offer", json=offer_details, on_success=on_success, on_error=report)
\ No newline at end of file
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
+from background_api import api
 
 class EditOrderApp:
     def __init__(self, root, order_number):
@@ -16,6 +16,7 @@ class EditOrderApp:
         y = (self.root.winfo_screenheight() - self.root.winfo_reqheight()) // 2
         self.root.geometry(f"+{x}+{y}")
 
+        self.save_request = None  # In-flight PUT; blocks double submits
         self.create_widgets()
         self.fetch_order_details()
 
@@ -74,8 +75,11 @@ class EditOrderApp:
         self.generate_pdf_button.grid(row=9, column=1, pady=10)
 
     def fetch_order_details(self):
+        api.get(self.root, f'/orders/{self.order_number}', on_success=self.on_order_loaded,
+                on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+
+    def on_order_loaded(self, response):
         try:
-            response = requests.get(f'http://127.0.0.1:5000/orders/{self.order_number}')
             if response.status_code == 200:
                 order = response.json()
                 self.client_label.config(text=order['client_name'])
@@ -105,6 +109,8 @@ class EditOrderApp:
             self.products_tree.insert('', 'end', values=product)
 
     def save_order(self):
+        if self.save_request is not None:
+            return  # Still saving the previous click
         observations = self.observations_text.get("1.0", tk.END).strip()
         status = self.status_var.get()
         amount_paid = self.amount_paid_entry.get()
@@ -113,20 +119,24 @@ class EditOrderApp:
             messagebox.showerror("Eroare", "Toate câmpurile sunt obligatorii!")
             return
 
-        try:
-            response = requests.put(f'http://127.0.0.1:5000/orders/{self.order_number}', json={
-                'observations': observations,
-                'status': status,
-                'amount_paid': amount_paid
-            })
-            if response.status_code == 200:
-                messagebox.showinfo("Succes", "Detaliile comenzii au fost actualizate cu succes.")
-                self.root.destroy()
-            else:
-                messagebox.showerror("Eroare", "Nu s-au putut actualiza detaliile comenzii.")
-        except Exception as e:
+        def on_error(e):
+            self.save_request = None
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
+        self.save_request = api.put(self.root, f'/orders/{self.order_number}', json={
+            'observations': observations,
+            'status': status,
+            'amount_paid': amount_paid
+        }, on_success=self.on_order_saved, on_error=on_error)
+
+    def on_order_saved(self, response):
+        self.save_request = None
+        if response.status_code == 200:
+            messagebox.showinfo("Succes", "Detaliile comenzii au fost actualizate cu succes.")
+            self.root.destroy()
+        else:
+            messagebox.showerror("Eroare", "Nu s-au putut actualiza detaliile comenzii.")
+
     def generate_pdf(self):
         # Implement the logic to generate the PDF
         # ...
@@ -1,7 +1,7 @@
 import sys
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import requests
+from background_api import api
 from drive_upload import upload_file_to_drive  # Ensure this module is available
 
 class EditVehicleApp:
@@ -26,6 +26,7 @@ class EditVehicleApp:
         self.style.configure("TEntry", font=("Segoe UI", 11))
         self.style.configure("TFrame", background="#d3d3d3")
 
+        self.save_request = None  # In-flight PATCH; blocks double submits
         self.create_widgets()
         self.fetch_vehicle_details()
 
@@ -96,43 +97,45 @@ class EditVehicleApp:
     def fetch_vehicle_details(self):
         """Fetch vehicle details from the server and populate the fields."""
         print(f"[DEBUG] Fetching vehicle details for vehicle_id: {self.vehicle_id}")  # Debug statement
-        try:
-            response = requests.get(f'http://127.0.0.1:5000/vehicles/{self.vehicle_id}')
-            print(f"[DEBUG] Response status code: {response.status_code}")  # Debug statement
-            if response.status_code == 200:
-                vehicle_data = response.json()
-                print(f"[DEBUG] Vehicle data fetched: {vehicle_data}")  # Debug statement
-                self.populate_vehicle_fields(vehicle_data)
-            elif response.status_code == 404:
-                print("[ERROR] Vehicle not found. Fetching vehicles for client_id.")  # Debug statement
-                self.fetch_vehicles_for_client()
-            else:
-                print(f"[ERROR] Failed to fetch vehicle details. Status code: {response.status_code}")  # Debug statement
-                messagebox.showerror("Eroare", "Nu s-au putut încărca detaliile vehiculului.")
-        except Exception as e:
-            print(f"[ERROR] Exception occurred while fetching vehicle details: {e}")  # Debug statement
-            messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+        api.get(self.root, f'/vehicles/{self.vehicle_id}', on_success=self.on_vehicle_loaded,
+                on_error=lambda e: self.on_load_error("vehicle details", e))
+
+    def on_load_error(self, what, e):
+        print(f"[ERROR] Exception occurred while fetching {what}: {e}")  # Debug statement
+        messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+
+    def on_vehicle_loaded(self, response):
+        print(f"[DEBUG] Response status code: {response.status_code}")  # Debug statement
+        if response.status_code == 200:
+            vehicle_data = response.json()
+            print(f"[DEBUG] Vehicle data fetched: {vehicle_data}")  # Debug statement
+            self.populate_vehicle_fields(vehicle_data)
+        elif response.status_code == 404:
+            print("[ERROR] Vehicle not found. Fetching vehicles for client_id.")  # Debug statement
+            self.fetch_vehicles_for_client()
+        else:
+            print(f"[ERROR] Failed to fetch vehicle details. Status code: {response.status_code}")  # Debug statement
+            messagebox.showerror("Eroare", "Nu s-au putut încărca detaliile vehiculului.")
 
     def fetch_vehicles_for_client(self):
         """Fetch all vehicles for the client and allow the user to select one."""
-        try:
-            client_id = self.vehicle_id  # Assuming vehicle_id is used as client_id in this case
-            response = requests.get(f'http://127.0.0.1:5000/vehicles', params={'client_id': client_id})
-            print(f"[DEBUG] Response status code: {response.status_code}")  # Debug statement
-            if response.status_code == 200:
-                vehicles = response.json()
-                print(f"[DEBUG] Retrieved vehicles: {vehicles}")  # Debug statement
-                if vehicles:
-                    self.show_vehicle_selection_dialog(vehicles)
-                else:
-                    messagebox.showerror("Eroare", "Nu există vehicule asociate acestui client.")
-                    self.root.destroy()
+        client_id = self.vehicle_id  # Assuming vehicle_id is used as client_id in this case
+        api.get(self.root, '/vehicles', params={'client_id': client_id}, on_success=self.on_client_vehicles_loaded,
+                on_error=lambda e: self.on_load_error("vehicles", e))
+
+    def on_client_vehicles_loaded(self, response):
+        print(f"[DEBUG] Response status code: {response.status_code}")  # Debug statement
+        if response.status_code == 200:
+            vehicles = response.json()
+            print(f"[DEBUG] Retrieved vehicles: {vehicles}")  # Debug statement
+            if vehicles:
+                self.show_vehicle_selection_dialog(vehicles)
             else:
-                print(f"[ERROR] Failed to fetch vehicles. Status code: {response.status_code}")  # Debug statement
-                messagebox.showerror("Eroare", "Nu s-au putut încărca vehiculele clientului.")
-        except Exception as e:
-            print(f"[ERROR] Exception occurred while fetching vehicles: {e}")  # Debug statement
-            messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+                messagebox.showerror("Eroare", "Nu există vehicule asociate acestui client.")
+                self.root.destroy()
+        else:
+            print(f"[ERROR] Failed to fetch vehicles. Status code: {response.status_code}")  # Debug statement
+            messagebox.showerror("Eroare", "Nu s-au putut încărca vehiculele clientului.")
 
     def show_vehicle_selection_dialog(self, vehicles):
         """Show a dialog to select a vehicle from the list."""
@@ -182,43 +185,48 @@ class EditVehicleApp:
 
     def save_vehicle_details(self):
         """Save the updated vehicle details to the server."""
+        if self.save_request is not None:
+            return  # Still saving the previous click
         print("[DEBUG] Saving vehicle details")  # Debug statement
-        try:
-            updated_data = {
-                "marca": self.brand_entry.get(),
-                "model": self.model_entry.get(),
-                "an": self.year_entry.get(),
-                "vin": self.vin_entry.get(),
-                "numar_inmatriculare": self.registration_entry.get()
-            }
-            # Only add image_url if it was updated
-            if self.image_url:
-                updated_data["image_url"] = self.image_url
-
-            print(f"[DEBUG] Updated data to save: {updated_data}")  # Debug statement
-
-            # Send the PATCH request to update the vehicle details
-            response = requests.patch(f'http://127.0.0.1:5000/vehicles/{self.vehicle_id}', json=updated_data)
-            print(f"[DEBUG] Response status code: {response.status_code}")  # Debug statement
-
-            if response.status_code == 200:
-                print("[DEBUG] Vehicle details updated successfully")  # Debug statement
-                messagebox.showinfo("Succes", "Detaliile vehiculului au fost actualizate cu succes!")
-
-                # Refresh the parent window if it has a `refresh_client_vehicles` method
-                if hasattr(self.root.master, 'refresh_client_vehicles'):
-                    print("[DEBUG] Refreshing vehicle list in parent window")  # Debug statement
-                    client_name = self.root.master.client_list.item(self.root.master.client_list.selection(), "values")[0]
-                    self.root.master.refresh_client_vehicles(client_name)
-
-                self.root.destroy()
-            else:
-                print(f"[ERROR] Failed to update vehicle details. Status code: {response.status_code}")  # Debug statement
-                messagebox.showerror("Eroare", "Actualizarea detaliilor vehiculului a eșuat.")
-        except Exception as e:
+        updated_data = {
+            "marca": self.brand_entry.get(),
+            "model": self.model_entry.get(),
+            "an": self.year_entry.get(),
+            "vin": self.vin_entry.get(),
+            "numar_inmatriculare": self.registration_entry.get()
+        }
+        # Only add image_url if it was updated
+        if self.image_url:
+            updated_data["image_url"] = self.image_url
+
+        print(f"[DEBUG] Updated data to save: {updated_data}")  # Debug statement
+
+        def on_error(e):
+            self.save_request = None
             print(f"[ERROR] Exception occurred while saving vehicle details: {e}")  # Debug statement
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
+        # Send the PATCH request to update the vehicle details
+        self.save_request = api.patch(self.root, f'/vehicles/{self.vehicle_id}', json=updated_data,
+                                      on_success=self.on_vehicle_saved, on_error=on_error)
+
+    def on_vehicle_saved(self, response):
+        self.save_request = None
+        print(f"[DEBUG] Response status code: {response.status_code}")  # Debug statement
+        if response.status_code == 200:
+            print("[DEBUG] Vehicle details updated successfully")  # Debug statement
+            messagebox.showinfo("Succes", "Detaliile vehiculului au fost actualizate cu succes!")
+
+            # Refresh the parent window if it has a `refresh_client_vehicles` method
+            if hasattr(self.root.master, 'refresh_client_vehicles'):
+                print("[DEBUG] Refreshing vehicle list in parent window")  # Debug statement
+                self.root.master.refresh_client_vehicles()
+
+            self.root.destroy()
+        else:
+            print(f"[ERROR] Failed to update vehicle details. Status code: {response.status_code}")  # Debug statement
+            messagebox.showerror("Eroare", "Actualizarea detaliilor vehiculului a eșuat.")
+
 def open_edit_vehicle_window(root, vehicle_id):
     """Open the Edit Vehicle window."""
     print(f"[DEBUG] Opening Edit Vehicle window for vehicle_id: {vehicle_id}")  # Debug statement
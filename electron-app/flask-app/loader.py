@@ -1,13 +1,20 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
-import time
 import os
 
 class LoaderApp:
-    def __init__(self, root, on_complete):
+    """Branding screen shown until start-up (startup.Startup) is done.
+
+    The progress bar follows the finished start-up steps and the label names
+    the step still running; without a Startup it closes right away.
+    """
+    POLL_MS = 50
+
+    def __init__(self, root, on_complete, startup=None):
         self.root = root
         self.on_complete = on_complete
+        self.startup = startup
         self.root.title("Loading...")
         self.root.geometry("1200x800")  # Set the loader window size to match the dashboard window size
         self.root.configure(bg="#d3d3d3")
@@ -32,6 +39,9 @@ class LoaderApp:
         self.progress = ttk.Progressbar(self.root, orient="horizontal", length=400, mode="determinate")
         self.progress.pack(pady=20)
 
+        self.status_label = ttk.Label(self.root, text="", font=("Segoe UI", 10))
+        self.status_label.pack()
+
     def center_window(self):
         self.root.update_idletasks()  # Ensure correct geometry calculation
         width = self.root.winfo_width()
@@ -46,17 +56,30 @@ class LoaderApp:
         self.increment_progress()
 
     def increment_progress(self):
-        if self.progress["value"] < 100:
-            self.progress["value"] += 1
-            self.root.after(40, self.increment_progress)  # Increment every 40ms for a total of 4 seconds
-        else:
-            self.root.after(500, self.finish_loading)  # Call a method to close the window
+        if self.startup is None:
+            self.progress["value"] = 100
+            self.root.after(0, self.finish_loading)
+            return
+        fraction, running = self.startup.progress()
+        self.progress["value"] = round(fraction * 100)
+        self.status_label.config(text=f"{running}..." if running else "")
+        if not self.startup.is_done():
+            self.root.after(self.POLL_MS, self.increment_progress)
+            return
+        print(f"[DEBUG] Start-up steps: {self.startup.timings()}")
+        failures = self.startup.failures()
+        if failures:
+            details = "\n".join(f"{label}: {error}" for label, error in failures)
+            messagebox.showerror("Eroare", f"Aplicația nu a putut porni:\n\n{details}")
+            self.root.destroy()
+            return
+        self.finish_loading()
 
     def finish_loading(self):
         self.root.destroy()  # Close the loader window
         self.on_complete()  # Call the main application function
 
-def show_loader(on_complete):
+def show_loader(on_complete, startup=None):
     root = tk.Tk()
-    app = LoaderApp(root, on_complete)
+    app = LoaderApp(root, on_complete, startup)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,434 @@
+# filepath: flask-app/local_db.py
+# SQLite stand-in for the Supabase tables and the Postgres RPCs in sql/.
+# Used when "local_db_path" is set in config.json (development) and by local_db_test.py.
+import json
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+SCHEMA = """
+create table if not exists clients (
+    id          text primary key,
+    nume        text,
+    telefon     text,
+    adresa      text,
+    localitate  text,
+    judet       text,
+    cnp         text,
+    email       text
+);
+
+create table if not exists vehicles (
+    id                  text primary key,
+    client_id           text,
+    marca               text,
+    model               text,
+    an                  text,
+    vin                 text,
+    numar_inmatriculare text,
+    image_url           text
+);
+
+create table if not exists offers (
+    id           integer primary key autoincrement,
+    client_id    text,
+    vehicle_id   text,
+    offer_number text unique,
+    date         text,
+    status       text,
+    observations text
+);
+
+create table if not exists offer_products (
+    id               integer primary key autoincrement,
+    offer_number     text,
+    categorie        text,
+    produs           text,
+    brand            text,
+    cod_produs       text,
+    cantitate        integer,
+    pret_unitar      real,
+    pret_total       real,
+    discount         real,
+    pret_cu_discount real
+);
+
+create table if not exists orders (
+    id                  integer primary key autoincrement,
+    client_id           text,
+    vehicle_id          text,
+    order_number        text,
+    date                text,
+    status              text,
+    plata               text,
+    observations        text,
+    source_offer_number text,
+    source_category     text
+);
+
+create table if not exists order_products (
+    id               integer primary key autoincrement,
+    order_id         integer,
+    produs           text,
+    brand            text,
+    cod_produs       text,
+    cantitate        integer,
+    pret_unitar      real,
+    pret_total       real,
+    discount         real,
+    pret_cu_discount real
+);
+
+create table if not exists payments (
+    id           integer primary key autoincrement,
+    client_id    text,
+    order_id     integer,
+    amount       real,
+    date         text,
+    recorded_by  text,
+    observations text,
+    client_ref   text
+);
+
+create table if not exists return_products (
+    id               integer primary key autoincrement,
+    order_product_id integer,
+    return_qty       integer,
+    unit_price       real,
+    discount_pct     real,
+    total_refund     real,
+    notes            text,
+    client_ref       text
+);
+
+create table if not exists order_balances (
+    order_id   integer primary key,
+    client_id  text,
+    total      real not null default 0,
+    paid       real not null default 0,
+    refunded   real not null default 0,
+    updated_at text not null default current_timestamp
+);
+
+create table if not exists sequences (
+    name  text primary key,
+    value integer not null
+);
+
+create index if not exists orders_date_idx on orders (date);
+create index if not exists orders_client_id_idx on orders (client_id);
+create index if not exists order_products_order_id_idx on order_products (order_id);
+create index if not exists payments_order_id_idx on payments (order_id);
+create index if not exists order_balances_client_id_idx on order_balances (client_id);
+"""
+
+_lock = threading.Lock()
+
+class RPCError(Exception):
+    """Raised by a stand-in RPC; code matches the SQLSTATE raised by the Postgres function."""
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+def connect(path=":memory:"):
+    """Open (and initialise) a local database usable from Flask worker threads."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    _add_client_ref(conn)
+    return conn
+
+def _add_client_ref(conn):
+    # Databases made before sql/ledger_writes.sql lack the client_ref columns
+    for table in ("payments", "return_products"):
+        if "client_ref" not in {row["name"] for row in conn.execute(f"pragma table_info({table})")}:
+            conn.execute(f"alter table {table} add column client_ref text")
+        conn.execute(f"create unique index if not exists {table}_client_ref_idx on {table} (client_ref)")
+    conn.commit()
+
+def _rows(cursor):
+    return [dict(row) for row in cursor.fetchall()]
+
+def sales_report(conn, p_date_from=None, p_date_to=None, p_judet=None):
+    """Mirror of sql/sales_report.sql."""
+    cursor = conn.execute(
+        """
+        select
+            coalesce(c.localitate, 'N/A')          as localitate,
+            coalesce(c.judet, 'N/A')               as judet,
+            count(*)                               as nr_comenzi,
+            round(coalesce(sum(t.total), 0), 2)    as total_vanzari
+        from orders o
+        join clients c on c.id = o.client_id
+        left join (
+            select order_id, sum(pret_cu_discount) as total
+            from order_products
+            group by order_id
+        ) t on t.order_id = o.id
+        where (:p_date_from is null or o.date >= :p_date_from)
+          and (:p_date_to   is null or o.date <= :p_date_to)
+          and (:p_judet     is null or c.judet = :p_judet)
+        group by 1, 2
+        order by 1, 2
+        """,
+        {"p_date_from": p_date_from, "p_date_to": p_date_to, "p_judet": p_judet},
+    )
+    return _rows(cursor)
+
+def order_totals(conn, p_order_ids):
+    """Mirror of sql/order_totals.sql."""
+    cursor = conn.execute(
+        """
+        select
+            o.id                     as order_id,
+            o.client_id              as client_id,
+            coalesce(t.total, 0)     as total,
+            coalesce(p.paid, 0)      as paid,
+            coalesce(r.refunded, 0)  as refunded
+        from orders o
+        left join (
+            select order_id, sum(pret_cu_discount) as total
+            from order_products
+            group by order_id
+        ) t on t.order_id = o.id
+        left join (
+            select order_id, sum(amount) as paid
+            from payments
+            group by order_id
+        ) p on p.order_id = o.id
+        left join (
+            select op.order_id, sum(rp.total_refund) as refunded
+            from return_products rp
+            join order_products op on op.id = rp.order_product_id
+            group by op.order_id
+        ) r on r.order_id = o.id
+        where o.id in (select value from json_each(:p_order_ids))
+        """,
+        {"p_order_ids": json.dumps(list(p_order_ids))},
+    )
+    return _rows(cursor)
+
+def order_balance_apply(conn, p_order_id, p_total=0, p_paid=0, p_refunded=0):
+    """Mirror of order_balance_apply in sql/order_balances.sql."""
+    _apply_balance(conn, p_order_id, p_total, p_paid, p_refunded)
+    conn.commit()
+    return _rows(conn.execute("select * from order_balances where order_id = ?", (p_order_id,)))
+
+def _apply_balance(conn, p_order_id, p_total=0, p_paid=0, p_refunded=0):
+    # order_balance_apply without the commit, for RPCs running it inside their own transaction
+    cursor = conn.execute(
+        """
+        update order_balances
+           set total = total + ?, paid = paid + ?, refunded = refunded + ?,
+               updated_at = current_timestamp
+         where order_id = ?
+        """,
+        (p_total, p_paid, p_refunded, p_order_id),
+    )
+    if cursor.rowcount == 0:
+        for row in order_totals(conn, [p_order_id]):
+            conn.execute(
+                "insert or ignore into order_balances (order_id, client_id, total, paid, refunded) values (?, ?, ?, ?, ?)",
+                (row["order_id"], row["client_id"], row["total"], row["paid"], row["refunded"]),
+            )
+
+def order_balances_get(conn, p_order_ids=None, p_client_id=None):
+    """Mirror of order_balances_get in sql/order_balances.sql."""
+    cursor = conn.execute(
+        """
+        select * from order_balances
+        where (:p_order_ids is null or order_id in (select value from json_each(:p_order_ids)))
+          and (:p_client_id is null or client_id = :p_client_id)
+        """,
+        {
+            "p_order_ids": json.dumps(list(p_order_ids)) if p_order_ids is not None else None,
+            "p_client_id": p_client_id,
+        },
+    )
+    return _rows(cursor)
+
+def order_balances_verify(conn, p_repair=False):
+    """Mirror of order_balances_verify in sql/order_balances.sql."""
+    order_ids = [row["id"] for row in conn.execute("select id from orders")]
+    ledger = {row["order_id"]: row for row in _rows(conn.execute("select * from order_balances"))}
+    drift = []
+    for actual in order_totals(conn, order_ids):
+        stored = ledger.get(actual["order_id"])
+        if stored and all(stored[key] == actual[key] for key in ("total", "paid", "refunded")):
+            continue
+        drift.append({
+            "order_id": actual["order_id"],
+            "client_id": actual["client_id"],
+            "ledger_total": stored["total"] if stored else None,
+            "actual_total": actual["total"],
+            "ledger_paid": stored["paid"] if stored else None,
+            "actual_paid": actual["paid"],
+            "ledger_refunded": stored["refunded"] if stored else None,
+            "actual_refunded": actual["refunded"],
+        })
+    if p_repair:
+        conn.executemany(
+            "insert or replace into order_balances (order_id, client_id, total, paid, refunded) values (?, ?, ?, ?, ?)",
+            [(d["order_id"], d["client_id"], d["actual_total"], d["actual_paid"], d["actual_refunded"]) for d in drift],
+        )
+        conn.commit()
+    return drift
+
+def record_ledger_writes(conn, p_payments=(), p_returns=()):
+    """Mirror of sql/ledger_writes.sql; runs in a single SQLite transaction."""
+    recorded = []
+    with conn:
+        for payment in p_payments:
+            row = conn.execute("select id from payments where client_ref = ?", (payment["client_ref"],)).fetchone()
+            if row is None:
+                cursor = conn.execute(
+                    "insert into payments (client_ref, client_id, order_id, amount, recorded_by, observations, date) "
+                    "values (?, ?, ?, ?, ?, ?, ?)",
+                    (payment["client_ref"], payment.get("client_id"), payment["order_id"], payment["amount"],
+                     payment.get("recorded_by"), payment.get("observations"), payment.get("date")),
+                )
+                order_id = payment["order_id"]
+                _apply_balance(conn, order_id, p_paid=payment["amount"])
+                conn.execute(
+                    """
+                    update orders
+                       set plata = case when (select paid >= total from order_balances where order_id = orders.id)
+                                        then 'Comandată și plătită' else 'Comandată și plătită parțial' end
+                     where id = ? and coalesce(plata, '') not like 'Ridicată%'
+                       and exists (select 1 from order_balances where order_id = orders.id)
+                    """,
+                    (order_id,),
+                )
+                row = {"id": cursor.lastrowid}
+            recorded.append({"ref": payment["client_ref"], "kind": "payment", "row_id": row["id"]})
+        for returned in p_returns:
+            row = conn.execute("select id from return_products where client_ref = ?", (returned["client_ref"],)).fetchone()
+            if row is None:
+                cursor = conn.execute(
+                    "insert into return_products (client_ref, order_product_id, return_qty, unit_price, discount_pct, "
+                    "total_refund, notes) values (?, ?, ?, ?, ?, ?, ?)",
+                    (returned["client_ref"], returned["order_product_id"], returned["return_qty"],
+                     returned.get("unit_price"), returned.get("discount_pct"), returned["total_refund"],
+                     returned.get("notes")),
+                )
+                product = conn.execute("select order_id from order_products where id = ?",
+                                       (returned["order_product_id"],)).fetchone()
+                if product is not None:
+                    _apply_balance(conn, product["order_id"], p_refunded=returned["total_refund"])
+                row = {"id": cursor.lastrowid}
+            recorded.append({"ref": returned["client_ref"], "kind": "return", "row_id": row["id"]})
+    return recorded
+
+def convert_offer_to_order(conn, p_offer_number, p_category, p_order_number=None,
+                           p_status="Comandată și neplătită", p_date=None, p_observations="",
+                           p_amount_paid=0, p_recorded_by="admin"):
+    """Mirror of sql/convert_offer_to_order.sql; runs in a single SQLite transaction."""
+    paid = max(float(p_amount_paid or 0), 0.0)
+    with conn:
+        offer = conn.execute("select * from offers where offer_number = ?", (p_offer_number,)).fetchone()
+        if offer is None:
+            raise RPCError("P0002", "Oferta nu a fost găsită!")
+        if conn.execute("select 1 from orders where source_offer_number = ?", (p_offer_number,)).fetchone():
+            raise RPCError("23505", "Oferta a fost deja transformată în comandă!")
+
+        order_number = p_order_number or f"CMD{int(time.time())}"
+        cursor = conn.execute(
+            """
+            insert into orders (client_id, vehicle_id, date, status, observations,
+                                order_number, source_offer_number, source_category)
+            values (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (offer["client_id"], offer["vehicle_id"], p_date or date.today().isoformat(), p_status,
+             p_observations, order_number, offer["offer_number"], p_category),
+        )
+        order_id = cursor.lastrowid
+
+        cursor = conn.execute(
+            """
+            insert into order_products (order_id, produs, brand, cod_produs, cantitate,
+                                        pret_unitar, pret_total, discount, pret_cu_discount)
+            select ?, produs, brand, cod_produs, cast(cantitate as integer),
+                   pret_unitar, pret_total, coalesce(discount, 0), pret_cu_discount
+            from offer_products
+            where offer_number = ? and categorie = ?
+            """,
+            (order_id, p_offer_number, p_category),
+        )
+        if cursor.rowcount == 0:
+            raise RPCError("P0001", "Nu există produse pentru această categorie!")
+
+        total = conn.execute(
+            "select coalesce(sum(pret_cu_discount), 0) from order_products where order_id = ?", (order_id,)
+        ).fetchone()[0]
+
+        if paid > 0:
+            conn.execute(
+                "insert into payments (client_id, order_id, amount, recorded_by, observations, date) values (?, ?, ?, ?, ?, ?)",
+                (offer["client_id"], order_id, paid, p_recorded_by, p_observations, datetime.utcnow().isoformat()),
+            )
+
+        conn.execute(
+            "insert into order_balances (order_id, client_id, total, paid, refunded) values (?, ?, ?, ?, 0)",
+            (order_id, offer["client_id"], total, paid),
+        )
+
+        note = f"Transformată în comandă {order_number}, categoria aleasă: {p_category}"
+        previous = (offer["observations"] or "").strip()
+        conn.execute(
+            "update offers set status = 'Acceptată', observations = ? where id = ?",
+            (f"{previous}\n{note}" if previous else note, offer["id"]),
+        )
+
+        order = dict(conn.execute("select * from orders where id = ?", (order_id,)).fetchone())
+    return {**order, "total": total, "paid": paid, "balance": total - paid}
+
+def _max_number(conn, table, column, prefix):
+    cursor = conn.execute(
+        f"""
+        select max(cast(substr({column}, ?) as integer))
+        from {table}
+        where {column} glob ? and substr({column}, ?) not glob '*[^0-9]*'
+        """,
+        (len(prefix) + 1, f"{prefix}[0-9]*", len(prefix) + 1),
+    )
+    return cursor.fetchone()[0] or 0
+
+def highest_offer_number(conn):
+    """Mirror of highest_offer_number in sql/document_numbers.sql."""
+    return f"O{_max_number(conn, 'offers', 'offer_number', 'O')}"
+
+def highest_order_number(conn):
+    """Mirror of highest_order_number in sql/document_numbers.sql."""
+    return f"CMD{_max_number(conn, 'orders', 'order_number', 'CMD')}"
+
+def next_offer_number(conn):
+    """Mirror of next_offer_number in sql/document_numbers.sql (a row in `sequences` stands in for the sequence)."""
+    with conn:
+        row = conn.execute("select value from sequences where name = 'offer_number_seq'").fetchone()
+        value = max(row["value"] if row else 0, _max_number(conn, 'offers', 'offer_number', 'O')) + 1
+        conn.execute("insert or replace into sequences (name, value) values ('offer_number_seq', ?)", (value,))
+    return f"O{value}"
+
+# RPC name -> local implementation, same parameter names as the Postgres functions
+RPC_FUNCTIONS = {
+    "sales_report": sales_report,
+    "order_totals": order_totals,
+    "order_balance_apply": order_balance_apply,
+    "order_balances_get": order_balances_get,
+    "order_balances_verify": order_balances_verify,
+    "record_ledger_writes": record_ledger_writes,
+    "convert_offer_to_order": convert_offer_to_order,
+    "highest_offer_number": highest_offer_number,
+    "highest_order_number": highest_order_number,
+    "next_offer_number": next_offer_number,
+}
+
+def call(conn, name, params):
+    """Run a stand-in RPC by name; mirrors supabase_client.rpc(name, params).execute().data."""
+    func = RPC_FUNCTIONS.get(name)
+    if func is None:
+        raise ValueError(f"RPC '{name}' has no local implementation.")
+    with _lock:
+        return func(conn, **params)
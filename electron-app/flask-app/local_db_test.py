@@ -0,0 +1,204 @@
+# filepath: flask-app/local_db_test.py
+# Checks the SQLite stand-ins in local_db.py against the behaviour of the Postgres functions in sql/.
+#   python -m unittest -v local_db_test.py
+import unittest
+import local_db
+
+def seed_sales(conn):
+    conn.executemany("insert into clients (id, nume, localitate, judet) values (?, ?, ?, ?)", [
+        ("c1", "Ana", "Cluj-Napoca", "Cluj"),
+        ("c2", "Bogdan", "Turda", "Cluj"),
+        ("c3", "Cristi", None, None),
+    ])
+    conn.executemany("insert into orders (id, client_id, date) values (?, ?, ?)", [
+        (1, "c1", "2024-01-10"),
+        (2, "c1", "2024-02-15"),
+        (3, "c2", "2024-02-20"),
+        (4, "c3", "2024-03-01"),
+    ])
+    conn.executemany("insert into order_products (order_id, pret_cu_discount) values (?, ?)", [
+        (1, 100.0), (1, 50.555),
+        (2, 200.0),
+        (3, 75.0),
+        # Order 4 has no products
+    ])
+    conn.commit()
+
+class SalesReportTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = local_db.connect()
+        seed_sales(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def report(self, **params):
+        return {(row["localitate"], row["judet"]): row for row in local_db.call(self.conn, "sales_report", params)}
+
+    def test_groups_by_localitate_and_judet(self):
+        report = self.report()
+        self.assertEqual(set(report), {("Cluj-Napoca", "Cluj"), ("Turda", "Cluj"), ("N/A", "N/A")})
+        self.assertEqual(report[("Cluj-Napoca", "Cluj")]["nr_comenzi"], 2)
+        self.assertAlmostEqual(report[("Cluj-Napoca", "Cluj")]["total_vanzari"], 350.56)
+        self.assertEqual(report[("Turda", "Cluj")]["nr_comenzi"], 1)
+
+    def test_order_without_products_counts_with_zero_total(self):
+        row = self.report()[("N/A", "N/A")]
+        self.assertEqual(row["nr_comenzi"], 1)
+        self.assertEqual(row["total_vanzari"], 0)
+
+    def test_date_range_is_inclusive(self):
+        report = self.report(p_date_from="2024-02-15", p_date_to="2024-02-20")
+        self.assertEqual(set(report), {("Cluj-Napoca", "Cluj"), ("Turda", "Cluj")})
+        self.assertEqual(report[("Cluj-Napoca", "Cluj")]["nr_comenzi"], 1)
+        self.assertEqual(report[("Cluj-Napoca", "Cluj")]["total_vanzari"], 200.0)
+
+    def test_judet_filter(self):
+        self.assertEqual(set(self.report(p_judet="Cluj")), {("Cluj-Napoca", "Cluj"), ("Turda", "Cluj")})
+        self.assertEqual(self.report(p_judet="Alba"), {})
+
+    def test_unknown_rpc_is_rejected(self):
+        with self.assertRaises(ValueError):
+            local_db.call(self.conn, "no_such_function", {})
+
+def seed_offer(conn, offer_number="O7"):
+    conn.execute("insert into clients (id, nume) values ('c1', 'Ana')")
+    conn.execute(
+        "insert into offers (client_id, vehicle_id, offer_number, status, observations) values (?, ?, ?, ?, ?)",
+        ("c1", "v1", offer_number, "Ofertă (în așteptare)", "Client fidel"),
+    )
+    conn.executemany(
+        "insert into offer_products (offer_number, categorie, produs, brand, cod_produs, cantitate, "
+        "pret_unitar, pret_total, discount, pret_cu_discount) values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (offer_number, "Vară", "Anvelopă", "Michelin", "M1", 4.0, 500.0, 2000.0, 10.0, 1800.0),
+            (offer_number, "Vară", "Montaj", "-", "S1", 1.0, 200.0, 200.0, None, 200.0),
+            (offer_number, "Iarnă", "Anvelopă", "Nokian", "N1", 4.0, 600.0, 2400.0, 0.0, 2400.0),
+        ],
+    )
+    conn.commit()
+
+class ConvertOfferToOrderTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = local_db.connect()
+        seed_offer(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def convert(self, **params):
+        return local_db.call(self.conn, "convert_offer_to_order", {
+            "p_offer_number": "O7", "p_category": "Vară", "p_order_number": "CMD100",
+            "p_date": "2024-05-01", **params,
+        })
+
+    def count(self, table):
+        return self.conn.execute(f"select count(*) from {table}").fetchone()[0]
+
+    def test_creates_order_line_items_payment_and_ledger_row(self):
+        order = self.convert(p_amount_paid=500, p_observations="Avans")
+        self.assertEqual((order["order_number"], order["client_id"], order["vehicle_id"]), ("CMD100", "c1", "v1"))
+        self.assertEqual((order["source_offer_number"], order["source_category"]), ("O7", "Vară"))
+        self.assertEqual((order["total"], order["paid"], order["balance"]), (2000.0, 500.0, 1500.0))
+
+        products = [dict(row) for row in self.conn.execute(
+            "select produs, cantitate, discount, pret_cu_discount from order_products where order_id = ? order by id",
+            (order["id"],))]
+        self.assertEqual(products, [
+            {"produs": "Anvelopă", "cantitate": 4, "discount": 10.0, "pret_cu_discount": 1800.0},
+            {"produs": "Montaj", "cantitate": 1, "discount": 0, "pret_cu_discount": 200.0},
+        ])
+        payment = self.conn.execute("select order_id, amount, observations from payments").fetchone()
+        self.assertEqual(tuple(payment), (order["id"], 500.0, "Avans"))
+
+        ledger = local_db.call(self.conn, "order_balances_get", {"p_order_ids": [order["id"]]})
+        self.assertEqual([(row["total"], row["paid"], row["refunded"]) for row in ledger], [(2000.0, 500.0, 0)])
+
+        offer = self.conn.execute("select status, observations from offers where offer_number = 'O7'").fetchone()
+        self.assertEqual(offer["status"], "Acceptată")
+        self.assertEqual(offer["observations"], "Client fidel\nTransformată în comandă CMD100, categoria aleasă: Vară")
+
+    def test_no_payment_without_advance(self):
+        self.convert()
+        self.assertEqual(self.count("payments"), 0)
+
+    def test_second_conversion_is_rejected(self):
+        self.convert()
+        with self.assertRaises(local_db.RPCError) as raised:
+            self.convert(p_category="Iarnă", p_order_number="CMD101")
+        self.assertEqual(raised.exception.code, "23505")
+        self.assertEqual((self.count("orders"), self.count("order_products"), self.count("order_balances")), (1, 2, 1))
+
+    def test_unknown_offer(self):
+        with self.assertRaises(local_db.RPCError) as raised:
+            self.convert(p_offer_number="O404")
+        self.assertEqual(raised.exception.code, "P0002")
+
+    def test_empty_category_rolls_back_everything(self):
+        with self.assertRaises(local_db.RPCError) as raised:
+            self.convert(p_category="Toate", p_amount_paid=100)
+        self.assertEqual(raised.exception.code, "P0001")
+        self.assertEqual((self.count("orders"), self.count("payments"), self.count("order_balances")), (0, 0, 0))
+        status = self.conn.execute("select status from offers where offer_number = 'O7'").fetchone()[0]
+        self.assertEqual(status, "Ofertă (în așteptare)")
+
+class OfferNumberTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = local_db.connect()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def next_number(self):
+        return local_db.call(self.conn, "next_offer_number", {})
+
+    def test_numbers_increase_past_hand_entered_ones(self):
+        self.assertEqual(self.next_number(), "O1")
+        self.conn.execute("insert into offers (offer_number) values ('O1'), ('O9'), ('Oferta-veche')")
+        self.conn.commit()
+        self.assertEqual(self.next_number(), "O10")
+        self.assertEqual(self.next_number(), "O11")
+        self.assertEqual(local_db.call(self.conn, "highest_offer_number", {}), "O9")
+
+    def test_highest_order_number_ignores_non_numeric(self):
+        self.conn.execute("insert into orders (order_number) values ('CMD5'), ('CMD12'), ('CMDX')")
+        self.conn.commit()
+        self.assertEqual(local_db.call(self.conn, "highest_order_number", {}), "CMD12")
+
+class OrderBalancesTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = local_db.connect()
+        self.conn.execute("insert into orders (id, client_id) values (1, 'c1')")
+        self.conn.executemany("insert into order_products (id, order_id, pret_cu_discount) values (?, 1, ?)",
+                              [(10, 300.0), (11, 100.0)])
+        self.conn.execute("insert into payments (order_id, amount) values (1, 50.0)")
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def apply(self, **deltas):
+        (row,) = local_db.call(self.conn, "order_balance_apply", {"p_order_id": 1, **deltas})
+        return row["total"], row["paid"], row["refunded"]
+
+    def test_first_apply_seeds_from_raw_tables(self):
+        # The raw tables already hold the write being recorded, so the delta is not added on top
+        self.assertEqual(self.apply(p_paid=50.0), (400.0, 50.0, 0))
+
+    def test_later_applies_add_deltas(self):
+        self.apply()
+        self.assertEqual(self.apply(p_paid=25.0, p_refunded=10.0), (400.0, 75.0, 10.0))
+        self.assertEqual(self.apply(p_total=-100.0), (300.0, 75.0, 10.0))
+
+    def test_verify_reports_and_repairs_drift(self):
+        self.apply()
+        self.conn.execute("insert into payments (order_id, amount) values (1, 30.0)")  # Not recorded in the ledger
+        self.conn.commit()
+        (drift,) = local_db.call(self.conn, "order_balances_verify", {})
+        self.assertEqual((drift["ledger_paid"], drift["actual_paid"]), (50.0, 80.0))
+        local_db.call(self.conn, "order_balances_verify", {"p_repair": True})
+        self.assertEqual(local_db.call(self.conn, "order_balances_verify", {}), [])
+        self.assertEqual(self.apply(), (400.0, 80.0, 0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,8 +12,9 @@ from loader import show_loader  # Import the loader
 CONFIG_FILE = "config.json"
 
 class LoginApp:
-    def __init__(self, root, reset_link=None):
+    def __init__(self, root, reset_link=None, startup=None):
         self.root = root
+        self.startup = startup  # startup.Startup begun by run_app.py; the loader waits for it
         self.root.title("Log In")
         self.root.geometry("400x300")
         self.root.configure(bg="#d3d3d3")
@@ -89,7 +90,7 @@ class LoginApp:
         #         if remember_me:
         #             self.save_credentials(username, password)
         self.root.destroy()
-        show_loader(self.open_dashboard)
+        show_loader(self.open_dashboard, self.startup)
 
     def open_dashboard(self):
         dashboard_root = tk.Tk()
@@ -0,0 +1,229 @@
+# filepath: flask-app/metrics.py
+# Per-request timing for the Flask backend: wall time per endpoint, the Supabase
+# calls made while serving it (count and DB time), Prometheus text and a slow-request log.
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from latency import LATENCY_BUCKETS_MS, LatencyHistogram
+
+# Builder methods that pick the statement a table query runs; they name its timings
+QUERY_OPERATIONS = ("select", "insert", "update", "upsert", "delete")
+
+_current_request = contextvars.ContextVar("current_request", default=None)
+
+class RequestTimer:
+    """Wall time of one request and the Supabase calls made while serving it."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_calls = 0
+        self.db_ms = 0.0
+        self.calls = {}
+        self._lock = threading.Lock()  # Fan-out endpoints record from fetch_executor threads
+
+    def add_call(self, label, elapsed_ms):
+        with self._lock:
+            self.db_calls += 1
+            self.db_ms += elapsed_ms
+            count, total_ms = self.calls.get(label, (0, 0.0))
+            self.calls[label] = (count + 1, total_ms + elapsed_ms)
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+class RequestMetrics:
+    """Latency histograms per endpoint and per Supabase call, plus the slowest recent requests.
+
+    begin() starts timing the current request (kept in a context variable, so
+    work submitted through ContextThreadPoolExecutor is charged to it);
+    finish() files its wall time and DB time under the endpoint and, when it
+    took at least slow_ms, appends it to the rolling slow-request log.
+    """
+    def __init__(self, slow_ms=1000, slow_log_size=100):
+        self.slow_ms = slow_ms
+        self.started_at = time.time()
+        self._endpoints = {}
+        self._calls = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+
+    def begin(self):
+        timer = RequestTimer()
+        _current_request.set(timer)
+        return timer
+
+    def finish(self, timer, endpoint, method, path, status):
+        _current_request.set(None)
+        elapsed_ms = timer.elapsed_ms()
+        error = status >= 500
+        with self._lock:
+            stats = self._endpoints.get((endpoint, method))
+            if stats is None:
+                stats = self._endpoints[(endpoint, method)] = {
+                    "wall": LatencyHistogram(),
+                    "db": LatencyHistogram(),
+                    "db_calls": 0,
+                    "statuses": {},
+                }
+            stats["wall"].record(elapsed_ms, error)
+            stats["db"].record(timer.db_ms, error)
+            stats["db_calls"] += timer.db_calls
+            stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+            if elapsed_ms >= self.slow_ms:
+                self._slow.append({
+                    "time": datetime.now().isoformat(timespec="seconds"),
+                    "method": method,
+                    "path": path,
+                    "endpoint": endpoint,
+                    "status": status,
+                    "wall_ms": round(elapsed_ms, 1),
+                    "db_ms": round(timer.db_ms, 1),
+                    "db_calls": timer.db_calls,
+                    "calls": {label: {"count": count, "ms": round(total_ms, 1)}
+                              for label, (count, total_ms) in sorted(timer.calls.items(), key=lambda item: -item[1][1])},
+                })
+        return elapsed_ms
+
+    def record_call(self, label, elapsed_ms, error=False):
+        """One Supabase call: charged to the request being served (if any) and to the label's histogram."""
+        timer = _current_request.get()
+        if timer is not None:
+            timer.add_call(label, elapsed_ms)
+        with self._lock:
+            histogram = self._calls.get(label)
+            if histogram is None:
+                histogram = self._calls[label] = LatencyHistogram()
+            histogram.record(elapsed_ms, error)
+
+    def slow_requests(self):
+        """Slow requests, most recent first."""
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "endpoints": {
+                    f"{method} {endpoint}": {
+                        "wall": stats["wall"].to_dict(),
+                        "db": stats["db"].to_dict(),
+                        "db_calls": stats["db_calls"],
+                        "statuses": dict(stats["statuses"]),
+                    }
+                    for (endpoint, method), stats in sorted(self._endpoints.items())
+                },
+                "supabase_calls": {label: histogram.to_dict() for label, histogram in sorted(self._calls.items())},
+            }
+
+    def prometheus(self, extra=()):
+        """Prometheus text exposition (format 0.0.4); `extra` are additional (name, type, help, value) gauges/counters."""
+        lines = []
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            _histogram(lines, "cms_http_request_duration_seconds", "Wall time of HTTP requests, by endpoint.",
+                       [(_labels(endpoint=endpoint, method=method), stats["wall"]) for (endpoint, method), stats in endpoints])
+            _histogram(lines, "cms_http_request_db_seconds", "Time spent in Supabase calls per HTTP request, by endpoint.",
+                       [(_labels(endpoint=endpoint, method=method), stats["db"]) for (endpoint, method), stats in endpoints])
+            lines.append("# HELP cms_http_request_db_calls_total Supabase calls made while serving HTTP requests, by endpoint.")
+            lines.append("# TYPE cms_http_request_db_calls_total counter")
+            for (endpoint, method), stats in endpoints:
+                lines.append(f"cms_http_request_db_calls_total{_labels(endpoint=endpoint, method=method)} {stats['db_calls']}")
+            lines.append("# HELP cms_http_responses_total HTTP responses, by endpoint and status code.")
+            lines.append("# TYPE cms_http_responses_total counter")
+            for (endpoint, method), stats in endpoints:
+                for status, count in sorted(stats["statuses"].items()):
+                    lines.append(f"cms_http_responses_total{_labels(endpoint=endpoint, method=method, status=status)} {count}")
+            _histogram(lines, "cms_supabase_call_duration_seconds", "Duration of Supabase calls, by table/operation or RPC.",
+                       [(_labels(call=label), histogram) for label, histogram in sorted(self._calls.items())])
+            lines.append("# HELP cms_supabase_call_errors_total Supabase calls that raised, by table/operation or RPC.")
+            lines.append("# TYPE cms_supabase_call_errors_total counter")
+            for label, histogram in sorted(self._calls.items()):
+                lines.append(f"cms_supabase_call_errors_total{_labels(call=label)} {histogram.errors}")
+        for name, kind, help_text, value in extra:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+        lines.append("# HELP cms_process_start_time_seconds Start time of the server process since the Unix epoch.")
+        lines.append("# TYPE cms_process_start_time_seconds gauge")
+        lines.append(f"cms_process_start_time_seconds {self.started_at:.3f}")
+        return "\n".join(lines) + "\n"
+
+def _labels(**labels):
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+def _histogram(lines, name, help_text, series):
+    """Append a Prometheus histogram built from LatencyHistograms (bucket bounds converted to seconds)."""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, histogram in series:
+        inner = labels[1:-1] + "," if labels != "{}" else ""
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{inner}le="{bound / 1000:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{inner}le="+Inf"}} {histogram.total}')
+        lines.append(f"{name}_sum{labels} {histogram.sum_ms / 1000:.6f}")
+        lines.append(f"{name}_count{labels} {histogram.total}")
+
+class TracedSupabase:
+    """Supabase client whose table queries and RPCs report their duration to a RequestMetrics.
+
+    Calls are labelled "<table>.<operation>" (e.g. "clients.select") or
+    "rpc.<name>"; everything else (auth, storage) is passed through untimed.
+    """
+    def __init__(self, client, metrics):
+        self._client = client
+        self._metrics = metrics
+
+    def table(self, name):
+        return _TracedQuery(self._client.table(name), name, self._metrics)
+
+    from_ = table
+
+    def rpc(self, name, *args, **kwargs):
+        return _TracedQuery(self._client.rpc(name, *args, **kwargs), f"rpc.{name}", self._metrics, operation_known=True)
+
+    def __getattr__(self, attribute):
+        return getattr(self._client, attribute)
+
+class _TracedQuery:
+    """Query builder stand-in: builder methods return wrapped builders, execute() is timed."""
+    def __init__(self, builder, label, metrics, operation_known=False):
+        self._builder = builder
+        self._label = label
+        self._metrics = metrics
+        self._operation_known = operation_known
+
+    def execute(self, *args, **kwargs):
+        started = time.perf_counter()
+        error = False
+        try:
+            return self._builder.execute(*args, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._metrics.record_call(self._label, (time.perf_counter() - started) * 1000, error)
+
+    def __getattr__(self, attribute):
+        value = getattr(self._builder, attribute)
+        if not callable(value):
+            if hasattr(value, "execute"):  # Builder properties such as .not_
+                return _TracedQuery(value, self._label, self._metrics, self._operation_known)
+            return value
+        label, known = self._label, self._operation_known
+        if not known and attribute in QUERY_OPERATIONS:
+            label, known = f"{label}.{attribute}", True
+
+        def call(*args, **kwargs):
+            return _TracedQuery(value(*args, **kwargs), label, self._metrics, known)
+        return call
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks run in a copy of the submitter's context,
+    so Supabase calls made on its threads are charged to the request that submitted them."""
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
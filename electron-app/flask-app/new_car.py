@@ -1,17 +1,25 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, Toplevel  # Add filedialog and Toplevel imports
-import requests
+from background_api import api
 from drive_upload import upload_file_to_drive  # Ensure this is imported
+from services import registry
 import json
 import datetime
 
-# Load the list of makes and models
-try:
-    with open("resources/marci_modele_refined.json", "r", encoding="utf-8") as f:
-        make_model_data = json.load(f)
-except FileNotFoundError:
-    print("Warning: 'resources/marci_modele_refined.json' not found. Using an empty dictionary as fallback.")
-    make_model_data = {}
+def load_make_model_data():
+    """Load the list of makes and models (once, on first use)."""
+    try:
+        with open("resources/marci_modele_refined.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print("Warning: 'resources/marci_modele_refined.json' not found. Using an empty dictionary as fallback.")
+        return {}
+
+def register_services():
+    """Register the services this module provides (make_model_data) with the shared registry."""
+    registry.register('make_model_data', load_make_model_data)
+
+register_services()
 
 def open_add_vehicle_window(root, client_id=None, client_name=None):
     window = tk.Toplevel(root)
@@ -38,6 +46,7 @@ def add_vehicle_content(frame, window, client_id, client_name, root):
         open_client_search_window(frame.master, lambda cid, cname: add_vehicle_content(frame, window, cid, cname, root))
         return
 
+    make_model_data = registry.get('make_model_data')
     ttk.Label(frame, text=f"Client: {client_name}").grid(row=0, column=0, columnspan=2, padx=10, pady=5, sticky="W")
 
     ttk.Label(frame, text="Marcă:").grid(row=1, column=0, padx=10, pady=5, sticky="E")
@@ -120,28 +129,28 @@ def submit_vehicle(client_id, client_name, marca, model, an, vin, numar_inmatric
     if not all([marca, model, an, vin, numar_inmatriculare]):
         messagebox.showerror("Eroare", "Toate câmpurile sunt obligatorii!")
         return
+    if api.is_busy(window):
+        return  # Still saving the previous click
 
-    try:
-        response = requests.post('http://127.0.0.1:5000/add_vehicle', json={
-            'client_id': client_id,
-            'marca': marca,
-            'model': model,
-            'an': an,
-            'vin': vin,
-            'numar_inmatriculare': numar_inmatriculare,
-            'image_url': image_url or "None"  # Default to "None" if no image URL is provided
-        })
+    def on_saved(response):
         print("Raw response:", response.text)
         if response.status_code == 200:
-            result = response.json()
             messagebox.showinfo("Succes", "Vehiculul a fost adăugat cu succes!")
             window.destroy()
             dashboard_app = root.app
-            dashboard_app.refresh_client_vehicles(client_name)
+            dashboard_app.refresh_client_vehicles()
         elif response.status_code == 400 and "duplicate key value violates unique constraint" in response.text:
             messagebox.showerror("Eroare", "Vehiculul cu acest VIN există deja!")
         else:
             result = response.json()
             messagebox.showerror("Eroare", result.get('message', "A apărut o eroare necunoscută."))
-    except Exception as e:
-        messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
\ No newline at end of file
+
+    api.post(window, '/add_vehicle', json={
+        'client_id': client_id,
+        'marca': marca,
+        'model': model,
+        'an': an,
+        'vin': vin,
+        'numar_inmatriculare': numar_inmatriculare,
+        'image_url': image_url or "None"  # Default to "None" if no image URL is provided
+    }, on_success=on_saved, on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
+from background_api import api
 import json
 import os
 from ttkwidgets.autocomplete import AutocompleteCombobox
@@ -142,18 +142,20 @@ def add_client_content(frame, window, refresh_client_list):
             widget.bind("<FocusOut>", lambda event, w=widget: w.configure(style="TEntry"))
 
 def load_judete(judet_combobox, localitate_combobox):
-    """Load counties from the /get_judete API route."""
-    global judete_cache
-    if not judete_cache:
-        try:
-            response = requests.get('http://127.0.0.1:5000/get_judete')
+    """Load counties from the /get_judete API route (in the background the first time)."""
+    if judete_cache:
+        judet_combobox.set_completion_list(judete_cache)
+    else:
+        def on_success(response):
+            global judete_cache
             if response.status_code == 200:
                 judete_cache = response.json()
+                judet_combobox.set_completion_list(judete_cache)
             else:
                 messagebox.showerror("Eroare", "Nu s-au putut încărca județele.")
-        except Exception as e:
-            messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
-    judet_combobox.set_completion_list(judete_cache)
+
+        api.get(judet_combobox.winfo_toplevel(), '/get_judete', on_success=on_success,
+                on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
     judet_combobox.bind("<KeyRelease>", lambda event: filter_combobox(judet_combobox, judete_cache))
 
     def on_judet_changed(event):
@@ -167,23 +169,24 @@ def load_judete(judet_combobox, localitate_combobox):
     judet_combobox.bind("<Return>", on_judet_changed)
 
 def update_localitati(judet_combobox, localitate_combobox):
-    """Update localities based on the selected county using /get_localitati/<judet>."""
-    global localitati_cache
+    """Update localities based on the selected county using /get_localitati/<judet> (fetched in the background)."""
     judet_selected = judet_combobox.get()
     if judet_selected in localitati_cache:
-        localitati = localitati_cache[judet_selected]
-    else:
-        try:
-            response = requests.get(f'http://127.0.0.1:5000/get_localitati/{judet_selected}')
-            if response.status_code == 200:
-                localitati = response.json()
-                localitati_cache[judet_selected] = localitati
-            else:
-                messagebox.showerror("Eroare", "Nu s-au putut încărca localitățile.")
-                return
-        except Exception as e:
-            messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
-            return
+        show_localitati(localitate_combobox, localitati_cache[judet_selected])
+        return
+
+    def on_success(response):
+        if response.status_code == 200:
+            localitati_cache[judet_selected] = response.json()
+            if judet_combobox.get() == judet_selected:  # Not changed again meanwhile
+                show_localitati(localitate_combobox, localitati_cache[judet_selected])
+        else:
+            messagebox.showerror("Eroare", "Nu s-au putut încărca localitățile.")
+
+    api.get(judet_combobox.winfo_toplevel(), f'/get_localitati/{judet_selected}', on_success=on_success,
+            on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+
+def show_localitati(localitate_combobox, localitati):
     localitate_combobox.set_completion_list(localitati)
     localitate_combobox.bind("<KeyRelease>", lambda event: filter_combobox(localitate_combobox, localitati))
     if len(localitati) == 1:
@@ -219,26 +222,25 @@ def submit_client(nume, telefon, adresa, cnp, judet, localitate, window, refresh
 
     # No more checks on 'cnp' or 'adresa'—anything goes
 
+    if api.is_busy(window):
+        return  # Still saving the previous click
+
     # Send data to the Flask API
-    try:
-        payload = {
-            'nume': nume,
-            'telefon': telefon,
-            'adresa': adresa,
-            'localitate': localitate,
-            'judet': judet
-        }
-        if cnp:  # Include CNP only if provided
-            payload['cnp'] = cnp
-
-        response = requests.post('http://127.0.0.1:5000/add_client', json=payload)
+    payload = {
+        'nume': nume,
+        'telefon': telefon,
+        'adresa': adresa,
+        'localitate': localitate,
+        'judet': judet
+    }
+    if cnp:  # Include CNP only if provided
+        payload['cnp'] = cnp
 
+    def on_saved(response):
         # Log HTTP status and raw response payload
         print("⮕ HTTP status:", response.status_code)
         print("⮕ raw payload:", response.text)
 
-        result = response.json()
-
         if response.status_code == 200:
             messagebox.showinfo("Succes!", "Clientul a fost adăugat cu succes.")
             refresh_client_list()  # Refresh the client list
@@ -246,14 +248,21 @@ def submit_client(nume, telefon, adresa, cnp, judet, localitate, window, refresh
             clear_temp_data()  # Clear temporary data
         else:
             # Look for either 'message' or 'error', or fall back to raw text
+            try:
+                result = response.json()
+            except ValueError:
+                result = {}
             err = result.get('message') or result.get('error') or response.text
             messagebox.showerror("Eroare", err)
-    except Exception as e:
+
+    def on_error(e):
         # Log the full exception to the console
         print("❌ submit_client error:", repr(e), file=sys.stderr)
         # Show a friendly error message to the user
         messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
+    api.post(window, '/add_client', json=payload, on_success=on_saved, on_error=on_error)
+
 def save_temp_data(frame, window):
     """Save temporary data from the form to a JSON file."""
     # Map each field name to its (row, column) in the grid
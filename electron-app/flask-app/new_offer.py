@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import requests
+from background_api import api
 import tksheet  # Ensure you have tksheet installed
 import uuid
 from tkcalendar import DateEntry
@@ -79,17 +79,17 @@ def add_offer_content(content_frame, window, offer_details=None):
             refresh_vehicle_dropdown(client_id)
 
         def refresh_vehicle_dropdown(client_id):
-            try:
-                response = requests.get(f'http://127.0.0.1:5000/vehicles?client_id={client_id}')
-                vehicles = response.json()
+            def on_success(response):
+                vehicles = response.json() if response.status_code == 200 else None
                 if vehicles is not None:
                     vehicle_dropdown['values'] = [f"{v['marca']} {v['model']} ({v['numar_inmatriculare']})" for v in vehicles]
                     vehicle_dropdown.vehicle_ids = {f"{v['marca']} {v['model']} ({v['numar_inmatriculare']})": v['id'] for v in vehicles}  # Store vehicle IDs in the dropdown
                 else:
                     vehicle_dropdown['values'] = []
                     vehicle_dropdown.vehicle_ids = {}
-            except Exception as e:
-                messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+
+            api.get(window, f'/vehicles?client_id={client_id}', on_success=on_success,
+                    on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
 
         def open_category_window(category, prefilled_data=None):
             category_window = tk.Toplevel(window)
@@ -313,26 +313,24 @@ def add_offer_content(content_frame, window, offer_details=None):
         vehicle_dropdown.grid(row=1, column=1, padx=10, pady=5, sticky="W")
 
         def fetch_next_offer_number():
-            try:
-                response = requests.get('http://127.0.0.1:5000/highest_offer_number')
+            """Allocate the offer number in the background and show it (Salvează needs it)."""
+            def on_success(response):
                 if response.status_code == 200:
-                    highest_offer_number = response.json().get('highest_offer_number', 'O0')
-                    next_number = int(highest_offer_number[1:]) + 1
-                    return f"O{next_number}"
+                    order_number_label.config(text=response.json()['offer_number'])
                 else:
-                    return f"O1"
-            except Exception as e:
-                messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
-                return f"O1"
+                    messagebox.showerror("Eroare", f"Nu s-a putut aloca numărul ofertei:\n{response.text}")
 
-        if offer_details and offer_details.get("offer_number"):
-            order_number = offer_details["offer_number"]
-        else:
-            order_number = fetch_next_offer_number()
+            # The backend allocates the number, so two workstations never get the same one
+            api.post(window, '/next_offer_number', on_success=on_success,
+                     on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
 
         ttk.Label(content_frame, text="Nr. Comandă:").grid(row=2, column=0, padx=10, pady=5, sticky="E")
-        order_number_label = ttk.Label(content_frame, text=order_number)
+        order_number_label = ttk.Label(content_frame, text="")
         order_number_label.grid(row=2, column=1, padx=10, pady=5, sticky="W")
+        if offer_details and offer_details.get("offer_number"):
+            order_number_label.config(text=offer_details["offer_number"])
+        else:
+            fetch_next_offer_number()
 
         ttk.Label(content_frame, text="Data Ofertă:").grid(row=2, column=2, padx=10, pady=5, sticky="E")
         date_entry = DateEntry(content_frame, date_pattern='dd/mm/yyyy', width=12, background='darkblue', foreground='white', borderwidth=2)
@@ -365,7 +363,7 @@ def add_offer_content(content_frame, window, offer_details=None):
         saved_categories_frame = ttk.Frame(content_frame)
         saved_categories_frame.grid(row=6, column=0, columnspan=4, pady=10, sticky="nsew")
 
-        save_button = ttk.Button(content_frame, text="Salvează", command=lambda: submit_offer(client_id_entry.get(), vehicle_dropdown, order_number, saved_categories, status_var.get(), observations_text.get("1.0", tk.END).strip(), date_entry.get(), window))
+        save_button = ttk.Button(content_frame, text="Salvează", command=lambda: submit_offer(client_id_entry.get(), vehicle_dropdown, order_number_label.cget("text"), saved_categories, status_var.get(), observations_text.get("1.0", tk.END).strip(), date_entry.get(), window))
         save_button.grid(row=7, column=0, pady=10)
 
         generate_pdf_button = ttk.Button(
@@ -407,7 +405,8 @@ def add_offer_content(content_frame, window, offer_details=None):
         print(f"Exception occurred while adding offer content: {e}")  # Debug print
         messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
-def generate_pdf(offer_number=None, offer_details=None, client_name=None, vehicle_name=None):
+def generate_pdf(offer_number=None, offer_details=None, client_name=None, vehicle_name=None, owner=None):
+    """PDF of offer_details, or of offer offer_number fetched (in the background, for window owner) from the server."""
     try:
         if offer_details:
             # Ensure client and vehicle details are included
@@ -422,14 +421,14 @@ def generate_pdf(offer_number=None, offer_details=None, client_name=None, vehicl
             messagebox.showinfo("Succes", f"PDF generat cu succes: {pdf_file}")
         elif offer_number:
             # Fetch offer details from the server if offer_number is provided
-            response = requests.get(f'http://127.0.0.1:5000/offers/{offer_number}')
-            if response.status_code == 200:
-                offer_details = response.json()
-                pdf_generator = PDFGenerator(offer_details)
-                pdf_file = pdf_generator.generate_pdf()
-                messagebox.showinfo("Succes", f"PDF generat cu succes: {pdf_file}")
-            else:
-                messagebox.showerror("Eroare", "Nu s-au putut încărca detaliile ofertei.")
+            def on_success(response):
+                if response.status_code == 200:
+                    generate_pdf(offer_details=response.json())
+                else:
+                    messagebox.showerror("Eroare", "Nu s-au putut încărca detaliile ofertei.")
+
+            api.get(owner, f'/offers/{offer_number}', on_success=on_success,
+                    on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
         else:
             messagebox.showerror("Eroare", "Nu există detalii pentru generarea PDF-ului.")
     except Exception as e:
@@ -451,6 +450,9 @@ def submit_offer(client_id, vehicle_dropdown, offer_number, categories, status,
         messagebox.showerror("Eroare", "Statusul selectat nu este valid!")
         return
 
+    if api.is_busy(window):
+        return  # Still saving the previous click
+
     # Get the vehicle ID from the dropdown
     vehicle = vehicle_dropdown.get()
     vehicle_id = vehicle_dropdown.vehicle_ids.get(vehicle)
@@ -472,20 +474,19 @@ def submit_offer(client_id, vehicle_dropdown, offer_number, categories, status,
         # Debug print for categories payload
         print("[DEBUG] Categories payload:", json.dumps(categories, indent=2))
 
-        try:
-            response = requests.post("http://127.0.0.1:5000/add_offer", json=payload)
+        def on_saved(response):
             if response.status_code == 200:
                 messagebox.showinfo("Succes", "Ofertă salvată cu succes!")
                 window.destroy()
-                
+
                 # Trigger refresh in dashboard
                 if hasattr(window.master, "app"):
-                    selected_client_name = window.master.app.client_name_value.cget("text")
-                    window.master.app.refresh_client_offers(selected_client_name)
+                    window.master.app.refresh_client_offers()
             else:
                 messagebox.showerror("Eroare", f"Nu s-a putut salva oferta:\n{response.text}")
-        except Exception as e:
-            messagebox.showerror("Eroare", f"A apărut o eroare:\n{e}")
+
+        api.post(window, "/add_offer", json=payload, on_success=on_saved,
+                 on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare:\n{e}"))
 
     except Exception as e:
         messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
@@ -1,14 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
-import requests
+from background_api import api
 import json
 from tkcalendar import DateEntry
-from supabase import create_client, Client
-from config import SUPABASE_URL, SUPABASE_KEY
-
-# Initialize Supabase client
-supabase_client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 class NewOrderApp:
     def __init__(self, root, offer_data, on_save=None):
@@ -24,24 +19,55 @@ class NewOrderApp:
         self.all_products = {}  # Initially empty, will be populated from backend
         self.order_number = offer_data.get("order_number", "CMD-???")
         self.on_save = on_save
+        self.pending_loads = 0  # Background loads still to finish before setup_ui
 
-        # Fetch offer details from backend using the /offers/<offer_number> route
+        # Use the offer details passed by the caller, or fetch them from /offers/<offer_number>
         offer_number = offer_data.get("offer_number")
-        if offer_number:
-            try:
-                response = requests.get(f"http://127.0.0.1:5000/offers/{offer_number}")
-                if response.status_code == 200:
+        if offer_data.get("offer_details"):
+            self.offer_data = dict(offer_data["offer_details"])
+            self.offer_data["selected_category"] = offer_data.get("selected_category", "")
+            self.all_products = {
+                category: data["products"]
+                for category, data in self.offer_data.get("categories", {}).items()
+            }
+            self.after_offer_loaded(offer_data)
+        elif offer_number:
+            def on_offer_loaded(response):
+                if response is not None and response.status_code == 200:
                     self.offer_data = response.json()
                     self.offer_data["selected_category"] = offer_data.get("selected_category", "")  # ✅ RETAIN CATEGORY
                     self.all_products = {
                         category: data["products"]
                         for category, data in self.offer_data.get("categories", {}).items()
                     }
-                else:
+                elif response is not None:
                     print(f"[ERROR] Failed to fetch offer details for {offer_number}: {response.text}")
-            except Exception as e:
-                print(f"[ERROR] Exception fetching offer details: {e}")
+                self.after_offer_loaded(offer_data)
+
+            self.load(f"/offers/{offer_number}", on_offer_loaded)
+        else:
+            self.after_offer_loaded(offer_data)
+
+    def load(self, path, on_loaded):
+        """GET path in the background and pass the response (None on a connection error) to on_loaded.
+
+        setup_ui runs once the last pending load has been handled.
+        """
+        self.pending_loads += 1
+
+        def finish(response):
+            on_loaded(response)
+            self.pending_loads -= 1
+            if self.pending_loads == 0 and self.root.winfo_exists():
+                self.show_form()
+
+        def on_error(e):
+            print(f"[ERROR] Exception fetching {path}: {e}")
+            finish(None)
 
+        api.get(self.root, path, on_success=finish, on_error=on_error)
+
+    def after_offer_loaded(self, offer_data):
         # Check if categories are defined
         if not self.all_products:
             messagebox.showerror("Eroare", "Nu există categorii definite în ofertă.")
@@ -52,20 +78,34 @@ class NewOrderApp:
         if self.vehicle_data.get("marca") == "N/A" or self.vehicle_data.get("model") == "N/A":
             vehicle_id = offer_data.get("vehicle_id")
             if vehicle_id:
-                try:
-                    response = requests.get(f"http://127.0.0.1:5000/vehicle/{vehicle_id}")
-                    self.vehicle_data = response.json()
-                    self.vehicle_data["id"] = vehicle_id  # Ensure it carries the ID too
-                except Exception as e:
-                    print("[ERROR] Couldn't fetch vehicle:", e)
+                def on_vehicle_loaded(response):
+                    if response is None:
+                        return
+                    try:
+                        self.vehicle_data = response.json()
+                        self.vehicle_data["id"] = vehicle_id  # Ensure it carries the ID too
+                    except Exception as e:
+                        print("[ERROR] Couldn't fetch vehicle:", e)
+
+                self.load(f"/vehicle/{vehicle_id}", on_vehicle_loaded)
 
         # Auto-generate order number if missing
         if not self.order_number or "???" in self.order_number:
-            response = requests.get("http://127.0.0.1:5000/highest_order_number")
-            highest = response.json().get("highest_order_number", "CMD0")
-            next_number = int(highest[3:]) + 1
-            self.order_number = f"CMD{next_number}"
+            def on_highest_order_number(response):
+                if response is None or response.status_code != 200:
+                    messagebox.showerror("Eroare", "Nu s-a putut genera numărul comenzii.")
+                    self.root.destroy()
+                    return
+                highest = response.json().get("highest_order_number", "CMD0")
+                next_number = int(highest[3:]) + 1
+                self.order_number = f"CMD{next_number}"
+
+            self.load("/highest_order_number", on_highest_order_number)
 
+        if self.pending_loads == 0:
+            self.show_form()
+
+    def show_form(self):
         print("[DEBUG] Initializing NewOrderApp with offer_data:", json.dumps(self.offer_data, indent=2))  # Debug print
         self.setup_ui()
 
@@ -324,6 +364,8 @@ class NewOrderApp:
         self.total_comanda_var.set(f"{self.safe_format_float(total_final)} RON")
 
     def save_order(self):
+        if api.is_busy(self.root):
+            return  # Still saving the previous click
         selected_category = self.offer_data.get("selected_category", "")
         products = self.all_products.get(selected_category, [])
 
@@ -373,8 +415,7 @@ class NewOrderApp:
         # Debugging: Log the full payload before sending
         print("[DEBUG] Payload to /add_order:\n", json.dumps(payload, indent=2))
 
-        try:
-            response = requests.post("http://127.0.0.1:5000/add_order", json=payload)
+        def on_saved(response):
             if response.status_code == 200:
                 messagebox.showinfo("Succes", "Comanda a fost salvată cu succes!")
                 self.generate_pdf()
@@ -383,8 +424,9 @@ class NewOrderApp:
                     self.on_save(self.offer_data["offer_number"], self.order_number, self.offer_data["selected_category"])  # ✅ Trigger callback
             else:
                 messagebox.showerror("Eroare", f"Nu s-a putut salva comanda:\n{response.text}")
-        except Exception as e:
-            messagebox.showerror("Eroare", f"A apărut o eroare:\n{e}")
+
+        api.post(self.root, "/add_order", json=payload, on_success=on_saved,
+                 on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare:\n{e}"))
 
     def generate_pdf(self):
         from pdf import OrderPDFGenerator
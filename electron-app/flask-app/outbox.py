@@ -0,0 +1,85 @@
+# filepath: flask-app/outbox.py
+# Durable queue of write requests that could not reach Supabase, replayed in order once it is back.
+import sqlite3
+import threading
+import time
+
+# Header marking a request replayed from the outbox (it must not be queued again)
+REPLAY_HEADER = "X-Outbox-Replay"
+
+# replay(entry) outcomes
+DONE = "done"
+RETRY = "retry"
+FAILED = "failed"
+
+class Outbox:
+    """FIFO of queued HTTP writes (method, path with query string, body), kept in SQLite.
+
+    flush(replay) sends the pending entries oldest first: DONE removes an
+    entry, FAILED (the server rejected it) sets it aside with its error so
+    the ones behind it can go, RETRY (still offline) stops the flush and
+    leaves it and everything after it for the next one.
+    """
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.execute("""
+                create table if not exists outbox (
+                    id           integer primary key autoincrement,
+                    method       text not null,
+                    path         text not null,
+                    body         text,
+                    content_type text,
+                    created_at   real not null,
+                    attempts     integer not null default 0,
+                    state        text not null default 'pending',
+                    last_error   text
+                )
+            """)
+        self.replayed = 0
+
+    def add(self, method, path, body=None, content_type=None):
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "insert into outbox (method, path, body, content_type, created_at) values (?, ?, ?, ?, ?)",
+                (method, path, body, content_type, time.time()),
+            )
+            return cursor.lastrowid
+
+    def entries(self, state="pending"):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute("select * from outbox where state = ? order by id", (state,))]
+
+    def flush(self, replay):
+        """Replay pending entries in order; returns how many were sent successfully."""
+        sent = 0
+        for entry in self.entries():
+            try:
+                outcome, error = replay(entry), None
+            except Exception as e:
+                outcome, error = RETRY, str(e)
+            if isinstance(outcome, tuple):
+                outcome, error = outcome
+            with self._lock, self._conn:
+                if outcome == DONE:
+                    self._conn.execute("delete from outbox where id = ?", (entry["id"],))
+                else:
+                    self._conn.execute(
+                        "update outbox set attempts = attempts + 1, state = ?, last_error = ? where id = ?",
+                        ("failed" if outcome == FAILED else "pending", error, entry["id"]),
+                    )
+            if outcome == DONE:
+                sent += 1
+                self.replayed += 1
+            elif outcome == RETRY:
+                break
+            else:
+                print(f"[ERROR] Outbox entry {entry['id']} ({entry['method']} {entry['path']}) was rejected: {error}")
+        return sent
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._conn.execute("select state, count(*) from outbox group by state").fetchall())
+        return {"pending": counts.get("pending", 0), "failed": counts.get("failed", 0), "replayed": self.replayed}
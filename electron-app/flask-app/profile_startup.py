@@ -0,0 +1,70 @@
+# filepath: flask-app/profile_startup.py
+"""Import-time profile of the desktop app's start-up modules.
+
+Imports each module in a fresh interpreter with `python -X importtime`, then
+prints the wall time and the slowest imports, by cumulative time (the module
+and everything it pulled in) and by self time.
+
+    python profile_startup.py                   # run_app (Flask app + login/dashboard UI)
+    python profile_startup.py app dashboard --top 15 --json startup_profile.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+def profile_import(module):
+    """[(module, self_us, cumulative_us)] for one import of module, plus the wall time in ms."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows, wall_ms
+
+def report(module, rows, wall_ms, top):
+    total_ms = max((cumulative for _, _, cumulative in rows), default=0) / 1000
+    print(f"== import {module}: {wall_ms:.0f} ms wall (interpreter included), {total_ms:.0f} ms importing, {len(rows)} modules")
+    print("   slowest by cumulative time:")
+    for name, _, cumulative in sorted(rows, key=lambda row: row[2], reverse=True)[:top]:
+        print(f"   {cumulative / 1000:9.1f} ms  {name}")
+    print("   slowest by self time:")
+    for name, self_us, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:top]:
+        print(f"   {self_us / 1000:9.1f} ms  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=["run_app"], help="modules to import (default: run_app)")
+    parser.add_argument("--top", type=int, default=10, help="rows per table")
+    parser.add_argument("--json", help="also write the full profile to this file")
+    args = parser.parse_args()
+
+    profiles = {}
+    for module in args.modules:
+        rows, wall_ms = profile_import(module)
+        report(module, rows, wall_ms, args.top)
+        profiles[module] = {
+            "wall_ms": round(wall_ms, 1),
+            "imports": [{"module": name, "self_us": self_us, "cumulative_us": cumulative}
+                        for name, self_us, cumulative in rows],
+        }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as profile_file:
+            json.dump(profiles, profile_file, indent=2)
+        print(f"Profile written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+# filepath: flask-app/replica.py
+# Local SQLite copy of the synced Supabase tables (see /sync in app.py), kept
+# current by a background thread so the read routes do not cross the internet.
+import json
+import re
+import sqlite3
+import threading
+import time
+
+# Columns the read routes filter on, per table; each gets an index (the key column is the primary key)
+INDEXED_COLUMNS = {
+    'clients': (),
+    'vehicles': ('client_id',),
+    'offers': ('client_id', 'offer_number'),
+    'offer_products': ('offer_number',),
+    'orders': ('client_id', 'order_number'),
+    'order_products': ('order_id',),
+    'payments': ('client_id', 'order_id'),
+    'return_products': ('order_product_id',),
+    'order_balances': ('client_id',),
+}
+
+# Primary key of the tables whose key column is not "id"
+KEY_COLUMNS = {
+    'order_balances': 'order_id',
+}
+
+_COLUMN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+class ReplicaResult:
+    """Stands in for a Supabase APIResponse: rows in .data, the row count in .count when asked for."""
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+def _key(value):
+    # Filters arrive as strings from the query string; ids are stored as JSON numbers or strings
+    return str(int(value)) if isinstance(value, bool) else str(value)
+
+def _column_expr(table, column):
+    return "id" if column == KEY_COLUMNS.get(table, "id") else f"cast(json_extract(data, '$.{column}') as text)"
+
+def _row_key(table, row):
+    return _key(row[KEY_COLUMNS.get(table, "id")])
+
+def _parse_fields(fields):
+    """Column list of a select string ('*' -> None); None when it cannot be served locally (embedded resources)."""
+    if not isinstance(fields, str):
+        fields = ", ".join(fields)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    if "*" in names:
+        return None, True
+    if not all(_COLUMN.match(name) for name in names):
+        return None, False
+    return names, True
+
+class Replica:
+    """SQLite copy of a fixed set of tables, each row kept as its Supabase JSON.
+
+    apply() takes a /sync payload (a full snapshot or a delta) and stores the
+    cursor it ends at, so a restarted app resumes from where it left off and
+    can serve reads before Supabase is reachable. Reads return None when they
+    cannot be answered locally (no snapshot yet, table not replicated,
+    embedded selects), and the caller falls back to Supabase.
+    """
+    def __init__(self, path, tables=tuple(INDEXED_COLUMNS)):
+        self.path = path
+        self.tables = tuple(tables)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._conn:
+            if path != ":memory:":
+                self._conn.execute("pragma journal_mode = wal")
+            existing = {name for (name,) in self._conn.execute("select name from sqlite_master where type = 'table'")}
+            self._conn.execute("create table if not exists replica_meta (key text primary key, value text)")
+            added = [table for table in self.tables if f"r_{table}" not in existing]
+            if added and "replica_meta" in existing:
+                # A table replicated since the last run: its rows only come with a full snapshot
+                self._conn.execute("delete from replica_meta where key = 'cursor'")
+            for table in self.tables:
+                self._conn.execute(f'create table if not exists "r_{table}" (id text primary key, data text not null)')
+                for column in INDEXED_COLUMNS.get(table, ()):
+                    self._conn.execute(
+                        f'create index if not exists "r_{table}_{column}" on "r_{table}" ({_column_expr(table, column)})'
+                    )
+        self.cursor = self._meta("cursor")
+        synced_at = self._meta("synced_at")
+        self.synced_at = float(synced_at) if synced_at else None
+
+    def _meta(self, key):
+        row = self._conn.execute("select value from replica_meta where key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def ready(self):
+        """Whether a snapshot has been applied (possibly in an earlier run)."""
+        return self.cursor is not None
+
+    def apply(self, payload):
+        """Store a /sync payload; returns the names of the tables it changed."""
+        changed = set()
+        with self._lock, self._conn:
+            for table, rows in payload["changes"].items():
+                if table not in self.tables:
+                    continue
+                if payload["full"]:
+                    self._conn.execute(f'delete from "r_{table}"')
+                    changed.add(table)
+                if rows:
+                    self._conn.executemany(
+                        f'insert or replace into "r_{table}" (id, data) values (?, ?)',
+                        [(_row_key(table, row), json.dumps(row, ensure_ascii=False)) for row in rows],
+                    )
+                    changed.add(table)
+            for table, ids in payload["deleted"].items():
+                if table in self.tables and ids:
+                    self._conn.executemany(f'delete from "r_{table}" where id = ?', [(_key(row_id),) for row_id in ids])
+                    changed.add(table)
+            self.cursor = payload["cursor"]
+            self.synced_at = time.time()
+            self._conn.executemany(
+                "insert or replace into replica_meta (key, value) values (?, ?)",
+                [("cursor", self.cursor), ("synced_at", self.synced_at)],
+            )
+        return changed
+
+    def merge(self, table, row_id, values):
+        """Apply a local (not yet synced) update to one row; the next sync overwrites it with the server's."""
+        with self._lock, self._conn:
+            row = self._conn.execute(f'select data from "r_{table}" where id = ?', (_key(row_id),)).fetchone()
+            if row is not None:
+                data = {**json.loads(row[0]), **values}
+                self._conn.execute(f'update "r_{table}" set data = ? where id = ?',
+                                   (json.dumps(data, ensure_ascii=False), _key(row_id)))
+
+    def upsert(self, table, rows):
+        """Store rows written by this server (with their server ids) before the next sync brings them."""
+        if table not in self.tables or not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f'insert or replace into "r_{table}" (id, data) values (?, ?)',
+                [(_row_key(table, row), json.dumps(row, ensure_ascii=False)) for row in rows],
+            )
+
+    def delete(self, table, column, value):
+        """Apply a local (not yet synced) delete of the rows whose column equals value."""
+        with self._lock, self._conn:
+            self._conn.execute(f'delete from "r_{table}" where {_column_expr(table, column)} = ?', (_key(value),))
+
+    def _rows(self, table, where="", params=()):
+        # One JSON array built by SQLite decodes about twice as fast as a json.loads per row
+        with self._lock:
+            (array,) = self._conn.execute(
+                f"""select '[' || coalesce(group_concat(data, ','), '') || ']' from "r_{table}" {where}""", params
+            ).fetchone()
+        return json.loads(array)
+
+    def _servable(self, table, columns, fields):
+        if not self.ready or table not in self.tables or not all(_COLUMN.match(column) for column in columns):
+            return None, False
+        return _parse_fields(fields)
+
+    def select(self, table, filters=None, fields='*', count=None):
+        """Rows of table whose columns equal filters, as a ReplicaResult; None if it cannot be served locally."""
+        filters = filters or {}
+        names, servable = self._servable(table, filters, fields)
+        if not servable:
+            return None
+        where = " and ".join(f"{_column_expr(table, column)} = ?" for column in filters)
+        rows = self._rows(table, f"where {where}" if where else "", [_key(value) for value in filters.values()])
+        if names is not None:
+            rows = [{name: row[name] for name in names if name in row} for row in rows]
+        return ReplicaResult(rows, len(rows) if count else None)
+
+    def select_in(self, table, column, values, fields='*'):
+        """Rows of table whose column is one of values; None if it cannot be served locally."""
+        names, servable = self._servable(table, [column], fields)
+        if not servable:
+            return None
+        keys = list(dict.fromkeys(_key(value) for value in values))
+        rows = []
+        for start in range(0, len(keys), 500):  # SQLite's bound parameter limit
+            chunk = keys[start:start + 500]
+            rows.extend(self._rows(table, f"where {_column_expr(table, column)} in ({', '.join('?' * len(chunk))})", chunk))
+        if names is not None:
+            rows = [{name: row[name] for name in names if name in row} for row in rows]
+        return rows
+
+    def order_totals(self, order_ids):
+        """Same rows as the order_totals RPC (sql/order_totals.sql), computed from the local tables."""
+        if not self.ready:
+            return None
+        orders = self.select_in('orders', 'id', order_ids, 'id, client_id')
+        products = self.select_in('order_products', 'order_id', order_ids, 'id, order_id, pret_cu_discount')
+        payments = self.select_in('payments', 'order_id', order_ids, 'order_id, amount')
+        product_orders = {_key(product['id']): _key(product['order_id']) for product in products}
+        returns = self.select_in('return_products', 'order_product_id', list(product_orders), 'order_product_id, total_refund')
+        totals = {_key(order['id']): {"order_id": order['id'], "client_id": order.get('client_id'),
+                                      "total": 0.0, "paid": 0.0, "refunded": 0.0} for order in orders}
+        for product in products:
+            totals[_key(product['order_id'])]["total"] += float(product.get('pret_cu_discount') or 0)
+        for payment in payments:
+            totals[_key(payment['order_id'])]["paid"] += float(payment.get('amount') or 0)
+        for returned in returns:
+            order = totals.get(product_orders.get(_key(returned['order_product_id'])))
+            if order is not None:
+                order["refunded"] += float(returned.get('total_refund') or 0)
+        return list(totals.values())
+
+    def stats(self):
+        with self._lock:
+            rows = {table: self._conn.execute(f'select count(*) from "r_{table}"').fetchone()[0] for table in self.tables}
+        return {"ready": self.ready, "cursor": self.cursor, "synced_at": self.synced_at, "rows": rows}
+
+class ReplicaSync:
+    """Background thread keeping a Replica current.
+
+    Every interval seconds it first replays the outbox (writes queued while
+    offline, see outbox.py) through replay(entry), then applies the changes
+    returned by fetch_changes(cursor) (a /sync payload) until none are left,
+    calling on_change(tables) with the tables that changed. Failures mark the
+    replica offline and back off up to max_backoff seconds.
+    """
+    def __init__(self, replica, fetch_changes, outbox=None, replay=None, on_change=None, interval=5, max_backoff=60):
+        self.replica = replica
+        self.fetch_changes = fetch_changes
+        self.outbox = outbox
+        self.replay = replay
+        self.on_change = on_change
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.online = None
+        self.last_error = None
+        self.syncs = 0
+        self.failures = 0
+        self.last_sync_ms = None
+        self._wake = threading.Event()
+        self._pull_lock = threading.Lock()  # The thread and refresh() after writes both pull
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="replica-sync", daemon=True)
+            self._thread.start()
+        return self
+
+    def wake(self):
+        """Sync now instead of at the end of the current interval (e.g. after a write)."""
+        self._wake.set()
+
+    def mark_offline(self, error):
+        self.online = False
+        self.last_error = str(error)
+
+    def pull(self):
+        """Apply changes until the replica is current (raises on failure)."""
+        with self._pull_lock:
+            while True:
+                payload = self.fetch_changes(self.replica.cursor)
+                changed = self.replica.apply(payload)
+                if changed and self.on_change is not None:
+                    self.on_change(changed)
+                if not payload["more"]:
+                    break
+            self.online = True
+            self.last_error = None
+
+    def refresh(self):
+        """Pull right away so a write made by this server is visible to the next read; False if that failed."""
+        try:
+            self.pull()
+            return True
+        except Exception as e:
+            self.mark_offline(e)
+            print(f"[ERROR] Replica refresh failed: {e}")
+            return False
+
+    def sync_once(self):
+        """Replay the outbox, then pull (raises on failure)."""
+        started = time.perf_counter()
+        if self.outbox is not None and self.replay is not None:
+            self.outbox.flush(self.replay)
+        self.pull()
+        self.syncs += 1
+        self.last_sync_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def _run(self):
+        delay = self.interval
+        while True:
+            try:
+                self.sync_once()
+                delay = self.interval
+            except Exception as e:
+                self.failures += 1
+                self.mark_offline(e)
+                delay = min(delay * 2, self.max_backoff)
+                print(f"[ERROR] Replica sync failed (retrying in {delay} s): {e}")
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def stats(self):
+        return {
+            "online": self.online,
+            "interval_seconds": self.interval,
+            "syncs": self.syncs,
+            "failures": self.failures,
+            "last_sync_ms": self.last_sync_ms,
+            "last_error": self.last_error,
+            "replica": self.replica.stats(),
+            "outbox": self.outbox.stats() if self.outbox is not None else None,
+        }
@@ -0,0 +1,177 @@
+# filepath: flask-app/replica_test.py
+# Replica (apply, reads, order_totals), ReplicaSync and the Outbox, on in-memory SQLite with fake
+# /sync payloads and a fake replay.
+#   python -m unittest -v replica_test.py
+import unittest
+from outbox import Outbox, DONE, RETRY, FAILED
+from replica import Replica, ReplicaSync
+
+TABLES = ('clients', 'orders', 'order_products', 'payments', 'return_products', 'order_balances')
+
+def payload(cursor, changes=None, deleted=None, full=False, more=False):
+    return {
+        "cursor": cursor,
+        "full": full,
+        "more": more,
+        "changes": {table: (changes or {}).get(table, []) for table in TABLES},
+        "deleted": {table: (deleted or {}).get(table, []) for table in TABLES},
+    }
+
+SNAPSHOT = payload("10", full=True, changes={
+    "clients": [{"id": "c1", "nume": "Ana"}, {"id": "c2", "nume": "Bogdan"}],
+    "orders": [{"id": 1, "client_id": "c1"}, {"id": 2, "client_id": "c2"}],
+    "order_products": [{"id": 10, "order_id": 1, "pret_cu_discount": 300.0},
+                       {"id": 11, "order_id": 1, "pret_cu_discount": 100.0},
+                       {"id": 12, "order_id": 2, "pret_cu_discount": 50.0}],
+    "payments": [{"id": 100, "order_id": 1, "amount": 150.0}],
+    "return_products": [{"id": 200, "order_product_id": 11, "total_refund": 25.0}],
+    "order_balances": [{"order_id": 1, "client_id": "c1", "total": 400.0, "paid": 150.0, "refunded": 25.0}],
+})
+
+class ReplicaTest(unittest.TestCase):
+    def setUp(self):
+        self.replica = Replica(":memory:", TABLES)
+
+    def test_not_ready_before_a_snapshot(self):
+        self.assertFalse(self.replica.ready)
+        self.assertIsNone(self.replica.select('clients'))
+        self.assertIsNone(self.replica.select_in('orders', 'id', [1]))
+        self.assertIsNone(self.replica.order_totals([1]))
+
+    def test_snapshot_then_delta(self):
+        self.assertEqual(self.replica.apply(SNAPSHOT), set(TABLES))
+        self.assertEqual(self.replica.cursor, "10")
+        changed = self.replica.apply(payload("12", changes={"clients": [{"id": "c1", "nume": "Ana Pop"},
+                                                                         {"id": "c3", "nume": "Cristi"}]}))
+        self.assertEqual(changed, {"clients"})
+        self.assertEqual(self.replica.cursor, "12")
+        names = sorted(row["nume"] for row in self.replica.select('clients').data)
+        self.assertEqual(names, ["Ana Pop", "Bogdan", "Cristi"])
+
+    def test_full_snapshot_replaces_the_tables(self):
+        self.replica.apply(SNAPSHOT)
+        self.replica.apply(payload("20", full=True, changes={"clients": [{"id": "c9", "nume": "Nou"}]}))
+        self.assertEqual(self.replica.select('clients').data, [{"id": "c9", "nume": "Nou"}])
+        self.assertEqual(self.replica.select('orders').data, [])
+
+    def test_tombstones_delete_rows(self):
+        self.replica.apply(SNAPSHOT)
+        changed = self.replica.apply(payload("11", deleted={"clients": ["c2"], "order_balances": ["1"]}))
+        self.assertEqual(changed, {"clients", "order_balances"})
+        self.assertEqual([row["id"] for row in self.replica.select('clients').data], ["c1"])
+        self.assertEqual(self.replica.select_in('order_balances', 'order_id', [1]), [])
+
+    def test_filters_fields_and_count(self):
+        self.replica.apply(SNAPSHOT)
+        result = self.replica.select('orders', {'client_id': 'c1'}, 'id', count='exact')
+        self.assertEqual((result.data, result.count), ([{"id": 1}], 1))
+        # Ids from the query string are strings; stored ids are JSON numbers
+        self.assertEqual(self.replica.select('orders', {'id': '2'}).data, [{"id": 2, "client_id": "c2"}])
+        self.assertIsNone(self.replica.select('orders', fields='id, clients(nume)'))
+
+    def test_select_in_uses_the_key_column(self):
+        self.replica.apply(SNAPSHOT)
+        rows = self.replica.select_in('order_balances', 'order_id', [1, 2], 'order_id, paid')
+        self.assertEqual(rows, [{"order_id": 1, "paid": 150.0}])
+        self.assertEqual(len(self.replica.select_in('order_products', 'order_id', [1, 1, 2])), 3)
+
+    def test_order_totals_match_the_rpc(self):
+        self.replica.apply(SNAPSHOT)
+        totals = {row["order_id"]: row for row in self.replica.order_totals([1, 2])}
+        self.assertEqual((totals[1]["total"], totals[1]["paid"], totals[1]["refunded"]), (400.0, 150.0, 25.0))
+        self.assertEqual((totals[2]["total"], totals[2]["paid"], totals[2]["refunded"]), (50.0, 0.0, 0.0))
+
+    def test_local_writes(self):
+        self.replica.apply(SNAPSHOT)
+        self.replica.merge('clients', 'c1', {"telefon": "0700"})
+        self.assertEqual(self.replica.select('clients', {'id': 'c1'}).data, [{"id": "c1", "nume": "Ana", "telefon": "0700"}])
+        self.replica.delete('orders', 'client_id', 'c2')
+        self.assertEqual([row["id"] for row in self.replica.select('orders').data], [1])
+        self.replica.upsert('payments', [{"id": 101, "order_id": 2, "amount": 50.0}])
+        self.assertEqual(len(self.replica.select('payments', {'order_id': 2}).data), 1)
+
+class ReplicaSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.replica = Replica(":memory:", TABLES)
+        self.calls = []
+        self.changed = []
+
+    def sync(self, pages, outbox=None, replay=None):
+        def fetch_changes(cursor):
+            self.calls.append(cursor)
+            page = pages.pop(0)
+            if isinstance(page, Exception):
+                raise page
+            return page
+        return ReplicaSync(self.replica, fetch_changes, outbox=outbox, replay=replay, on_change=self.changed.append)
+
+    def test_pull_follows_the_cursor_while_there_is_more(self):
+        sync = self.sync([
+            SNAPSHOT,
+            payload("11", more=True, changes={"clients": [{"id": "c3", "nume": "Cristi"}]}),
+            payload("12", deleted={"clients": ["c1"]}),
+        ])
+        sync.pull()  # Snapshot only: "more" is false
+        sync.pull()
+        self.assertEqual(self.calls, [None, "10", "11"])
+        self.assertEqual(self.replica.cursor, "12")
+        self.assertEqual(sorted(row["id"] for row in self.replica.select('clients').data), ["c2", "c3"])
+        self.assertEqual(self.changed[1:], [{"clients"}, {"clients"}])
+        self.assertTrue(sync.online)
+
+    def test_failed_refresh_marks_the_replica_offline(self):
+        sync = self.sync([SNAPSHOT, ConnectionError("no route to host")])
+        self.assertTrue(sync.refresh())
+        self.assertFalse(sync.refresh())
+        self.assertFalse(sync.online)
+        self.assertIn("no route to host", sync.last_error)
+        self.assertEqual(self.replica.cursor, "10")  # The replica keeps serving what it has
+
+    def test_sync_once_replays_the_outbox_before_pulling(self):
+        outbox = Outbox(":memory:")
+        outbox.add("DELETE", "/delete_vehicle?vehicle_id=v1")
+        order = []
+        sync = self.sync([SNAPSHOT], outbox=outbox, replay=lambda entry: order.append(entry["path"]) or DONE)
+        self.calls = order
+        sync.sync_once()
+        self.assertEqual(order, ["/delete_vehicle?vehicle_id=v1", None])
+        self.assertEqual(outbox.stats()["pending"], 0)
+
+class OutboxTest(unittest.TestCase):
+    def setUp(self):
+        self.outbox = Outbox(":memory:")
+        for path in ("/a", "/b", "/c"):
+            self.outbox.add("PATCH", path, '{"x": 1}', "application/json")
+
+    def paths(self, state="pending"):
+        return [entry["path"] for entry in self.outbox.entries(state)]
+
+    def test_replays_in_order(self):
+        replayed = []
+        self.assertEqual(self.outbox.flush(lambda entry: replayed.append(entry["path"]) or DONE), 3)
+        self.assertEqual(replayed, ["/a", "/b", "/c"])
+        self.assertEqual(self.outbox.stats(), {"pending": 0, "failed": 0, "replayed": 3})
+
+    def test_retry_stops_the_flush_and_keeps_the_rest(self):
+        outcomes = {"/a": DONE, "/b": RETRY}
+        replayed = []
+        sent = self.outbox.flush(lambda entry: replayed.append(entry["path"]) or outcomes[entry["path"]])
+        self.assertEqual((sent, replayed), (1, ["/a", "/b"]))
+        self.assertEqual(self.paths(), ["/b", "/c"])
+
+    def test_exception_counts_as_retry(self):
+        def replay(entry):
+            raise ConnectionError("offline")
+        self.assertEqual(self.outbox.flush(replay), 0)
+        (first, *_) = self.outbox.entries()
+        self.assertEqual((first["path"], first["attempts"], first["last_error"]), ("/a", 1, "offline"))
+
+    def test_rejected_entry_is_set_aside(self):
+        outcomes = {"/a": DONE, "/b": (FAILED, "400 Bad Request"), "/c": DONE}
+        self.assertEqual(self.outbox.flush(lambda entry: outcomes[entry["path"]]), 2)
+        self.assertEqual(self.paths("failed"), ["/b"])
+        self.assertEqual(self.outbox.entries("failed")[0]["last_error"], "400 Bad Request")
+        self.assertEqual(self.paths(), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+# filepath: flask-app/response_cache.py
+# In-process TTL + LRU cache for the read-mostly Flask endpoints in app.py, and the
+# per-table versions their ETags are derived from.
+import math
+import threading
+import time
+from collections import OrderedDict
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache with tag-based invalidation and hit/miss statistics.
+
+    Each entry carries the tables it was built from (e.g. {"orders", "payments"})
+    and, for per-client endpoints, the client id. Writes invalidate by table,
+    optionally narrowed to one client.
+    """
+    def __init__(self, max_entries=512, ttl_seconds=30):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, tables, client_id, value)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+        self._endpoint_stats = {}
+
+    def _count(self, endpoint, outcome):
+        self._stats[outcome] += 1
+        stats = self._endpoint_stats.setdefault(endpoint, {"hits": 0, "misses": 0})
+        stats[outcome] += 1
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss (key[0] is the endpoint name)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._count(key[0], "misses")
+                return None
+            self._entries.move_to_end(key)
+            self._count(key[0], "hits")
+            return entry[3]
+
+    def set(self, key, value, tables, client_id=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, frozenset(tables), client_id, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, tables, client_id=None):
+        """Drop entries built from any of tables.
+
+        With client_id, entries scoped to another client are kept; entries that
+        are not client-scoped (lists, reports) are always dropped.
+        """
+        tables = set(tables)
+        with self._lock:
+            stale = [
+                key for key, (_, entry_tables, entry_client, _) in self._entries.items()
+                if entry_tables & tables and (client_id is None or entry_client in (None, client_id))
+            ]
+            for key in stale:
+                del self._entries[key]
+            self._stats["invalidations"] += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            endpoints = {}
+            for endpoint, stats in self._endpoint_stats.items():
+                total = stats["hits"] + stats["misses"]
+                endpoints[endpoint] = {**stats, "hit_rate": round(stats["hits"] / total, 3) if total else 0.0}
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "endpoints": endpoints
+            }
+
+class TableVersions:
+    """Per-table version counters behind the ETag / Last-Modified of cached endpoints.
+
+    Write routes bump() the tables they change. Writes made by other desktops
+    go straight to Supabase and bump nothing, so, like cache entries, a
+    version is only trusted for max_age_seconds: the first lookup after that
+    moves the table to a new version. Versions start from a per-process epoch
+    so that tags handed out before a restart never validate afterwards.
+
+    Every new version also gets a modification time in whole seconds, larger
+    than any handed out before, so Last-Modified changes whenever the tag does.
+    """
+    def __init__(self, max_age_seconds=30):
+        self.max_age_seconds = max_age_seconds
+        self.epoch = format(int(time.time() * 1000) & 0xffffffff, "x")
+        self._versions = {}  # table -> (version, valid_until, modified_at)
+        self._start_stamp = self._last_stamp = math.ceil(time.time())
+        self._lock = threading.Lock()
+        self._bumps = 0
+
+    def _stamp(self):
+        self._last_stamp = max(math.ceil(time.time()), self._last_stamp + 1)
+        return self._last_stamp
+
+    def _renew(self, table, now):
+        entry = self._versions.get(table)
+        if entry is None:  # First version of the table: unchanged since start as far as we know
+            entry = (1, now + self.max_age_seconds, self._start_stamp)
+        else:
+            entry = (entry[0] + 1, now + self.max_age_seconds, self._stamp())
+        self._versions[table] = entry
+        return entry
+
+    def bump(self, tables):
+        now = time.monotonic()
+        with self._lock:
+            for table in tables:
+                version = self._versions.get(table, (0,))[0]
+                self._versions[table] = (version + 1, now + self.max_age_seconds, self._stamp())
+            self._bumps += 1
+
+    def validators(self, tables):
+        """(etag, last_modified) for a response built from tables.
+
+        The tag names every table's current version; last_modified is the
+        newest of their modification times (Unix seconds).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entries = []
+            for table in sorted(set(tables)):
+                entry = self._versions.get(table)
+                entries.append(entry if entry is not None and entry[1] >= now else self._renew(table, now))
+        tag = self.epoch + "-" + ".".join(str(entry[0]) for entry in entries)
+        return tag, max(entry[2] for entry in entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "epoch": self.epoch,
+                "bumps": self._bumps,
+                "max_age_seconds": self.max_age_seconds,
+                "tables": {table: version for table, (version, _, _) in sorted(self._versions.items())},
+            }
@@ -1,9 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
+from background_api import api
 import re
 
-API = "http://127.0.0.1:5000"  # adjust if needed
 
 # Module-level UUID regex
 _UUID_RE = re.compile(
@@ -86,22 +85,28 @@ class ReturnDetailDialog(tk.Toplevel):
             "return_qty": qty,
             "notes": notes
         }
-        try:
-            resp = requests.post(f"{API}/add_return", json=payload)
-            data = resp.json()
-            if resp.ok:
-                messagebox.showinfo(
-                    "Succes",
-                    f"Return înregistrat pentru {self.item['client_name']}.\n"
-                    f"Refund: {data['refund']:.2f} RON"
-                )
-                self.destroy()
-                # Tell the parent to reload
-                self.master.load_all_items()
-            else:
-                messagebox.showerror("Eroare", data.get("error", ""))
-        except Exception as e:
-            messagebox.showerror("Eroare", str(e))
+        if api.is_busy(self):
+            return  # Still saving the previous click
+
+        def on_saved(resp):
+            try:
+                data = resp.json()
+                if resp.ok:
+                    messagebox.showinfo(
+                        "Succes",
+                        f"Return înregistrat pentru {self.item['client_name']}.\n"
+                        f"Refund: {data['refund']:.2f} RON"
+                    )
+                    self.destroy()
+                    # Tell the parent to reload
+                    self.master.load_all_items()
+                else:
+                    messagebox.showerror("Eroare", data.get("error", ""))
+            except Exception as e:
+                messagebox.showerror("Eroare", str(e))
+
+        api.post(self, "/add_return", json=payload, on_success=on_saved,
+                 on_error=lambda e: messagebox.showerror("Eroare", str(e)))
 
 
 class ReturnWindow(tk.Toplevel):
@@ -215,24 +220,24 @@ class ReturnWindow(tk.Toplevel):
         # Bind double-click to open detail dialog
         self.tree.bind("<Double-1>", self.open_detail_dialog)
 
-    def _resolve_order_id(self, entered):
+    def _resolve_order_id(self, entered, on_resolved):
         """
-        Resolve `entered` as either an order_number (e.g., CMD78) or an order_id (UUID/integer).
-        If it's already a UUID/integer, return it directly. Otherwise, fetch the order_id via GET /orders/<order_number>.
+        Resolve `entered` as either an order_number (e.g., CMD78) or an order_id (UUID/integer) and call
+        on_resolved(order_id), with None if the order was not found. A UUID/integer is passed on directly;
+        otherwise the order_id is fetched in the background via GET /orders/<order_number>.
         """
         entered = entered.strip()
         if entered.isdigit() or _UUID_RE.match(entered):
-            return entered
+            on_resolved(entered)
+            return
+
+        def on_success(resp):
+            order_id = str(resp.json().get("id", "")) if resp.status_code == 200 else ""
+            on_resolved(order_id or None)
 
         # Otherwise treat it as an order_number – normalize to uppercase
         entered_norm = entered.upper()
-        try:
-            resp = requests.get(f"{API}/orders/{entered_norm}")
-            if resp.status_code == 200:
-                return str(resp.json().get("id", ""))
-        except Exception:
-            pass
-        return None
+        api.get(self, f"/orders/{entered_norm}", on_success=on_success, on_error=lambda e: on_resolved(None))
 
     def load_all_items(self):
         """
@@ -242,24 +247,24 @@ class ReturnWindow(tk.Toplevel):
         if not entered:
             return messagebox.showerror("Eroare", "Vă rugăm să introduceți un ID sau Număr de Comandă.")
 
-        resolved = self._resolve_order_id(entered)
-        print(f"[DEBUG] Resolved order_id: {resolved!r}")  # Debug statement
-        if not resolved:
-            return messagebox.showerror("Eroare", f"Comanda '{entered}' nu a fost găsită.")
+        def on_resolved(resolved):
+            print(f"[DEBUG] Resolved order_id: {resolved!r}")  # Debug statement
+            if not resolved:
+                return messagebox.showerror("Eroare", f"Comanda '{entered}' nu a fost găsită.")
+            api.get(self, "/returnable_items", params={"order_id": resolved}, on_success=on_items_loaded,
+                    on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare la încărcarea produselor:\n{e}"))
 
-        try:
-            resp = requests.get(f"{API}/returnable_items", params={"order_id": resolved})
+        def on_items_loaded(resp):
             items = resp.json() if resp.status_code == 200 else []
+            # Ensure additional fields are included
             for itm in items:
                 itm.setdefault("order_date", "")
                 itm.setdefault("client_name", "")
                 itm.setdefault("vehicle_desc", "")
-            # Ensure additional fields are included
-        except Exception as e:
-            return messagebox.showerror("Eroare", f"A apărut o eroare la încărcarea produselor:\n{e}")
+            # Populate the Treeview with all items
+            self._populate_tree(items)
 
-        # Populate the Treeview with all items
-        self._populate_tree(items)
+        self._resolve_order_id(entered, on_resolved)
 
     def search_by_code(self):
         """
@@ -276,21 +281,20 @@ class ReturnWindow(tk.Toplevel):
         cleaned = code.replace('-', '')
 
         if entered:
-            resolved = self._resolve_order_id(entered)
-            if not resolved:
-                return messagebox.showerror("Eroare", f"Comanda '{entered}' nu a fost găsită.")
-
-            try:
-                resp = requests.get(
-                    f"{API}/order_products/search_any",
-                    params={"order_id": resolved, "term": cleaned}
+            def on_resolved(resolved):
+                if not resolved:
+                    return messagebox.showerror("Eroare", f"Comanda '{entered}' nu a fost găsită.")
+                api.get(
+                    self, "/order_products/search_any",
+                    params={"order_id": resolved, "term": cleaned},
+                    # Populate the Treeview with the retrieved items
+                    on_success=lambda resp: self._populate_tree(resp.json() if resp.status_code == 200 else []),
+                    on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare la căutarea produsului după ID Comandă:\n{e}")
                 )
-                items = resp.json() if resp.status_code == 200 else []
-            except Exception as e:
-                return messagebox.showerror("Eroare", f"A apărut o eroare la căutarea produsului după ID Comandă:\n{e}")
+
+            self._resolve_order_id(entered, on_resolved)
         else:
-            try:
-                resp = requests.get(f"{API}/order_products/search_global", params={"term": cleaned})
+            def on_found(resp):
                 raw = resp.json() if resp.status_code == 200 else []
                 items = [{
                     "id": row["id"],
@@ -304,10 +308,11 @@ class ReturnWindow(tk.Toplevel):
                     "client_name": row.get("client_name", ""),
                     "vehicle_desc": row.get("vehicle_desc", "")
                 } for row in raw]
-            except Exception as e:
-                return messagebox.showerror("Eroare", f"A apărut o eroare la căutarea produsului global:\n{e}")
-        # Populate the Treeview with the retrieved items
-        self._populate_tree(items)
+                # Populate the Treeview with the retrieved items
+                self._populate_tree(items)
+
+            api.get(self, "/order_products/search_global", params={"term": cleaned}, on_success=on_found,
+                    on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare la căutarea produsului global:\n{e}"))
 
     def _populate_tree(self, items):
         """
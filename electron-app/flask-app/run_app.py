@@ -1,7 +1,6 @@
 import sys
 import os
 import threading
-import time
 import traceback
 import logging
 import tkinter as tk
@@ -41,8 +40,9 @@ if missing:
 
 # 2) Import your Flask app & login UI under try/except
 try:
-    from app import app as flask_app
+    from app import run_server
     from login import LoginApp
+    from startup import Startup, default_steps
 except Exception:
     tb = traceback.format_exc()
     logging.error("Import failure:\n" + tb)
@@ -57,7 +57,7 @@ except Exception:
 
 def start_flask():
     try:
-        flask_app.run(host="127.0.0.1", port=5000, use_reloader=False)
+        run_server(host="127.0.0.1", port=5000)
     except Exception:
         tb = traceback.format_exc()
         logging.error("Flask startup failed:\n" + tb)
@@ -76,10 +76,11 @@ if __name__ == "__main__":
     t = threading.Thread(target=start_flask, daemon=True)
     t.start()
 
-    # 4) Give Flask a moment
-    time.sleep(1.5)
+    # 4) Wait for /health and warm the GUI caches in the background; the loader
+    #    shown after login follows these steps and opens the dashboard once they finish
+    startup = Startup(default_steps()).start()
 
     # 5) Launch your login UI
     root = tk.Tk()
-    LoginApp(root)
+    LoginApp(root, startup=startup)
     root.mainloop()
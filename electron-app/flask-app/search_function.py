@@ -1,11 +1,10 @@
-import requests
+from api_client import api_client
+from background_api import api
 from tkinter import Tk, Toplevel, Label, Entry, Button, Listbox, END, messagebox, ttk, Frame
 import unicodedata
 import tkinter as tk
 from tkinter import ttk, messagebox, Menu
 import subprocess  # Add this import for running external scripts
-from supabase import create_client, Client  # Import Supabase client
-from config import SUPABASE_URL, SUPABASE_KEY  # Import Supabase configuration
 import os  # Add this import for handling paths
 import json  # Add this import for handling JSON
 from customer_dashboard import CustomerDashboardApp  # Import the CustomerDashboardApp class
@@ -19,9 +18,6 @@ import sys  # Add this import to resolve the undefined variable error
 from new_offer import open_add_offer_window  # Import the function to open the add offer window
 from edit_offer import open_edit_offer_window  # Import the function to open the edit offer window
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 # Configure logging to save debug statements into a .txt file
 LOG_FILE = os.path.join(os.path.dirname(__file__), 'debug_log.txt')
 logging.basicConfig(
@@ -30,6 +26,9 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Rows per page in the search tabs (the server caps per_page at 500)
+SEARCH_PAGE_SIZE = 50
+
 def normalize_text(text):
     """Normalize text by removing diacritics, converting to lowercase, and stripping whitespace."""
     if not text:
@@ -57,7 +56,7 @@ def search_customer(customers, query):
 
 def search_database(query, category):
     try:
-        response = requests.get(f'http://127.0.0.1:5000/search', params={'query': query, 'category': category})
+        response = api_client.get('/search', params={'query': query, 'category': category})
         if response.status_code == 200:
             return response.json()
         else:
@@ -228,13 +227,17 @@ def perform_search(query, categories, results_notebook):
     for tab in results_notebook.tabs():
         results_notebook.forget(tab)
 
-    # 2) Always build the “Clienti” tab first, if enabled
-    client_results = []
+    # 2) Always build the “Clienti” tab first, if enabled; the other tabs
+    #    depend on which clients matched, so they are added once it loads
     if categories["Clienți"].get():
         clients_tab = ttk.Frame(results_notebook)
-        client_results = fetch_results(query, "clients", clients_tab, results_notebook, {}, "Clienti") or []
-        results_notebook.add(clients_tab, text=f"Clienti ({len(client_results)})")
+        results_notebook.add(clients_tab, text="Clienti (...)")
+        fetch_results(query, "clients", clients_tab, results_notebook, {}, "Clienti",
+                      on_first_page=lambda client_results: add_category_tabs(query, categories, results_notebook, client_results))
+    else:
+        add_category_tabs(query, categories, results_notebook, [])
 
+def add_category_tabs(query, categories, results_notebook, client_results):
     # 3) Now for each of Vehicule, Comenzi, Oferte
     for label, (backend_cat, tab_name) in {
         "Vehicule": ("vehicles", "Vehicule"),
@@ -244,133 +247,189 @@ def perform_search(query, categories, results_notebook):
         if not categories[label].get():
             continue
 
+        # 4) Always add the tab (even if count = 0); the count is filled in when results arrive
         tab = ttk.Frame(results_notebook)
+        results_notebook.add(tab, text=f"{tab_name} (...)")
 
-        # 3a) If we have client_results, fetch by client_id via your REST endpoints
+        # 3a) If we have client_results, fetch all their rows with one batched call per tab;
+        #     the three calls run in parallel and each tab fills in when its response arrives
         if client_results:
-            combined = []
-            for client in client_results:
-                cid = client.get("id")
-                if not cid:
-                    continue
-                resp = requests.get(
-                    f"http://127.0.0.1:5000/{backend_cat}",
-                    params={"client_id": cid}
-                )
-                if resp.status_code == 200:
-                    combined.extend(resp.json())
-
-            # Render or show “no results”
-            if backend_cat == "vehicles":
-                if combined:
-                    render_vehicle_items(tab, combined)
-                else:
-                    ttk.Label(tab,
-                        text="⚠️ Nu s-au găsit vehicule pentru acest client.",
-                        font=("Segoe UI", 12)
-                    ).pack(padx=20, pady=20)
-            elif backend_cat == "orders":
-                if combined:
-                    render_orders_notebook(tab, combined)
-                else:
-                    ttk.Label(tab,
-                        text="⚠️ Nu s-au găsit comenzi pentru acest client.",
-                        font=("Segoe UI", 12)
-                    ).pack(padx=20, pady=20)
-            else:  # offers
-                if combined:
-                    render_offers_notebook(tab, combined)
-                else:
-                    ttk.Label(tab,
-                        text="⚠️ Nu s-au găsit oferte pentru acest client.",
-                        font=("Segoe UI", 12)
-                    ).pack(padx=20, pady=20)
-
-            count = len(combined)
+            load_client_batch(results_notebook, tab, backend_cat, tab_name, client_results)
 
         # 3b) Otherwise fallback to your full-text RPC
         else:
-            results = fetch_results(query, backend_cat, tab, results_notebook, {}, tab_name) or []
-            count = len(results)
-
-        # 4) Always add the tab (even if count = 0)
-        results_notebook.add(tab, text=f"{tab_name} ({count})")
-
-def fetch_results(query, category, tab_frame, results_notebook, related_data, tab_name, page=1, per_page=20):
-    try:
-        # Ensure related_data is initialized for the category
-        if category not in related_data:
-            related_data[category] = set()
-
-        # Clear previous results
-        for widget in tab_frame.winfo_children():
-            widget.destroy()
-
-        # API call to fetch universal search results
-        print(f"[DEBUG] Fetching results for query='{query}', category='{category}'")
-        response = supabase.rpc("search_universal", {
-            "query": query,
-            "category": category,
-            "page": page,
-            "per_page": per_page
-        }).execute()
-
-        # Log the raw response from Supabase
-        print(f"[DEBUG] Raw Supabase response: {response.data}")
-
-        if response.data:
-            results = response.data
-
-            if category == "vehicles":
-                for item in results:
-                    vehicle = item.get("vehicle", {})
-                    offers = item.get("offers", [])
-                    orders = item.get("orders", [])
-
-                    # Render the vehicle details
-                    render_vehicle_details(tab_frame, vehicle)
-
-                    # Create a parent frame for stacking
-                    sections_frame = ttk.Frame(tab_frame)
-                    sections_frame.pack(fill="both", expand=True)
-
-                    # Render the offers section
-                    if offers:
-                        offers_frame = ttk.Frame(sections_frame)
-                        offers_frame.pack(fill="x", pady=10)  # Add padding between sections
-                        ttk.Label(offers_frame, text="Oferte", font=("Segoe UI", 12, "bold")).pack(anchor="w", pady=5)
-                        render_offers_notebook(offers_frame, offers)
-
-                    # Render the orders section
-                    if orders:
-                        orders_frame = ttk.Frame(sections_frame)
-                        orders_frame.pack(fill="x", pady=10)  # Add padding between sections
-                        ttk.Label(orders_frame, text="Comenzi", font=("Segoe UI", 12, "bold")).pack(anchor="w", pady=5)
-                        render_orders_notebook(orders_frame, orders)
-
-                return results  # Return results to determine if the tab should be added
-            else:
-                render_results(tab_frame, category, results)
-                return results  # Return results to determine if the tab should be added
+            fetch_results(query, backend_cat, tab, results_notebook, {}, tab_name)
+
+def load_client_batch(results_notebook, tab, backend_cat, tab_name, client_results):
+    """Fetch vehicles/orders/offers for all matched clients via /<category>/by_clients in the background."""
+    client_ids = [client["id"] for client in client_results if client.get("id")]
+
+    def on_loaded(resp):
+        grouped = resp.json() if resp.status_code == 200 else {}
+        # Keep the clients' order from the Clienti tab
+        combined = [row for cid in client_ids for row in grouped.get(cid, [])]
+        render_client_batch(tab, backend_cat, combined)
+        results_notebook.tab(tab, text=f"{tab_name} ({len(combined)})")
+
+    def on_error(e):
+        print(f"[ERROR] Exception loading {backend_cat} for matched clients: {e}")
+        render_client_batch(tab, backend_cat, [])
+        results_notebook.tab(tab, text=f"{tab_name} (0)")
+
+    api.get(results_notebook.winfo_toplevel(), f"/{backend_cat}/by_clients",
+            params={"client_ids": ",".join(client_ids)},
+            on_success=on_loaded, on_error=on_error)
+
+def render_client_batch(tab, backend_cat, combined):
+    # Render or show “no results”
+    if backend_cat == "vehicles":
+        if combined:
+            render_vehicle_items(tab, combined)
         else:
-            ttk.Label(tab_frame, text=f"Nu s-au găsit rezultate pentru categoria '{category}'.", font=("Segoe UI", 12)).grid(row=0, column=0, pady=20)
-            return []  # Return empty list if no results
-    except Exception as e:
+            ttk.Label(tab,
+                text="⚠️ Nu s-au găsit vehicule pentru acest client.",
+                font=("Segoe UI", 12)
+            ).pack(padx=20, pady=20)
+    elif backend_cat == "orders":
+        if combined:
+            render_orders_notebook(tab, combined)
+        else:
+            ttk.Label(tab,
+                text="⚠️ Nu s-au găsit comenzi pentru acest client.",
+                font=("Segoe UI", 12)
+            ).pack(padx=20, pady=20)
+    else:  # offers
+        if combined:
+            render_offers_notebook(tab, combined)
+        else:
+            ttk.Label(tab,
+                text="⚠️ Nu s-au găsit oferte pentru acest client.",
+                font=("Segoe UI", 12)
+            ).pack(padx=20, pady=20)
+
+def fetch_results(query, category, tab_frame, results_notebook, related_data, tab_name, per_page=SEARCH_PAGE_SIZE, on_first_page=None):
+    """Load /search_universal results for one tab in the background.
+
+    The server streams one page per NDJSON line: the first page is rendered
+    as soon as it arrives and later pages are kept for the pagination
+    controls (a page asked for before it arrives is shown when it does).
+    on_first_page(results) is called once with the first page (an empty list
+    on errors or no results).
+    """
+    # Ensure related_data is initialized for the category
+    if category not in related_data:
+        related_data[category] = set()
+
+    search = {"query": query, "category": category, "tab_name": tab_name, "per_page": per_page,
+              "pages": [], "index": 0, "wanted": None, "results_notebook": results_notebook}
+
+    def notify(results):
+        if on_first_page:
+            on_first_page(results)
+
+    def on_line(line):
+        search["pages"].append(json.loads(line))
+        if len(search["pages"]) == 1:
+            first = search["pages"][0]
+            results_notebook.tab(tab_frame, text=f"{tab_name} ({first['total']})")
+            show_search_page(tab_frame, search, 0)
+            notify(first["results"])
+        elif search["wanted"] == len(search["pages"]) - 1:
+            show_search_page(tab_frame, search, search["wanted"])
+
+    def on_stream_cut():
+        # The stream ended before the page the user moved to
+        search["wanted"] = None
+        show_search_message(tab_frame, f"Eroare la încărcarea «{tab_name}»: rezultatele nu au sosit complet.", error=True)
+
+    def on_done(response):
+        if search["pages"]:
+            if search["wanted"] is not None:
+                on_stream_cut()
+            return
+        if response.status_code == 200:
+            show_search_message(tab_frame, f"Nu s-au găsit rezultate pentru categoria '{category}'.")
+        else:
+            show_search_message(tab_frame, f"Eroare la încărcarea «{tab_name}»: cod {response.status_code}", error=True)
+        results_notebook.tab(tab_frame, text=f"{tab_name} (0)")
+        notify([])
+
+    def on_error(e):
         print(f"[ERROR] Exception during fetch_results for category='{category}': {e}")
-        # Clear any partial widgets
-        for w in tab_frame.winfo_children():
-            w.destroy()
+        if search["pages"]:
+            if search["wanted"] is not None:
+                on_stream_cut()
+            return
         # Show error in-tab
-        ttk.Label(
-            tab_frame,
-            text=f"Eroare la încărcarea «{tab_name}»: {e}",
-            foreground="red",
-            font=("Segoe UI", 12, "italic"),
-            wraplength=600,
-            justify="center"
-        ).grid(row=0, column=0, padx=10, pady=20, sticky="nsew")
-        # Return an empty list so we still signal “handled”
-        return []
+        show_search_message(tab_frame, f"Eroare la încărcarea «{tab_name}»: {e}", error=True)
+        results_notebook.tab(tab_frame, text=f"{tab_name} (0)")
+        # Signal “handled” with no results
+        notify([])
+
+    print(f"[DEBUG] Fetching results for query='{query}', category='{category}'")
+    api.stream_lines(results_notebook.winfo_toplevel(), "/search_universal",
+                     on_line, on_done, on_error,
+                     params={"query": query, "category": category, "per_page": per_page, "stream": 1})
+
+def show_search_message(tab_frame, text, error=False):
+    # Clear any partial widgets
+    for widget in tab_frame.winfo_children():
+        widget.destroy()
+    if error:
+        ttk.Label(tab_frame, text=text, foreground="red", font=("Segoe UI", 12, "italic"),
+                  wraplength=600, justify="center").pack(padx=10, pady=20)
+    else:
+        ttk.Label(tab_frame, text=text, font=("Segoe UI", 12)).pack(pady=20)
+
+def show_search_page(tab_frame, search, index):
+    """Render page `index` of a tab's search results, or show it once the stream delivers it."""
+    pages = search["pages"]
+    if index >= len(pages):
+        search["wanted"] = index  # Still streaming: fetch_results renders it on arrival
+        return
+
+    search["wanted"] = None
+    search["index"] = index
+    page = pages[index]
+    results = page["results"]
+    category = search["category"]
+
+    # Clear previous results
+    for widget in tab_frame.winfo_children():
+        widget.destroy()
+
+    add_pagination_controls(tab_frame, search)
+    content = ttk.Frame(tab_frame)
+    content.pack(side="top", fill="both", expand=True)
+
+    if category == "vehicles":
+        for item in results:
+            vehicle = item.get("vehicle", {})
+            offers = item.get("offers", [])
+            orders = item.get("orders", [])
+
+            # Render the vehicle details
+            render_vehicle_details(content, vehicle)
+
+            # Create a parent frame for stacking
+            sections_frame = ttk.Frame(content)
+            sections_frame.pack(fill="both", expand=True)
+
+            # Render the offers section
+            if offers:
+                offers_frame = ttk.Frame(sections_frame)
+                offers_frame.pack(fill="x", pady=10)  # Add padding between sections
+                ttk.Label(offers_frame, text="Oferte", font=("Segoe UI", 12, "bold")).pack(anchor="w", pady=5)
+                render_offers_notebook(offers_frame, offers)
+
+            # Render the orders section
+            if orders:
+                orders_frame = ttk.Frame(sections_frame)
+                orders_frame.pack(fill="x", pady=10)  # Add padding between sections
+                ttk.Label(orders_frame, text="Comenzi", font=("Segoe UI", 12, "bold")).pack(anchor="w", pady=5)
+                render_orders_notebook(orders_frame, orders)
+    else:
+        render_results(content, category, results)
 
 def render_vehicle_details(tab_frame, vehicle):
     """Render the details of a vehicle."""
@@ -1017,29 +1076,27 @@ def render_order_product_items(tab_frame, data):
             unique_data.append(item)
     render_product_items(tab_frame, unique_data, is_offer=False)
 
-def add_pagination_controls(tab_frame, query, category, results_notebook, page, per_page, total_results):
-    """Add pagination controls to the tab frame."""
-    # Clear previous pagination controls
-    for widget in tab_frame.winfo_children():
-        if isinstance(widget, ttk.Frame):
-            widget.destroy()
+def add_pagination_controls(tab_frame, search):
+    """Add pagination controls to the bottom of the tab frame."""
+    page = search["pages"][search["index"]]
+    total_pages = max((page["total"] + search["per_page"] - 1) // search["per_page"], 1)
+    if total_pages == 1:
+        return
 
     pagination_frame = ttk.Frame(tab_frame)
-    pagination_frame.grid(row=1, column=0, sticky="ew", pady=10)
-
-    total_pages = (total_results + per_page - 1) // per_page
+    pagination_frame.pack(side="bottom", fill="x", pady=10)
 
     # Add "Anterior" button if there is a previous page
-    if page > 1:
-        prev_button = ttk.Button(pagination_frame, text="⬅️ Anterior", command=lambda: fetch_results(query, category, tab_frame, results_notebook, {}, category, page - 1, per_page))
+    if page["prev_cursor"]:
+        prev_button = ttk.Button(pagination_frame, text="⬅️ Anterior", command=lambda: show_search_page(tab_frame, search, search["index"] - 1))
         prev_button.grid(row=0, column=0, padx=5)
 
     # Display current page and total pages
-    ttk.Label(pagination_frame, text=f"Pagina {page} din {total_pages}").grid(row=0, column=1, padx=5)
+    ttk.Label(pagination_frame, text=f"Pagina {page['page']} din {total_pages}").grid(row=0, column=1, padx=5)
 
     # Add "Următor" button if there is a next page
-    if page < total_pages:
-        next_button = ttk.Button(pagination_frame, text="➡️ Următor", command=lambda: fetch_results(query, category, tab_frame, results_notebook, {}, category, page + 1, per_page))
+    if page["next_cursor"]:
+        next_button = ttk.Button(pagination_frame, text="➡️ Următor", command=lambda: show_search_page(tab_frame, search, search["index"] + 1))
         next_button.grid(row=0, column=2, padx=5)
 
 def open_customer_dashboard(client_id):
@@ -1081,7 +1138,7 @@ def refresh_vehicle_tab(results_notebook, client_id):
         # Perform a universal search for vehicles by client_id
         query = client_id
         category = "vehicles"
-        response = requests.get(f'http://127.0.0.1:5000/search', params={'query': query, 'category': category})
+        response = api_client.get('/search', params={'query': query, 'category': category})
         
         if response.status_code == 200:
             vehicles = response.json()
@@ -1108,7 +1165,7 @@ def turn_into_order(offer):
     """Transform an offer into an order."""
     try:
         # Assuming `offer` contains the necessary details to create an order
-        response = requests.post('http://127.0.0.1:5000/orders', json=offer)
+        response = api_client.post('/orders', json=offer)
         if response.status_code == 200:
             messagebox.showinfo("Succes", "Oferta a fost transformată cu succes în comandă!")
         else:
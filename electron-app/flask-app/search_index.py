@@ -0,0 +1,326 @@
+# filepath: flask-app/search_index.py
+# Embedded full-text index (SQLite FTS5, trigram tokenizer) over clients, vehicles
+# and offer/order products. Built from Supabase at startup by app.py and kept in
+# sync by its write routes.
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from datetime import datetime
+
+SCHEMA = """
+create table if not exists search_docs (
+    rowid     integer primary key,
+    kind      text not null,
+    doc_id    text not null,
+    parent    text,
+    client_id text,
+    data      text not null,
+    unique (kind, doc_id)
+);
+
+create table if not exists search_keys (
+    doc  integer not null,
+    kind text not null,
+    key  text not null
+);
+
+create index if not exists search_docs_parent_idx on search_docs (kind, parent);
+create index if not exists search_docs_client_id_idx on search_docs (client_id);
+create index if not exists search_keys_key_idx on search_keys (key, kind, doc);
+create index if not exists search_keys_doc_idx on search_keys (doc);
+
+create virtual table if not exists search_fts using fts5(kind unindexed, body, tokenize = 'trigram');
+"""
+
+# kind -> (fields matched by prefix, fields matched anywhere by the trigram index)
+KIND_FIELDS = {
+    "client": (("nume", "telefon"), ("nume", "telefon", "localitate", "judet", "adresa", "email")),
+    "vehicle": (("numar_inmatriculare", "vin"), ("numar_inmatriculare", "vin", "marca", "model", "an")),
+    "offer_product": (("cod_produs",), ("cod_produs", "produs", "brand")),
+    "order_product": (("cod_produs",), ("cod_produs", "produs", "brand")),
+}
+
+# Row field holding the parent document of each product kind
+PARENT_FIELD = {"offer_product": "offer_number", "order_product": "order_id"}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+def fold(text):
+    """Same folding as normalize_text in search_function.py: NFKC, strip, drop diacritics, lowercase."""
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKC', str(text).strip())
+    text = ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
+    return text.lower()
+
+def compact(text):
+    """Folded text without spaces and punctuation, so 'B-12-ABC' and 'b 12 abc' both become 'b12abc'."""
+    return _NON_ALNUM.sub("", fold(text))
+
+def _keys(row, fields):
+    keys = set()
+    for field in fields:
+        value = fold(row.get(field))
+        if not value:
+            continue
+        words = value.split()
+        keys.update(" ".join(words[start:]) for start in range(len(words)))
+        keys.add(compact(value))
+    keys.discard("")
+    return keys
+
+def _body(row, key_fields, text_fields):
+    parts = [fold(row.get(field)) for field in text_fields]
+    parts.extend(compact(row.get(field)) for field in key_fields)
+    return " ".join(part for part in parts if part)
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+def _typo_variants(term):
+    """FTS5 expression matching term with one character missing, extra or replaced.
+
+    Position i is split into the parts before and after it; both parts must
+    appear (each at least one trigram long), so a term of n characters
+    becomes up to n alternatives joined by OR.
+    """
+    options = []
+    for i in range(len(term)):
+        for head, tail in ((term[:i], term[i + 1:]), (term[:i], term[i:])):
+            if len(head) >= 3 and len(tail) >= 3:
+                options.append(f"({_quote(head)} AND {_quote(tail)})")
+            elif len(head) >= 3 and not tail or len(tail) >= 3 and not head:
+                options.append(_quote(head or tail))
+    options = list(dict.fromkeys(options)) or [_quote(term)]
+    return "(" + " OR ".join(options) + ")"
+
+class SearchIndex:
+    """Prefix and substring search over folded (diacritic-free, lowercase) text.
+
+    Every document is a row of one of KIND_FIELDS. Prefix matches on the key
+    fields (or on any word of them) rank first, then trigram substring matches
+    anywhere in the text fields. When neither finds anything and `fuzzy` is
+    set, terms are retried with one character dropped or replaced, which
+    catches the usual single typo.
+
+    Writes made while rebuild() is loading a fresh snapshot are journaled and
+    replayed on top of it, so a slow rebuild cannot lose them.
+    """
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._journal = None
+        self.built_at = None
+        self.build_ms = None
+        # A persistent index answers from its last state until the next rebuild
+        self.ready = self.conn.execute("select exists (select 1 from search_docs)").fetchone()[0] == 1
+
+    # -- writes --------------------------------------------------------------
+
+    def _insert(self, kind, row, client_id=None, replace=True):
+        key_fields, text_fields = KIND_FIELDS[kind]
+        doc_id = str(row["id"])
+        parent_field = PARENT_FIELD.get(kind)
+        parent = row.get(parent_field) if parent_field else None
+        if kind == "client":
+            client_id = row["id"]
+        elif client_id is None:
+            client_id = row.get("client_id")
+        if replace:
+            self._delete_where("kind = ? and doc_id = ?", (kind, doc_id))
+        cursor = self.conn.execute(
+            "insert into search_docs (kind, doc_id, parent, client_id, data) values (?, ?, ?, ?, ?)",
+            (kind, doc_id, None if parent is None else str(parent), client_id, json.dumps(row, default=str)),
+        )
+        rowid = cursor.lastrowid
+        self.conn.executemany(
+            "insert into search_keys (doc, kind, key) values (?, ?, ?)",
+            [(rowid, kind, key) for key in _keys(row, key_fields)],
+        )
+        self.conn.execute(
+            "insert into search_fts (rowid, kind, body) values (?, ?, ?)",
+            (rowid, kind, _body(row, key_fields, text_fields)),
+        )
+
+    def _delete_where(self, condition, params):
+        rowids = [row[0] for row in self.conn.execute(f"select rowid from search_docs where {condition}", params)]
+        if not rowids:
+            return 0
+        marks = ",".join("?" * len(rowids))
+        self.conn.execute(f"delete from search_fts where rowid in ({marks})", rowids)
+        self.conn.execute(f"delete from search_keys where doc in ({marks})", rowids)
+        self.conn.execute(f"delete from search_docs where rowid in ({marks})", rowids)
+        return len(rowids)
+
+    def _write(self, name, *args):
+        with self._lock, self.conn:
+            getattr(self, name)(*args)
+            if self._journal is not None:
+                self._journal.append((name, args))
+
+    def upsert(self, kind, rows, client_id=None):
+        """Add or replace rows (dicts with an "id") of one kind."""
+        self._write("_upsert", kind, list(rows), client_id)
+
+    def _upsert(self, kind, rows, client_id):
+        for row in rows:
+            self._insert(kind, row, client_id)
+
+    def remove(self, kind, doc_id):
+        self._write("_delete_where", "kind = ? and doc_id = ?", (kind, str(doc_id)))
+
+    def replace_children(self, kind, parent, rows, client_id=None):
+        """Replace every product row of one offer/order (kind, parent) with rows."""
+        self._write("_replace_children", kind, str(parent), list(rows), client_id)
+
+    def _replace_children(self, kind, parent, rows, client_id):
+        self._delete_where("kind = ? and parent = ?", (kind, parent))
+        self._upsert(kind, rows, client_id)
+
+    def remove_client(self, client_id):
+        """Drop a client and everything indexed under it (vehicles, products of its offers and orders)."""
+        self._write("_delete_where", "client_id = ?", (client_id,))
+
+    def rebuild(self, load_docs):
+        """Replace the whole index with load_docs(), an iterable of (kind, row, client_id).
+
+        load_docs runs without the lock, so searches keep answering from the
+        previous contents while the snapshot is fetched.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._journal = []
+        try:
+            docs = list(load_docs())
+            with self._lock, self.conn:
+                self.conn.execute("delete from search_fts")
+                self.conn.execute("delete from search_keys")
+                self.conn.execute("delete from search_docs")
+                for kind, row, client_id in docs:
+                    self._insert(kind, row, client_id, replace=False)
+                for name, args in self._journal:
+                    getattr(self, name)(*args)
+                self.conn.execute("insert into search_fts (search_fts) values ('optimize')")
+        finally:
+            with self._lock:
+                self._journal = None
+        self.built_at = time.time()
+        self.build_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.ready = True
+        return len(docs)
+
+    # -- reads ---------------------------------------------------------------
+
+    def search(self, query, kinds=None, limit=20, fuzzy=True):
+        """Best `limit` documents for query: [{"kind", "id", "client_id", "parent", "match", "data"}]."""
+        folded = " ".join(fold(query).split())
+        if not folded or limit <= 0:
+            return []
+        kinds = [kind for kind in (kinds or KIND_FIELDS) if kind in KIND_FIELDS]
+        if not kinds:
+            return []
+        found = {}  # rowid -> match type, in rank order
+
+        with self._lock:
+            for prefix in dict.fromkeys(p for p in (folded, compact(folded)) if p):
+                self._prefix(prefix, kinds, limit, found)
+
+            # The trigram tokenizer needs at least three characters per term
+            terms = [term for term in folded.split() if len(term) >= 3]
+            if len(found) < limit and terms:
+                self._match(" AND ".join(_quote(term) for term in terms), kinds, limit, found, "substring")
+
+            if fuzzy and not found and terms:
+                variants = " AND ".join(_typo_variants(term) for term in terms)
+                self._match(variants, kinds, limit, found, "fuzzy")
+
+            if not found:
+                return []
+            rowids = list(found)
+            rows = self.conn.execute(
+                f"select rowid, kind, doc_id, parent, client_id, data from search_docs where rowid in ({','.join('?' * len(rowids))})",
+                rowids,
+            ).fetchall()
+
+        by_rowid = {row[0]: row for row in rows}
+        return [
+            {
+                "kind": by_rowid[rowid][1],
+                "id": by_rowid[rowid][2],
+                "parent": by_rowid[rowid][3],
+                "client_id": by_rowid[rowid][4],
+                "match": found[rowid],
+                "data": json.loads(by_rowid[rowid][5]),
+            }
+            for rowid in rowids if rowid in by_rowid
+        ]
+
+    def suggest(self, query, limit=8):
+        """Distinct type-ahead entries for query: [{"kind", "id", "client_id", "text", "data"}].
+
+        kind is "client", "vehicle" or "product"; text is what the search box
+        should show once the entry is picked (name, plate or VIN, product code).
+        Products are merged by code, since one code appears on many offers and orders.
+        """
+        typed = compact(query)
+        suggestions = []
+        seen = set()
+        for hit in self.search(query, limit=limit * 4, fuzzy=False):
+            data = hit["data"]
+            if hit["kind"] == "client":
+                kind, key, text = "client", hit["id"], data.get("nume") or ""
+            elif hit["kind"] == "vehicle":
+                vin = data.get("vin") or ""
+                plate = data.get("numar_inmatriculare") or ""
+                kind, key = "vehicle", hit["id"]
+                text = vin if typed and compact(vin).startswith(typed) and not compact(plate).startswith(typed) else plate or vin
+            else:
+                kind = "product"
+                text = data.get("cod_produs") or data.get("produs") or ""
+                key = (fold(data.get("cod_produs")), fold(data.get("produs")))
+            if (kind, key) in seen:
+                continue
+            seen.add((kind, key))
+            suggestions.append({"kind": kind, "id": hit["id"], "client_id": hit["client_id"], "text": text, "data": data})
+            if len(suggestions) >= limit:
+                break
+        return suggestions
+
+    def _prefix(self, prefix, kinds, limit, found):
+        # Walks the (key, kind, doc) index in key order, so an exact key comes before its extensions
+        for (rowid,) in self.conn.execute(
+            f"""
+            select doc from search_keys
+            where key >= ? and key < ? and kind in ({','.join('?' * len(kinds))})
+            order by key
+            """,
+            [prefix, prefix + "\uffff"] + kinds,
+        ):
+            if len(found) >= limit:
+                break
+            found.setdefault(rowid, "prefix")
+
+    def _match(self, expression, kinds, limit, found, match_type):
+        for (rowid,) in self.conn.execute(
+            f"select rowid from search_fts where search_fts match ? and kind in ({','.join('?' * len(kinds))})",
+            [expression] + kinds,
+        ):
+            if len(found) >= limit:
+                break
+            found.setdefault(rowid, match_type)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.conn.execute("select kind, count(*) from search_docs group by kind").fetchall())
+        return {
+            "ready": self.ready,
+            "path": self.path,
+            "documents": counts,
+            "built_at": datetime.fromtimestamp(self.built_at).isoformat(timespec="seconds") if self.built_at else None,
+            "build_ms": self.build_ms,
+        }
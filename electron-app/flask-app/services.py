@@ -0,0 +1,64 @@
+# filepath: flask-app/services.py
+# Lazily built, shared service objects (Supabase client, Google Drive client, data files).
+import threading
+import time
+
+class ServiceRegistry:
+    """Named factories whose objects are built on first use and then shared.
+
+    Nothing is constructed at import time: get(name) runs the factory once
+    (other threads asking for the same service wait for it) and records how
+    long it took, so the cost shows up in stats() instead of in start-up.
+    """
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._build_ms = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory):
+        with self._lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        if name not in self._factories:
+            raise KeyError(f"Unknown service: {name}")
+        with self._locks[name]:
+            if name not in self._instances:
+                started = time.perf_counter()
+                self._instances[name] = self._factories[name]()
+                self._build_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+        return self._instances[name]
+
+    def is_built(self, name):
+        return name in self._instances
+
+    def lazy(self, name):
+        """Stand-in that builds the service on first attribute access (for module-level names)."""
+        return LazyService(self, name)
+
+    def stats(self):
+        return {
+            name: {"built": name in self._instances, "build_ms": self._build_ms.get(name)}
+            for name in sorted(self._factories)
+        }
+
+class LazyService:
+    def __init__(self, registry, name):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, attribute):
+        return getattr(self._registry.get(self._name), attribute)
+
+    def __repr__(self):
+        state = "built" if self._registry.is_built(self._name) else "not built"
+        return f"<LazyService {self._name} ({state})>"
+
+# Shared by the Flask app and the GUI modules
+registry = ServiceRegistry()
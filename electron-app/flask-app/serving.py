@@ -0,0 +1,132 @@
+# filepath: flask-app/serving.py
+# How the embedded Flask backend is served: the development server or waitress,
+# behind a concurrency limiter that measures request queueing.
+import threading
+import time
+from latency import LatencyHistogram
+
+SERVER_MODES = ("waitress", "development")
+
+class ConcurrencyLimiter:
+    """WSGI middleware letting at most max_active requests run at once.
+
+    Up to max_queued more wait for a free slot (at most queue_timeout
+    seconds); beyond that, or after the timeout, the request gets a 503 right
+    away instead of piling up behind slow Supabase calls. The time spent
+    waiting is recorded, together with the in-flight and queued counts.
+    """
+    def __init__(self, app, max_active=8, max_queued=32, queue_timeout=30):
+        self.app = app
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_active)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.peak_active = 0
+        self.peak_queued = 0
+        self.requests = 0
+        self.rejected = 0
+        self.queue_wait = LatencyHistogram()
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.queued >= self.max_queued:
+                    self.rejected += 1
+                    return self._busy(start_response)
+                self.queued += 1
+                self.peak_queued = max(self.peak_queued, self.queued)
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+            with self._lock:
+                self.queued -= 1
+                if not acquired:
+                    self.rejected += 1
+            if not acquired:
+                return self._busy(start_response)
+        with self._lock:
+            self.active += 1
+            self.requests += 1
+            self.peak_active = max(self.peak_active, self.active)
+            self.queue_wait.record((time.perf_counter() - started) * 1000)
+        try:
+            result = self.app(environ, start_response)
+        except BaseException:
+            self._release()
+            raise
+        # Streamed bodies keep their slot until the server closes the response
+        return _ReleaseOnClose(result, self._release)
+
+    def _release(self):
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+    @staticmethod
+    def _busy(start_response):
+        body = b'{"error": "Serverul este ocupat, \\u00eencerca\\u021bi din nou."}'
+        start_response("503 Service Unavailable", [
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(body))),
+            ("Retry-After", "1"),
+        ])
+        return [body]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_active": self.max_active,
+                "max_queued": self.max_queued,
+                "active": self.active,
+                "queued": self.queued,
+                "peak_active": self.peak_active,
+                "peak_queued": self.peak_queued,
+                "requests": self.requests,
+                "rejected": self.rejected,
+                "queue_wait": self.queue_wait.to_dict(),
+            }
+
+class _ReleaseOnClose:
+    """WSGI response iterable that runs release() once the server closes it."""
+    def __init__(self, result, release):
+        self.result = result
+        self.release = release
+        self.released = False
+
+    def __iter__(self):
+        return iter(self.result)
+
+    def close(self):
+        try:
+            if hasattr(self.result, "close"):
+                self.result.close()
+        finally:
+            if not self.released:
+                self.released = True
+                self.release()
+
+def serve(app, mode="waitress", host="127.0.0.1", port=5000, threads=8, queue_depth=32):
+    """Serve a Flask app, blocking until the server stops.
+
+    "waitress" is the multi-threaded production server; it gets threads +
+    queue_depth worker threads so that requests waiting for the limiter's
+    slots are counted there rather than hidden in waitress' own task queue.
+    "development" is Flask's built-in server (threaded, no reloader).
+    """
+    if mode not in SERVER_MODES:
+        raise ValueError(f"Unknown server_mode {mode!r}; expected one of {', '.join(SERVER_MODES)}")
+    if mode == "waitress":
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            print("[ERROR] waitress is not installed; falling back to the development server")
+            mode = "development"
+        else:
+            print(f"[DEBUG] Serving with waitress on {host}:{port} ({threads} active, {queue_depth} queued)")
+            waitress_serve(app, host=host, port=port, threads=threads + queue_depth,
+                           backlog=max(64, queue_depth * 2), ident="CMS")
+            return
+    print(f"[DEBUG] Serving with the Flask development server on {host}:{port}")
+    app.run(host=host, port=port, threaded=True, use_reloader=False)
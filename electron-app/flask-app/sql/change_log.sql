@@ -0,0 +1,68 @@
+-- Append-only log of row changes, read by /sync in app.py to hand out deltas.
+-- A trigger on each synced table records inserts and updates as 'upsert' and
+-- deletes as 'delete' (the tombstone), so writes from every workstation and
+-- from the Supabase dashboard are logged, not only those of one Flask server.
+-- row_id is the row's primary key: id, or the column named by the trigger's
+-- argument (order_balances is keyed by order_id).
+-- /sync reads change_log through PostgREST; its cursor is change_log.id.
+
+create table if not exists change_log (
+    id         bigserial primary key,
+    table_name text not null,
+    row_id     text not null,
+    op         text not null check (op in ('upsert', 'delete')),
+    changed_at timestamptz not null default now()
+);
+
+create index if not exists change_log_changed_at_idx on change_log (changed_at);
+
+create or replace function change_log_record()
+returns trigger
+language plpgsql
+as $$
+declare
+    v_key text := coalesce(tg_argv[0], 'id');
+begin
+    if tg_op = 'DELETE' then
+        insert into change_log (table_name, row_id, op) values (tg_table_name, to_jsonb(old)->>v_key, 'delete');
+        return old;
+    end if;
+    insert into change_log (table_name, row_id, op) values (tg_table_name, to_jsonb(new)->>v_key, 'upsert');
+    return new;
+end;
+$$;
+
+do $$
+declare
+    synced text;
+    synced_key text;
+begin
+    foreach synced in array array['clients', 'vehicles', 'offers', 'offer_products', 'orders',
+                                  'order_products', 'payments', 'return_products', 'order_balances']
+    loop
+        synced_key := case synced when 'order_balances' then 'order_id' else 'id' end;
+        execute format('drop trigger if exists %I on %I', synced || '_change_log', synced);
+        execute format(
+            'create trigger %I after insert or update or delete on %I '
+            'for each row execute function change_log_record(%L)',
+            synced || '_change_log', synced, synced_key
+        );
+    end loop;
+end;
+$$;
+
+-- Drop entries older than p_keep. Clients whose cursor falls before the oldest
+-- remaining entry get a full snapshot from /sync instead of a delta.
+create or replace function change_log_prune(p_keep interval default interval '90 days')
+returns bigint
+language sql
+volatile
+as $$
+    with pruned as (
+        delete from change_log
+        where changed_at < now() - p_keep
+          and id < (select max(id) from change_log)  -- The newest entry stays, it anchors the cursors
+        returning 1
+    )
+    select count(*) from pruned;
+$$;
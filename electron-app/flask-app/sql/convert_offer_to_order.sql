@@ -0,0 +1,83 @@
+-- Convert one category of an offer into an order, atomically, in one round trip.
+-- Called from app.py (/add_order) through supabase_client.rpc('convert_offer_to_order', {...}).
+-- Inserts the order, copies the category's offer_products into order_products,
+-- records the optional advance payment, opens the order_balances row and marks
+-- the offer as accepted. Any error rolls the whole conversion back.
+-- Requires sql/order_balances.sql.
+--
+-- Errors: P0002 when the offer does not exist, P0001 when the category has no
+-- products, 23505 when the offer was already converted (the offer row is
+-- locked first, so two concurrent conversions cannot both pass the check).
+
+create or replace function convert_offer_to_order(
+    p_offer_number text,
+    p_category     text,
+    p_order_number text    default null,
+    p_status       text    default 'Comandată și neplătită',
+    p_date         date    default current_date,
+    p_observations text    default '',
+    p_amount_paid  numeric default 0,
+    p_recorded_by  text    default 'admin'
+)
+returns jsonb
+language plpgsql
+volatile
+as $$
+declare
+    v_offer offers%rowtype;
+    v_order orders%rowtype;
+    v_total numeric;
+    v_paid  numeric := greatest(coalesce(p_amount_paid, 0), 0);
+    v_count integer;
+begin
+    select * into v_offer from offers where offer_number = p_offer_number for update;
+    if not found then
+        raise exception 'Oferta nu a fost găsită!' using errcode = 'P0002';
+    end if;
+
+    if exists (select 1 from orders where source_offer_number = p_offer_number) then
+        raise exception 'Oferta a fost deja transformată în comandă!' using errcode = '23505';
+    end if;
+
+    insert into orders (client_id, vehicle_id, date, status, observations,
+                        order_number, source_offer_number, source_category)
+    values (v_offer.client_id, v_offer.vehicle_id, coalesce(p_date, current_date), p_status, p_observations,
+            coalesce(p_order_number, 'CMD' || floor(extract(epoch from now()))::bigint),
+            v_offer.offer_number, p_category)
+    returning * into v_order;
+
+    insert into order_products (order_id, produs, brand, cod_produs, cantitate,
+                                pret_unitar, pret_total, discount, pret_cu_discount)
+    select v_order.id, produs, brand, cod_produs, trunc(cantitate::numeric)::integer,
+           pret_unitar, pret_total, coalesce(discount, 0), pret_cu_discount
+    from offer_products
+    where offer_number = p_offer_number
+      and categorie = p_category;
+
+    get diagnostics v_count = row_count;
+    if v_count = 0 then
+        raise exception 'Nu există produse pentru această categorie!' using errcode = 'P0001';
+    end if;
+
+    select coalesce(sum(pret_cu_discount), 0) into v_total
+    from order_products
+    where order_id = v_order.id;
+
+    if v_paid > 0 then
+        insert into payments (client_id, order_id, amount, recorded_by, observations, date)
+        values (v_offer.client_id, v_order.id, v_paid, p_recorded_by, p_observations, now());
+    end if;
+
+    insert into order_balances (order_id, client_id, total, paid, refunded)
+    values (v_order.id, v_order.client_id, v_total, v_paid, 0);
+
+    update offers
+       set status = 'Acceptată',
+           observations = concat_ws(E'\n',
+               nullif(trim(observations), ''),
+               format('Transformată în comandă %s, categoria aleasă: %s', v_order.order_number, p_category))
+     where id = v_offer.id;
+
+    return to_jsonb(v_order) || jsonb_build_object('total', v_total, 'paid', v_paid, 'balance', v_total - v_paid);
+end;
+$$;
@@ -0,0 +1,59 @@
+-- Offer / order number allocation without scanning the tables.
+-- Called from app.py through supabase_client.rpc(...):
+--   next_offer_number()    -> 'O<n>', allocated from a sequence (race-free across workstations)
+--   highest_offer_number() -> highest existing 'O<n>', via an index on the numeric part
+--   highest_order_number() -> highest existing 'CMD<n>', via an index on the numeric part
+
+create index if not exists offers_offer_number_num_idx
+    on offers (((substring(offer_number from 2))::bigint))
+    where offer_number ~ '^O[0-9]+$';
+
+create index if not exists orders_order_number_num_idx
+    on orders (((substring(order_number from 4))::bigint))
+    where order_number ~ '^CMD[0-9]+$';
+
+create sequence if not exists offer_number_seq;
+
+-- Start the sequence after the numbers already in use
+select setval(
+    'offer_number_seq',
+    coalesce((select max((substring(offer_number from 2))::bigint) from offers where offer_number ~ '^O[0-9]+$'), 0) + 1,
+    false
+);
+
+create or replace function highest_offer_number()
+returns text
+language sql
+stable
+as $$
+    select 'O' || coalesce(max((substring(offer_number from 2))::bigint), 0)
+    from offers
+    where offer_number ~ '^O[0-9]+$';
+$$;
+
+create or replace function highest_order_number()
+returns text
+language sql
+stable
+as $$
+    select 'CMD' || coalesce(max((substring(order_number from 4))::bigint), 0)
+    from orders
+    where order_number ~ '^CMD[0-9]+$';
+$$;
+
+create or replace function next_offer_number()
+returns text
+language plpgsql
+volatile
+as $$
+declare
+    v_number text;
+begin
+    -- Skip numbers that were entered by hand past the sequence
+    loop
+        v_number := 'O' || nextval('offer_number_seq');
+        exit when not exists (select 1 from offers where offer_number = v_number);
+    end loop;
+    return v_number;
+end;
+$$;
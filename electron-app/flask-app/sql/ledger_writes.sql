@@ -0,0 +1,78 @@
+-- Batched, idempotent recording of payments and returns, called by the
+-- write-behind queue in app.py (write_behind.py) with the rows /add_payment and
+-- /add_return acknowledged locally. Each row carries a client_ref (uuid) made
+-- when it was queued: a row whose client_ref is already stored is not inserted
+-- or counted again, so a batch whose answer was lost can be resent safely.
+-- The whole batch is one transaction. Requires sql/order_balances.sql.
+
+alter table payments add column if not exists client_ref uuid;
+alter table return_products add column if not exists client_ref uuid;
+create unique index if not exists payments_client_ref_idx on payments (client_ref);
+create unique index if not exists return_products_client_ref_idx on return_products (client_ref);
+
+-- Inserts the rows (jsonb arrays of payments / return_products rows without
+-- id), adds the new ones to order_balances, updates orders.plata for paid
+-- orders not yet picked up ("Ridicată ..."), and returns the id stored for
+-- every client_ref.
+create or replace function record_ledger_writes(
+    p_payments jsonb default '[]'::jsonb,
+    p_returns  jsonb default '[]'::jsonb
+)
+returns table (ref uuid, kind text, row_id bigint)
+language plpgsql
+volatile
+as $$
+declare
+    entry      jsonb;
+    v_ref      uuid;
+    v_id       bigint;
+    v_order_id bigint;
+    v_amount   numeric;
+begin
+    for entry in select value from jsonb_array_elements(p_payments) loop
+        v_ref := (entry->>'client_ref')::uuid;
+        v_id := null;
+        insert into payments (client_ref, client_id, order_id, amount, recorded_by, observations, date)
+        select r.client_ref, r.client_id, r.order_id, r.amount, r.recorded_by, r.observations, r.date
+        from jsonb_populate_record(null::payments, entry) r
+        on conflict (client_ref) do nothing
+        returning payments.id, payments.order_id, payments.amount into v_id, v_order_id, v_amount;
+
+        if v_id is null then
+            select p.id into v_id from payments p where p.client_ref = v_ref;
+        else
+            perform order_balance_apply(v_order_id, p_paid => v_amount);
+            update orders o
+               set plata = case when b.paid >= b.total then 'Comandată și plătită'
+                                else 'Comandată și plătită parțial' end
+              from order_balances b
+             where o.id = v_order_id
+               and b.order_id = o.id
+               and coalesce(o.plata, '') not like 'Ridicată%';
+        end if;
+        ref := v_ref; kind := 'payment'; row_id := v_id;
+        return next;
+    end loop;
+
+    for entry in select value from jsonb_array_elements(p_returns) loop
+        v_ref := (entry->>'client_ref')::uuid;
+        v_id := null;
+        insert into return_products (client_ref, order_product_id, return_qty, unit_price, discount_pct, total_refund, notes)
+        select r.client_ref, r.order_product_id, r.return_qty, r.unit_price, r.discount_pct, r.total_refund, r.notes
+        from jsonb_populate_record(null::return_products, entry) r
+        on conflict (client_ref) do nothing
+        returning return_products.id, return_products.total_refund into v_id, v_amount;
+
+        if v_id is null then
+            select rp.id into v_id from return_products rp where rp.client_ref = v_ref;
+        else
+            select op.order_id into v_order_id
+            from order_products op
+            where op.id = (entry->>'order_product_id')::bigint;
+            perform order_balance_apply(v_order_id, p_refunded => v_amount);
+        end if;
+        ref := v_ref; kind := 'return'; row_id := v_id;
+        return next;
+    end loop;
+end;
+$$;
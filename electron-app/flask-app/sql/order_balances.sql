@@ -0,0 +1,114 @@
+-- Materialized per-order balance ledger.
+-- Rows are opened by convert_offer_to_order (/add_order) and maintained
+-- incrementally through order_balance_apply by record_ledger_writes
+-- (sql/ledger_writes.sql, the payments and returns); read by /orders,
+-- /totals and /debts through order_balances_get.
+-- `flask --app app verify-balances [--repair]` compares the ledger with the raw
+-- tables through order_balances_verify. Requires sql/order_totals.sql.
+
+create table if not exists order_balances (
+    order_id   bigint primary key references orders (id) on delete cascade,
+    client_id  uuid,
+    total      numeric not null default 0,
+    paid       numeric not null default 0,
+    refunded   numeric not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+create index if not exists order_balances_client_id_idx on order_balances (client_id);
+
+-- Add deltas to an order's ledger row. The first call for an order seeds the
+-- row from the raw tables (which already contain the write being recorded).
+create or replace function order_balance_apply(
+    p_order_id bigint,
+    p_total    numeric default 0,
+    p_paid     numeric default 0,
+    p_refunded numeric default 0
+)
+returns setof order_balances
+language plpgsql
+volatile
+as $$
+begin
+    update order_balances
+       set total      = total + p_total,
+           paid       = paid + p_paid,
+           refunded   = refunded + p_refunded,
+           updated_at = now()
+     where order_id = p_order_id;
+
+    if not found then
+        insert into order_balances (order_id, client_id, total, paid, refunded)
+        select t.order_id, t.client_id, t.total, t.paid, t.refunded
+        from order_totals(array[p_order_id]) t
+        on conflict (order_id) do nothing;
+    end if;
+
+    return query select * from order_balances where order_id = p_order_id;
+end;
+$$;
+
+create or replace function order_balances_get(
+    p_order_ids bigint[] default null,
+    p_client_id uuid default null
+)
+returns setof order_balances
+language sql
+stable
+as $$
+    select *
+    from order_balances
+    where (p_order_ids is null or order_id = any(p_order_ids))
+      and (p_client_id is null or client_id = p_client_id);
+$$;
+
+-- Recompute every order from the raw tables and return the rows that differ
+-- from the ledger (missing rows included). With p_repair the ledger is fixed.
+create or replace function order_balances_verify(p_repair boolean default false)
+returns table (
+    order_id        bigint,
+    client_id       uuid,
+    ledger_total    numeric,
+    actual_total    numeric,
+    ledger_paid     numeric,
+    actual_paid     numeric,
+    ledger_refunded numeric,
+    actual_refunded numeric
+)
+language plpgsql
+volatile
+as $$
+#variable_conflict use_column
+begin
+    create temporary table order_balances_drift on commit drop as
+    select
+        t.order_id,
+        t.client_id,
+        b.total    as ledger_total,
+        t.total    as actual_total,
+        b.paid     as ledger_paid,
+        t.paid     as actual_paid,
+        b.refunded as ledger_refunded,
+        t.refunded as actual_refunded
+    from order_totals(array(select id from orders)) t
+    left join order_balances b on b.order_id = t.order_id
+    where b.order_id is null
+       or b.total    <> t.total
+       or b.paid     <> t.paid
+       or b.refunded <> t.refunded;
+
+    if p_repair then
+        insert into order_balances (order_id, client_id, total, paid, refunded)
+        select d.order_id, d.client_id, d.actual_total, d.actual_paid, d.actual_refunded
+        from order_balances_drift d
+        on conflict (order_id) do update
+            set client_id  = excluded.client_id,
+                total      = excluded.total,
+                paid       = excluded.paid,
+                refunded   = excluded.refunded,
+                updated_at = now();
+    end if;
+
+    return query select * from order_balances_drift;
+end;
+$$;
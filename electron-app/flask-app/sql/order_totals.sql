@@ -0,0 +1,46 @@
+-- Per-order totals (sum of order_products.pret_cu_discount), paid amounts
+-- (sum of payments.amount) and refunds (sum of return_products.total_refund),
+-- grouped once in the database from the raw tables.
+-- Called from app.py through supabase_client.rpc('order_totals', {...}).
+
+create index if not exists payments_order_id_idx on payments (order_id);
+
+create or replace function order_totals(p_order_ids bigint[])
+returns table (
+    order_id  bigint,
+    client_id uuid,
+    total     numeric,
+    paid      numeric,
+    refunded  numeric
+)
+language sql
+stable
+as $$
+    select
+        o.id                                  as order_id,
+        o.client_id                           as client_id,
+        coalesce(t.total, 0)                  as total,
+        coalesce(p.paid, 0)                   as paid,
+        coalesce(r.refunded, 0)               as refunded
+    from orders o
+    left join (
+        select order_id, sum(pret_cu_discount) as total
+        from order_products
+        where order_id = any(p_order_ids)
+        group by order_id
+    ) t on t.order_id = o.id
+    left join (
+        select order_id, sum(amount) as paid
+        from payments
+        where order_id = any(p_order_ids)
+        group by order_id
+    ) p on p.order_id = o.id
+    left join (
+        select op.order_id, sum(rp.total_refund) as refunded
+        from return_products rp
+        join order_products op on op.id = rp.order_product_id
+        where op.order_id = any(p_order_ids)
+        group by op.order_id
+    ) r on r.order_id = o.id
+    where o.id = any(p_order_ids);
+$$;
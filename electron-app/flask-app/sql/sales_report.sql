@@ -0,0 +1,40 @@
+-- Sales report aggregated server-side, grouped by (localitate, judet).
+-- Called from app.py through supabase_client.rpc('sales_report', {...}).
+-- All filters are optional; pass NULL to skip them.
+
+create index if not exists orders_date_idx on orders (date);
+create index if not exists orders_client_id_idx on orders (client_id);
+create index if not exists order_products_order_id_idx on order_products (order_id);
+
+create or replace function sales_report(
+    p_date_from date default null,
+    p_date_to   date default null,
+    p_judet     text default null
+)
+returns table (
+    localitate    text,
+    judet         text,
+    nr_comenzi    bigint,
+    total_vanzari numeric
+)
+language sql
+stable
+as $$
+    select
+        coalesce(c.localitate, 'N/A')                       as localitate,
+        coalesce(c.judet, 'N/A')                            as judet,
+        count(*)                                            as nr_comenzi,
+        round(coalesce(sum(t.total), 0)::numeric, 2)        as total_vanzari
+    from orders o
+    join clients c on c.id = o.client_id
+    left join (
+        select order_id, sum(pret_cu_discount) as total
+        from order_products
+        group by order_id
+    ) t on t.order_id = o.id
+    where (p_date_from is null or o.date >= p_date_from)
+      and (p_date_to   is null or o.date <= p_date_to)
+      and (p_judet     is null or c.judet = p_judet)
+    group by 1, 2
+    order by 1, 2;
+$$;
@@ -0,0 +1,16 @@
+-- Number of search_universal results, for the "total" of /search_universal in
+-- app.py, which then fetches the rows one page at a time. Counted in the
+-- database so only the number crosses the network. search_universal(query,
+-- category, page, per_page) itself is defined in the Supabase project and
+-- returns the page as a JSON array.
+--   search_universal_count(query, category) -> bigint
+
+create or replace function search_universal_count(query text, category text)
+returns bigint
+language sql
+stable
+as $$
+    select coalesce(jsonb_array_length(
+        search_universal(query => $1, category => $2, page => 1, per_page => 2147483647)::jsonb
+    ), 0)::bigint;
+$$;
@@ -0,0 +1,128 @@
+# filepath: flask-app/startup.py
+# Start-up orchestration for run_app.py: waits for the Flask server's /health
+# readiness and warms the GUI caches, all in parallel, reporting real progress.
+import threading
+import time
+from api_client import api_client
+
+HEALTH_POLL_SECONDS = 0.1
+
+class StartupStep:
+    """One unit of start-up work.
+
+    run() does the work (raising on failure); the step starts once every step
+    named in `requires` has succeeded. A failed required step fails start-up,
+    a failed optional one (cache warming) is only logged.
+    """
+    def __init__(self, name, label, run, requires=(), required=True):
+        self.name = name
+        self.label = label
+        self.run = run
+        self.requires = tuple(requires)
+        self.required = required
+        self.state = "pending"  # pending -> running -> ok | error | skipped
+        self.error = None
+        self.elapsed_ms = None
+        self.finished = threading.Event()
+
+class Startup:
+    """Runs StartupSteps on their own threads and exposes their progress to the loader."""
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self._by_name = {step.name: step for step in self.steps}
+        self.started_at = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        for step in self.steps:
+            threading.Thread(target=self._run_step, args=(step,), name=f"startup-{step.name}", daemon=True).start()
+        return self
+
+    def _run_step(self, step):
+        for name in step.requires:
+            requirement = self._by_name[name]
+            requirement.finished.wait()
+            if requirement.state != "ok":
+                step.state = "skipped"
+                step.error = f"{requirement.label}: {requirement.error}"
+                step.finished.set()
+                return
+        step.state = "running"
+        started = time.perf_counter()
+        try:
+            step.run()
+            step.state = "ok"
+        except Exception as e:
+            step.state = "error"
+            step.error = str(e)
+            print(f"[ERROR] Start-up step '{step.name}' failed: {e}")
+        step.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        step.finished.set()
+
+    def progress(self):
+        """(fraction of steps finished, label of a step still running or None)."""
+        finished = sum(1 for step in self.steps if step.finished.is_set())
+        running = next((step.label for step in self.steps if step.state == "running"), None)
+        return finished / len(self.steps) if self.steps else 1.0, running
+
+    def is_done(self):
+        return all(step.finished.is_set() for step in self.steps)
+
+    def failures(self):
+        """Required steps that failed or could not run, as (label, error)."""
+        return [(step.label, step.error) for step in self.steps if step.required and step.state != "ok"]
+
+    def timings(self):
+        return {step.name: {"state": step.state, "ms": step.elapsed_ms} for step in self.steps}
+
+def wait_for_health(step=None, timeout=30):
+    """Poll /health until the server answers (step None) or reports warm-up step `step` as done.
+
+    Raises RuntimeError when the step failed on the server or the timeout expires.
+    """
+    deadline = time.monotonic() + timeout
+    last_error = "serverul nu răspunde"
+    while time.monotonic() < deadline:
+        try:
+            response = api_client.probe('/health', timeout=(0.5, 2))  # This loop is the retry
+            if step is None:
+                return
+            status = response.json().get("steps", {}).get(step, {})
+            if status.get("state") == "ok":
+                return
+            if status.get("state") == "error":
+                raise RuntimeError(status.get("error") or f"{step} failed")
+            last_error = f"{step}: {status.get('state', 'pending')}"
+        except RuntimeError:
+            raise
+        except Exception as e:
+            last_error = str(e)
+        time.sleep(HEALTH_POLL_SECONDS)
+    raise RuntimeError(f"Timeout after {timeout} s ({last_error})")
+
+def warm_client_list():
+    response = api_client.get('/clients')
+    response.raise_for_status()
+
+def warm_judete():
+    import new_customer
+    response = api_client.get('/get_judete')
+    response.raise_for_status()
+    new_customer.judete_cache = response.json()
+
+def warm_make_model_data():
+    from services import registry
+    from new_car import register_services
+    register_services()
+    registry.get('make_model_data')
+
+def default_steps(timeout=30):
+    """Server readiness (required) and the GUI caches warmed while it comes up (optional)."""
+    return [
+        StartupStep("server", "Pornire server", lambda: wait_for_health(timeout=timeout)),
+        StartupStep("supabase", "Conectare la baza de date", lambda: wait_for_health("supabase", timeout), requires=["server"]),
+        StartupStep("localitati", "Încărcare localități", lambda: wait_for_health("localitati", timeout), requires=["server"]),
+        StartupStep("make_model", "Încărcare mărci și modele", warm_make_model_data, required=False),
+        StartupStep("clients", "Încărcare listă clienți", warm_client_list, requires=["supabase"], required=False),
+        StartupStep("judete", "Încărcare județe", warm_judete, requires=["localitati"], required=False),
+    ]
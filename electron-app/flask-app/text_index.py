@@ -0,0 +1,79 @@
+# filepath: flask-app/text_index.py
+# Folded, sorted in-memory index for fixed lists of names (judete, localitati).
+import bisect
+import heapq
+from search_index import fold
+
+class TextIndex:
+    """Prefix and substring lookups over a list of (text, value) pairs.
+
+    Texts are folded once at build time (no diacritics, lowercase, see
+    search_index.fold) and kept sorted, together with a sorted list of the
+    words inside them, so prefix and word-prefix matches are two bisects.
+    Plain substring matches are only looked for when those leave room under
+    the limit; for queries of three or more characters they come from a
+    trigram index. Matches rank as exact, prefix, word prefix, then any
+    substring, shorter texts first within each group.
+    """
+    def __init__(self, items):
+        entries = sorted(((fold(text), text, value) for text, value in items), key=lambda entry: entry[:2])
+        self.folded = [entry[0] for entry in entries]
+        self.values = [entry[2] for entry in entries]
+        words = sorted(
+            (folded[i + 1:], position)
+            for position, folded in enumerate(self.folded)
+            for i, char in enumerate(folded) if char in " -"
+        )
+        self.word_keys = [word for word, _ in words]
+        self.word_positions = [position for _, position in words]
+        self.trigrams = {}
+        for position, folded in enumerate(self.folded):
+            for trigram in {folded[i:i + 3] for i in range(len(folded) - 2)}:
+                self.trigrams.setdefault(trigram, []).append(position)
+
+    def __len__(self):
+        return len(self.folded)
+
+    @staticmethod
+    def _prefix_range(keys, query):
+        return bisect.bisect_left(keys, query), bisect.bisect_left(keys, query + "\uffff")
+
+    def _substring_candidates(self, query):
+        if len(query) < 3:
+            return range(len(self.folded))
+        postings = sorted((self.trigrams.get(query[i:i + 3], ()) for i in range(len(query) - 2)), key=len)
+        if not postings[0]:
+            return ()
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, query, limit=None):
+        """Values whose text contains query (folded), best matches first; at most limit of them."""
+        query = fold(query)
+        if not query:
+            return self.values[:limit]
+
+        lo, hi = self._prefix_range(self.folded, query)
+        tiers = [range(lo, hi)]
+        word_lo, word_hi = self._prefix_range(self.word_keys, query)
+        tiers.append(self.word_positions[word_lo:word_hi])
+        tiers.append(None)  # Substring matches, computed only if needed
+
+        results = []
+        seen = set()
+        for tier in tiers:
+            room = None if limit is None else limit - len(results)
+            if room is not None and room <= 0:
+                break
+            if tier is None:
+                tier = (p for p in self._substring_candidates(query) if query in self.folded[p])
+            fresh = {p for p in tier if p not in seen}
+            key = lambda position: (len(self.folded[position]), position)
+            best = sorted(fresh, key=key) if room is None else heapq.nsmallest(room, fresh, key=key)
+            seen.update(best)
+            results.extend(best)
+        return [self.values[position] for position in results]
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import requests
+from background_api import api
 import pandas as pd
 
 class TopClientsApp:
@@ -71,23 +71,28 @@ class TopClientsApp:
         """Fetch and display top clients based on selected filters."""
         sort_by = self.sort_by_var.get()
 
-        try:
-            # Prepare parameters for the API request
-            params = {'sort_by': sort_by}
+        # Prepare parameters for the API request
+        params = {'sort_by': sort_by}
+
+        # Fetch data from the backend API; the client count is fetched alongside
+        api.get(self.root, '/top_clients', params=params, on_success=self.on_top_clients_loaded,
+                on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+        # Total number of existing customers (a count, not the client list)
+        api.get(self.root, '/clients', params={'count': 'exact'}, on_success=self.on_client_count_loaded,
+                on_error=lambda e: self.footer_label.config(text="Total clienți existenți: N/A"))
+
+    def on_client_count_loaded(self, response):
+        if response.status_code == 200:
+            total_clients = response.json()['count']
+            self.footer_label.config(text=f"Total clienți existenți: {total_clients}")
+        else:
+            self.footer_label.config(text="Total clienți existenți: N/A")
 
-            # Fetch data from the backend API
-            response = requests.get(f'http://127.0.0.1:5000/top_clients', params=params)
+    def on_top_clients_loaded(self, response):
+        try:
             if response.status_code == 200:
                 data = response.json()
                 self.update_clients_table(data)
-
-                # Fetch total number of existing customers
-                total_clients_response = requests.get(f'http://127.0.0.1:5000/clients')
-                if total_clients_response.status_code == 200:
-                    total_clients = len(total_clients_response.json())
-                    self.footer_label.config(text=f"Total clienți existenți: {total_clients}")
-                else:
-                    self.footer_label.config(text="Total clienți existenți: N/A")
             else:
                 error_message = response.json().get("error", "Unknown error occurred.")
                 messagebox.showerror("Eroare", f"Nu s-au putut încărca datele: {error_message}")
@@ -0,0 +1,186 @@
+# filepath: flask-app/typeahead.py
+# As-you-type suggestions under a search Entry, served by GET /search_index/suggest.
+import time
+import tkinter as tk
+from collections import OrderedDict
+from background_api import api
+
+# Debounce after the last keystroke, and the latency above which a lookup is logged
+DEBOUNCE_MS = 120
+SUGGEST_BUDGET_MS = 50
+
+ICONS = {"client": "👤", "vehicle": "🚗", "product": "📦"}
+
+# Keys that move through the list instead of editing the query
+NAVIGATION_KEYS = {"Up", "Down", "Return", "KP_Enter", "Escape", "Tab", "Left", "Right", "Home", "End",
+                   "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R"}
+
+def suggestion_label(suggestion):
+    data = suggestion["data"]
+    icon = ICONS.get(suggestion["kind"], "")
+    if suggestion["kind"] == "client":
+        details = data.get("telefon") or data.get("localitate") or ""
+    elif suggestion["kind"] == "vehicle":
+        details = " ".join(part for part in (data.get("marca"), data.get("model")) if part)
+        other = data.get("vin") if suggestion["text"] != data.get("vin") else data.get("numar_inmatriculare")
+        if other:
+            details = f"{details} · {other}" if details else other
+    else:
+        details = " ".join(part for part in (data.get("produs"), f"({data['brand']})" if data.get("brand") else None) if part)
+    return f"{icon} {suggestion['text']}" + (f"  ·  {details}" if details else "")
+
+class TypeAhead:
+    """Suggestion list for an Entry.
+
+    Each keystroke restarts a DEBOUNCE_MS timer; when it fires, the previous
+    lookup (if still running) is cancelled and a new one is sent in the
+    background, so only the latest text is ever rendered. Answers are kept in a
+    small cache, so deleting characters redraws without a request.
+    on_pick(suggestion) runs when an entry is chosen with Enter or a click.
+    """
+    def __init__(self, entry, on_pick, limit=8, debounce_ms=DEBOUNCE_MS, min_chars=2, cache_size=64):
+        self.entry = entry
+        self.on_pick = on_pick
+        self.limit = limit
+        self.debounce_ms = debounce_ms
+        self.min_chars = min_chars
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.suggestions = []
+        self.after_id = None
+        self.request = None
+        self.popup = None
+        self.listbox = None
+
+        entry.bind("<KeyRelease>", self.on_key_release, add="+")
+        entry.bind("<Down>", lambda event: self.move(1), add="+")
+        entry.bind("<Up>", lambda event: self.move(-1), add="+")
+        entry.bind("<Escape>", lambda event: self.hide(), add="+")
+        entry.bind("<FocusOut>", lambda event: entry.after(200, self.hide_unless_focused), add="+")
+        entry.bind("<Destroy>", lambda event: event.widget is entry and self.cancel(), add="+")
+
+    def on_key_release(self, event):
+        if event.keysym in NAVIGATION_KEYS:
+            return
+        if self.after_id:
+            self.entry.after_cancel(self.after_id)
+        self.after_id = self.entry.after(self.debounce_ms, self.lookup)
+
+    def lookup(self):
+        self.after_id = None
+        query = self.entry.get().strip()
+        if len(query) < self.min_chars:
+            self.cancel()
+            self.hide()
+            return
+        if query in self.cache:
+            self.cache.move_to_end(query)
+            self.show(self.cache[query])
+            return
+        if self.request:
+            self.request.cancel()
+        started = time.perf_counter()
+        self.request = api.get(
+            self.entry, '/search_index/suggest',
+            params={'q': query, 'limit': self.limit},
+            on_success=lambda response: self.on_loaded(query, response, started),
+            on_error=lambda e: print(f"[ERROR] Exception in type-ahead lookup: {e}")
+        )
+
+    def on_loaded(self, query, response, started):
+        self.request = None
+        if response.status_code != 200:
+            print(f"[ERROR] Type-ahead lookup failed. Status code: {response.status_code}")
+            return
+        payload = response.json()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms > SUGGEST_BUDGET_MS:
+            print(f"[DEBUG] Type-ahead for '{query}' took {elapsed_ms:.1f} ms (server {payload.get('took_ms')} ms)")
+        if payload.get("ready"):
+            self.cache[query] = payload["suggestions"]
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        if self.entry.get().strip() == query:
+            self.show(payload["suggestions"])
+
+    def cancel(self):
+        if self.after_id:
+            self.entry.after_cancel(self.after_id)
+            self.after_id = None
+        if self.request:
+            self.request.cancel()
+            self.request = None
+
+    def invalidate(self):
+        """Forget cached answers (call after data the suggestions come from has changed)."""
+        self.cache.clear()
+
+    def show(self, suggestions):
+        self.suggestions = suggestions
+        if not suggestions:
+            self.hide()
+            return
+        if self.popup is None:
+            self.popup = tk.Toplevel(self.entry)
+            self.popup.overrideredirect(True)
+            self.popup.attributes("-topmost", True)
+            self.listbox = tk.Listbox(self.popup, font=("Segoe UI", 11), activestyle="none", takefocus=0,
+                                      borderwidth=1, relief="solid", highlightthickness=0)
+            self.listbox.pack(fill="both", expand=True)
+            self.listbox.bind("<ButtonRelease-1>", self.on_click)
+        self.listbox.delete(0, tk.END)
+        for suggestion in suggestions:
+            self.listbox.insert(tk.END, suggestion_label(suggestion))
+        self.listbox.config(height=len(suggestions))
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self.popup.geometry(f"{self.entry.winfo_width()}x{self.listbox.winfo_reqheight()}+{x}+{y}")
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def hide(self):
+        self.suggestions = []
+        if self.popup is not None:
+            self.popup.withdraw()
+
+    def hide_unless_focused(self):
+        try:
+            focused = self.entry.focus_get()
+        except (KeyError, tk.TclError):
+            focused = None
+        if focused is not self.entry:
+            self.hide()
+
+    def is_visible(self):
+        return bool(self.suggestions) and self.popup is not None and self.popup.winfo_viewable()
+
+    def move(self, step):
+        if not self.is_visible():
+            return
+        selection = self.listbox.curselection()
+        index = (selection[0] + step if selection else (0 if step > 0 else len(self.suggestions) - 1)) % len(self.suggestions)
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.see(index)
+        return "break"
+
+    def accept(self):
+        """Pick the highlighted entry; returns False (so the caller runs its normal search) if none is highlighted."""
+        if not self.is_visible() or not self.listbox.curselection():
+            self.cancel()
+            self.hide()
+            return False
+        self.pick(self.suggestions[self.listbox.curselection()[0]])
+        return True
+
+    def on_click(self, event):
+        index = self.listbox.nearest(event.y)
+        if 0 <= index < len(self.suggestions):
+            self.pick(self.suggestions[index])
+
+    def pick(self, suggestion):
+        self.cancel()
+        self.hide()
+        self.entry.delete(0, tk.END)
+        self.entry.insert(0, suggestion["text"])
+        self.on_pick(suggestion)
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import requests
+from background_api import api
 import pandas as pd
 
 class SalesReportApp:
@@ -43,6 +43,19 @@ class SalesReportApp:
         button_frame.pack(fill=tk.X, padx=20)
         ttk.Button(button_frame, text="Exportă CSV", command=self.export_to_csv).pack(side=tk.LEFT, pady=10)
 
+        # Filters (all optional): date interval and județ
+        ttk.Label(button_frame, text="De la:", background="#d3d3d3").pack(side=tk.LEFT, padx=(20, 0))
+        self.date_from_entry = ttk.Entry(button_frame, width=11)
+        self.date_from_entry.pack(side=tk.LEFT)
+        ttk.Label(button_frame, text="Până la:", background="#d3d3d3").pack(side=tk.LEFT)
+        self.date_to_entry = ttk.Entry(button_frame, width=11)
+        self.date_to_entry.pack(side=tk.LEFT)
+        ttk.Label(button_frame, text="Județ:", background="#d3d3d3").pack(side=tk.LEFT)
+        self.judet_var = tk.StringVar()
+        self.judet_dropdown = ttk.Combobox(button_frame, textvariable=self.judet_var, values=[""], width=15)
+        self.judet_dropdown.pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Afișează", command=self.fetch_sales_report).pack(side=tk.LEFT, padx=5)
+
         # Table frame with consistent background
         table_frame = tk.Frame(self.root, bg="#d3d3d3")
         table_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=(10, 20))
@@ -74,12 +87,33 @@ class SalesReportApp:
         self.sales_table.pack(fill=tk.BOTH, expand=True)
 
         # Fetch data
+        self.fetch_judete()
         self.fetch_sales_report()
 
+    def fetch_judete(self):
+        """Fill the județ filter in the background (it keeps just the empty choice if the request fails)."""
+        def on_success(response):
+            if response.status_code == 200:
+                self.judet_dropdown["values"] = [""] + response.json()
+
+        api.get(self.root, "/get_judete", on_success=on_success,
+                on_error=lambda e: print(f"[ERROR] Exception while fetching counties: {e}"))
+
     def fetch_sales_report(self):
+        # Only send the filters that were filled in (format YYYY-MM-DD for dates)
+        params = {
+            "date_from": self.date_from_entry.get().strip(),
+            "date_to": self.date_to_entry.get().strip(),
+            "judet": self.judet_var.get().strip()
+        }
+        params = {key: value for key, value in params.items() if value}
+
+        # Fetch data from the API
+        api.get(self.root, "/sales_report", params=params, on_success=self.on_sales_report_loaded,
+                on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+
+    def on_sales_report_loaded(self, response):
         try:
-            # Fetch data from the API
-            response = requests.get("http://127.0.0.1:5000/sales_report")
             if response.status_code == 200:
                 sales_data = response.json()
                 self.update_sales_table(sales_data)
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, Toplevel
-import requests
+from background_api import api
 from edit_order import open_edit_order_window  # Import the function to open the edit order window
 
 class ViewOrdersApp:
@@ -70,14 +70,18 @@ class ViewOrdersApp:
         self.orders_scrollbar.pack(side="right", fill="y")
 
     def fetch_orders(self):
-        """Fetch orders for the given client_id and display them."""
-        try:
-            if not self.client_id:
-                messagebox.showerror("Eroare", "ID-ul clientului nu este specificat.")
-                return
+        """Fetch orders for the given client_id in the background and display them."""
+        if not self.client_id:
+            messagebox.showerror("Eroare", "ID-ul clientului nu este specificat.")
+            return
+
+        # Fetch orders for the client
+        api.get(self.root, '/orders', params={'client_id': self.client_id},
+                on_success=self.on_orders_loaded,
+                on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
 
-            # Fetch orders for the client
-            response = requests.get('http://127.0.0.1:5000/orders', params={'client_id': self.client_id})
+    def on_orders_loaded(self, response):
+        try:
             if response.status_code == 200:
                 orders = response.json()
                 if not orders:
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, Toplevel, simpledialog
-import requests
+from background_api import api
 import json  # NEW
 from edit_offer import open_edit_offer_window  # Import the function to open the edit offer window
 from new_order import open_new_order_window  # Import the function to open the new order window
@@ -73,13 +73,17 @@ class ViewOffersApp:
 
     def fetch_offers(self):
         """Fetch offers for the given client_id and display them."""
-        try:
-            if not self.client_id:
-                messagebox.showerror("Eroare", "ID-ul clientului nu este specificat.")
-                return
+        if not self.client_id:
+            messagebox.showerror("Eroare", "ID-ul clientului nu este specificat.")
+            return
+
+        # Fetch offers for the client
+        api.get(self.root, '/offers', params={'client_id': self.client_id},
+                on_success=self.on_offers_loaded,
+                on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
 
-            # Fetch offers for the client
-            response = requests.get('http://127.0.0.1:5000/offers', params={'client_id': self.client_id})
+    def on_offers_loaded(self, response):
+        try:
             if response.status_code == 200:
                 offers = response.json()
                 if not offers:
@@ -127,11 +131,16 @@ class ViewOffersApp:
         open_edit_offer_window(self.root, offer['offer_number'])
 
     def transform_to_order(self, offer):
+        if api.is_busy(self.root):
+            return  # The offer is still loading
+        offer_number = offer["offer_number"]
+        print("[DEBUG] Calling /offers/ with offer_number:", offer_number)
+        api.get(self.root, f"/offers/{offer_number}",
+                on_success=self.on_offer_details_loaded,
+                on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+
+    def on_offer_details_loaded(self, response):
         try:
-            offer_number = offer["offer_number"]
-            print("[DEBUG] Calling /offers/ with offer_number:", offer_number)
-
-            response = requests.get(f"http://127.0.0.1:5000/offers/{offer_number}")
             if response.status_code != 200:
                 raise Exception("Nu s-au putut încărca detaliile ofertei.")
 
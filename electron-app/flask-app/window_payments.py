@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import requests
+from background_api import api
 import pandas as pd
 
 class PaymentsWindow:
@@ -13,6 +13,7 @@ class PaymentsWindow:
         # Center the window on the screen
         self.center_window()
 
+        self.payments_request = None  # In-flight /payments request; a newer search replaces it
         self.create_widgets()
         self.fetch_payments()
 
@@ -80,13 +81,24 @@ class PaymentsWindow:
 
     def fetch_payments(self):
         """Fetch all payments from the backend."""
+        self.load_payments({}, "Nu s-au putut încărca plățile.")
+
+    def load_payments(self, params, error_message):
+        """GET /payments in the background; a newer search replaces the one in flight."""
+        if self.payments_request:
+            self.payments_request.cancel()
+        self.payments_request = api.get(self.root, "/payments", params=params,
+                                        on_success=lambda response: self.on_payments_loaded(response, error_message),
+                                        on_error=lambda e: messagebox.showerror("Eroare", f"A apărut o eroare: {e}"))
+
+    def on_payments_loaded(self, response, error_message):
+        self.payments_request = None
         try:
-            response = requests.get("http://127.0.0.1:5000/payments")
             if response.status_code == 200:
                 payments = response.json()
                 self.update_payments_table(payments)
             else:
-                messagebox.showerror("Eroare", "Nu s-au putut încărca plățile.")
+                messagebox.showerror("Eroare", error_message)
         except Exception as e:
             messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
 
@@ -106,23 +118,15 @@ class PaymentsWindow:
         order = self.order_search.get()
         date = self.date_search.get()
 
-        try:
-            params = {}
-            if client:
-                params["client"] = client
-            if order:
-                params["order"] = order
-            if date:
-                params["date"] = date
-
-            response = requests.get("http://127.0.0.1:5000/payments", params=params)
-            if response.status_code == 200:
-                payments = response.json()
-                self.update_payments_table(payments)
-            else:
-                messagebox.showerror("Eroare", "Nu s-au putut filtra plățile.")
-        except Exception as e:
-            messagebox.showerror("Eroare", f"A apărut o eroare: {e}")
+        params = {}
+        if client:
+            params["client"] = client
+        if order:
+            params["order"] = order
+        if date:
+            params["date"] = date
+
+        self.load_payments(params, "Nu s-au putut filtra plățile.")
 
     def export_to_csv(self):
         """Export the payments table to a CSV file."""
@@ -0,0 +1,202 @@
+# filepath: flask-app/write_behind.py
+# Payments and returns acknowledged as soon as they are on disk locally, sent to Supabase in batches.
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+# Done entries are kept this long so a client_ref can still be looked up (reconciled) afterwards
+DONE_KEEP_SECONDS = 7 * 24 * 3600
+
+class WriteBehind:
+    """Durable queue of ledger writes ('payment' / 'return' rows), kept in SQLite.
+
+    add() stores a row under a new client_ref (a uuid the row carries to the
+    server) and returns it at once. A background thread hands the pending
+    entries, oldest first and up to batch_size at a time, to send(entries),
+    which records the whole batch and returns {client_ref: server id}; since
+    the server ignores a client_ref it already has, a batch whose answer was
+    lost is simply sent again. Errors for which is_retryable(error) is true
+    (Supabase unreachable) keep the batch and back off up to max_backoff
+    seconds; any other error splits the batch so only the rejected entry is
+    set aside as failed. on_sent(entries, ids) runs after each batch is
+    marked done.
+    """
+    def __init__(self, path, send, on_sent=None, is_retryable=None, batch_size=50, interval=1, max_backoff=60):
+        self.send = send
+        self.on_sent = on_sent
+        self.is_retryable = is_retryable or (lambda error: False)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.sent = 0
+        self.batches = 0
+        self.last_error = None
+        self.last_batch_ms = None
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        with self._conn:
+            self._conn.execute("""
+                create table if not exists write_behind (
+                    id         integer primary key autoincrement,
+                    ref        text not null unique,
+                    kind       text not null,
+                    order_id   text,
+                    row        text not null,
+                    created_at real not null,
+                    attempts   integer not null default 0,
+                    state      text not null default 'pending',
+                    server_id  text,
+                    sent_at    real,
+                    last_error text
+                )
+            """)
+            self._conn.execute("create index if not exists write_behind_state on write_behind (state, order_id)")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+        return self
+
+    def add(self, kind, order_id, row):
+        """Queue row (a payments / return_products row without id) and return its client_ref."""
+        ref = str(uuid.uuid4())
+        row = {**row, "client_ref": ref}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "insert into write_behind (ref, kind, order_id, row, created_at) values (?, ?, ?, ?, ?)",
+                (ref, kind, str(order_id), json.dumps(row, ensure_ascii=False), time.time()),
+            )
+        self._wake.set()
+        return ref
+
+    def _select(self, where, params=(), limit=-1):
+        with self._lock:
+            rows = self._conn.execute(f"select * from write_behind where {where} order by id limit ?",
+                                      (*params, limit)).fetchall()
+        return [{**dict(row), "row": json.loads(row["row"])} for row in rows]
+
+    def pending(self, order_ids=None):
+        """Entries not yet recorded in Supabase, optionally only those of order_ids."""
+        if order_ids is None:
+            return self._select("state = 'pending'")
+        keys = list(dict.fromkeys(str(order_id) for order_id in order_ids))
+        entries = []
+        for start in range(0, len(keys), 500):  # SQLite's bound parameter limit
+            chunk = keys[start:start + 500]
+            entries.extend(self._select(f"state = 'pending' and order_id in ({', '.join('?' * len(chunk))})", chunk))
+        return entries
+
+    def add_pending(self, balances):
+        """Add the pending payments and refunds to balances ({order id: total/paid/refunded/balance}), in place."""
+        keys = {str(order_id): order_id for order_id in balances}
+        for entry in self.pending(balances):
+            balance = balances[keys[entry["order_id"]]]
+            if entry["kind"] == "payment":
+                balance["paid"] += float(entry["row"]["amount"])
+                balance["balance"] = balance["total"] - balance["paid"]
+            else:
+                balance["refunded"] += float(entry["row"]["total_refund"])
+        return balances
+
+    def entries(self, state):
+        return self._select("state = ?", (state,))
+
+    def entry(self, ref):
+        """The entry queued under ref (state, server_id once sent), None if unknown or pruned."""
+        entries = self._select("ref = ?", (ref,))
+        return entries[0] if entries else None
+
+    def retry_failed(self):
+        """Put the failed entries back in the queue (e.g. after fixing what the server rejected); returns how many."""
+        with self._lock, self._conn:
+            count = self._conn.execute("update write_behind set state = 'pending' where state = 'failed'").rowcount
+        self._wake.set()
+        return count
+
+    def _mark(self, entries, state, ids=None, error=None):
+        ids = ids or {}
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "update write_behind set state = ?, server_id = ?, sent_at = ?, attempts = attempts + 1, last_error = ? "
+                "where ref = ?",
+                [(state, ids.get(entry["ref"]), time.time() if state == "done" else None, error, entry["ref"])
+                 for entry in entries],
+            )
+
+    def _send(self, entries):
+        """Send one batch, halving it on a rejection until the rejected entry is found."""
+        try:
+            ids = {str(ref): str(server_id) for ref, server_id in self.send(entries).items()}
+        except Exception as e:
+            if self.is_retryable(e):
+                self._mark(entries, "pending", error=str(e))
+                raise
+            if len(entries) > 1:
+                middle = len(entries) // 2
+                self._send(entries[:middle])
+                self._send(entries[middle:])
+                return
+            self._mark(entries, "failed", error=str(e))
+            print(f"[ERROR] Write-behind {entries[0]['kind']} {entries[0]['ref']} was rejected: {e}")
+            return
+        # Done before on_sent puts the rows in the replica, so balances never count them twice
+        self._mark(entries, "done", ids)
+        self.sent += len(entries)
+        if self.on_sent is not None:
+            self.on_sent(entries, ids)
+
+    def flush(self):
+        """Send the pending entries in batches; returns how many were recorded (raises when unreachable)."""
+        with self._flush_lock:
+            sent = self.sent
+            while True:
+                batch = self._select("state = 'pending'", limit=self.batch_size)
+                if not batch:
+                    break
+                started = time.perf_counter()
+                self._send(batch)
+                self.batches += 1
+                self.last_batch_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.last_error = None
+            with self._lock, self._conn:
+                self._conn.execute("delete from write_behind where state = 'done' and sent_at < ?",
+                                   (time.time() - DONE_KEEP_SECONDS,))
+            return self.sent - sent
+
+    def _run(self):
+        delay = self.interval
+        while True:
+            if delay > self.interval:
+                time.sleep(delay)  # Backing off: new writes wait too instead of waking the thread
+            else:
+                self._wake.wait(delay)
+            self._wake.clear()
+            try:
+                self.flush()
+                delay = self.interval
+            except Exception as e:
+                self.last_error = str(e)
+                delay = min(max(delay, 1) * 2, self.max_backoff)
+                print(f"[ERROR] Write-behind flush failed (retrying in {delay} s): {e}")
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._conn.execute("select state, count(*) from write_behind group by state").fetchall())
+            oldest = self._conn.execute("select min(created_at) from write_behind where state = 'pending'").fetchone()[0]
+        return {
+            "pending": counts.get("pending", 0),
+            "failed": counts.get("failed", 0),
+            "sent": self.sent,
+            "batches": self.batches,
+            "batch_size": self.batch_size,
+            "last_batch_ms": self.last_batch_ms,
+            "oldest_pending_seconds": round(time.time() - oldest, 1) if oldest else None,
+            "last_error": self.last_error,
+        }
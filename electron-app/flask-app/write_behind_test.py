@@ -0,0 +1,120 @@
+# filepath: flask-app/write_behind_test.py
+# Checks the write-behind queue against a fake record_ledger_writes that, like sql/ledger_writes.sql,
+# ignores a client_ref it already has.
+#   python -m unittest -v write_behind_test.py
+import unittest
+from write_behind import WriteBehind
+
+class Unreachable(Exception):
+    pass
+
+class FakeServer:
+    """record_ledger_writes in memory: {client_ref: id}, plus the paid / refunded totals per order."""
+    def __init__(self):
+        self.ids = {}
+        self.paid = {}
+        self.refunded = {}
+        self.batches = []
+        self.reject = set()  # Payment amounts the server refuses
+        self.lose_answers = 0  # Batches recorded whose answer never reaches the client
+        self.down = False
+
+    def send(self, entries):
+        self.batches.append([entry["ref"] for entry in entries])
+        if self.down:
+            raise Unreachable("Supabase unreachable")
+        if any(entry["row"].get("amount") in self.reject for entry in entries):
+            raise ValueError("new row violates check constraint")  # The whole batch rolls back
+        for entry in entries:
+            if entry["ref"] in self.ids:
+                continue
+            self.ids[entry["ref"]] = len(self.ids) + 1
+            totals, field = (self.paid, "amount") if entry["kind"] == "payment" else (self.refunded, "total_refund")
+            totals[entry["order_id"]] = totals.get(entry["order_id"], 0) + entry["row"][field]
+        if self.lose_answers:
+            self.lose_answers -= 1
+            raise Unreachable("connection reset")
+        return {entry["ref"]: self.ids[entry["ref"]] for entry in entries}
+
+class WriteBehindTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeServer()
+        self.sent = []
+        self.queue = WriteBehind(":memory:", self.server.send, on_sent=lambda entries, ids: self.sent.append(ids),
+                                 is_retryable=lambda error: isinstance(error, Unreachable), batch_size=4)
+
+    def pay(self, order_id, amount):
+        return self.queue.add("payment", order_id, {"order_id": order_id, "amount": amount})
+
+    def test_batches_oldest_first(self):
+        refs = [self.pay(1, amount) for amount in range(10, 70, 10)]
+        self.assertEqual(self.queue.flush(), 6)
+        self.assertEqual(self.server.batches, [refs[:4], refs[4:]])
+        self.assertEqual(self.server.paid, {"1": 210})
+        self.assertEqual(self.queue.entry(refs[0])["state"], "done")
+        self.assertEqual(self.queue.entry(refs[0])["server_id"], "1")
+        self.assertEqual(len(self.sent), 2)
+
+    def test_retryable_error_keeps_the_batch_pending(self):
+        refs = [self.pay(1, 100), self.pay(2, 50)]
+        self.server.down = True
+        with self.assertRaises(Unreachable):
+            self.queue.flush()
+        self.assertEqual([entry["ref"] for entry in self.queue.pending()], refs)
+        self.assertEqual([entry["attempts"] for entry in self.queue.pending()], [1, 1])
+        self.assertEqual((self.server.batches, self.sent), ([refs], []))
+        self.server.down = False
+        self.assertEqual(self.queue.flush(), 2)
+        self.assertEqual(self.queue.stats()["pending"], 0)
+
+    def test_rejection_is_narrowed_down_to_the_bad_entry(self):
+        refs = [self.pay(1, amount) for amount in (10, 20, 30, -5)]
+        self.server.reject.add(-5)
+        self.assertEqual(self.queue.flush(), 3)
+        # Whole batch, then halves, then the quarter holding the rejected entry
+        self.assertEqual(self.server.batches, [refs, refs[:2], refs[2:], refs[2:3], refs[3:]])
+        self.assertEqual([entry["ref"] for entry in self.queue.entries("failed")], [refs[3]])
+        self.assertIn("check constraint", self.queue.entry(refs[3])["last_error"])
+        self.assertEqual(self.server.paid, {"1": 60})
+
+        self.server.reject.clear()
+        self.assertEqual(self.queue.retry_failed(), 1)
+        self.assertEqual(self.queue.flush(), 1)
+        self.assertEqual(self.server.paid, {"1": 55})
+
+    def test_resent_batch_is_not_counted_twice(self):
+        refs = [self.pay(1, 100), self.queue.add("return", 1, {"order_product_id": 7, "total_refund": 40})]
+        self.server.lose_answers = 1
+        with self.assertRaises(Unreachable):
+            self.queue.flush()
+        self.assertEqual(len(self.queue.pending()), 2)  # Recorded, but the queue never heard back
+        self.assertEqual(self.queue.flush(), 2)
+        self.assertEqual(self.server.batches, [refs, refs])
+        self.assertEqual((self.server.paid, self.server.refunded), ({"1": 100}, {"1": 40}))
+        self.assertEqual(self.sent, [{refs[0]: "1", refs[1]: "2"}])
+
+    def test_add_pending_counts_each_queued_row_once(self):
+        self.pay(1, 100)
+        self.pay(1, 50)
+        self.queue.add("return", 1, {"order_product_id": 7, "total_refund": 30})
+        self.pay(3, 10)  # Not asked for
+
+        def balances():
+            return {1: {"total": 400.0, "paid": 25.0, "refunded": 0.0, "balance": 375.0},
+                    2: {"total": 80.0, "paid": 0.0, "refunded": 0.0, "balance": 80.0}}
+        result = self.queue.add_pending(balances())
+        self.assertEqual(result[1], {"total": 400.0, "paid": 175.0, "refunded": 30.0, "balance": 225.0})
+        self.assertEqual(result[2], balances()[2])
+
+        # Once sent, the rows are in the ledger itself and no longer added
+        self.queue.flush()
+        self.assertEqual(self.queue.add_pending(balances()), balances())
+
+    def test_pending_by_order(self):
+        self.pay(1, 100)
+        self.pay("2", 50)
+        self.assertEqual([entry["order_id"] for entry in self.queue.pending([2, 1, 1])], ["1", "2"])
+        self.assertEqual(self.queue.pending([9]), [])
+
+if __name__ == "__main__":
+    unittest.main()